@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0001_initial'),
+        ('contabilidad', '0008_asiento_fecha_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['fecha', 'id'], name='compra_fecha_id_idx'),
+        ),
+    ]
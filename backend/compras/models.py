@@ -105,6 +105,10 @@ class Compra(models.Model):
         verbose_name_plural = "Compras"
         ordering = ['-fecha']
         unique_together = ['proveedor', 'numero_factura']  # Evita duplicados
+        indexes = [
+            # Respaldo de la paginación por cursor (fecha, id)
+            models.Index(fields=['fecha', 'id'], name='compra_fecha_id_idx'),
+        ]
 
     def __str__(self):
         return f"Compra {self.numero_factura} - {self.proveedor.nombre}"
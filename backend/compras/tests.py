@@ -1,3 +1,137 @@
-from django.test import TestCase
+# compras/tests.py
+import csv
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from contabilidad.contabilizacion import contabilizar_documentos
+from contabilidad.models import CuentaContable, ReglaContabilizacion
+from contabilidad.tests import PruebaContable
+from .models import Compra, Proveedor
+from .views import ENCABEZADOS_LIBRO
 
-# Create your tests here.
+
+class CompraTests(PruebaContable):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.proveedor = Proveedor.objects.create(rif='J-00000002-0', nombre='Proveedor Prueba')
+
+    def comprar(self, numero, planilla=None, base=Decimal('100.00'), iva=Decimal('16.00'), estado=201, **campos):
+        datos = {
+            'fecha': '2025-03-10',
+            'numero_factura': numero,
+            'proveedor': self.proveedor.id,
+            'subtotal': str(base),
+            'base_imponible_general': str(base),
+            'impuesto_general': str(iva),
+            'total_compra': str(base + iva),
+            **campos,
+        }
+        if planilla:
+            datos['planilla_importacion'] = planilla
+        respuesta = self.cliente.post('/api/compras/compras/', datos, format='json')
+        self.assertEqual(respuesta.status_code, estado, respuesta.data)
+        if estado != 201:
+            return respuesta
+        return Compra.objects.get(pk=respuesta.data['id'])
+
+    def lineas(self, compra):
+        return sorted(
+            (m.cuenta.codigo, m.debe, m.haber)
+            for m in compra.asiento.movimientos.select_related('cuenta')
+        )
+
+    def test_compra_nacional_con_reglas_predeterminadas(self):
+        compra = self.comprar('C-1')
+        self.assertEqual(compra.asiento.origen_tipo, 'compra')
+        self.assertEqual(self.lineas(compra), [
+            ('2110', Decimal('16.00'), Decimal('0.00')),
+            ('2120', Decimal('0.00'), Decimal('116.00')),
+            ('5120', Decimal('100.00'), Decimal('0.00')),
+        ])
+
+    def test_compra_con_planilla_va_a_compras_en_el_exterior(self):
+        compra = self.comprar('C-2', planilla='P-001')
+        self.assertIn(('5130', Decimal('100.00'), Decimal('0.00')), self.lineas(compra))
+
+    def test_sin_cuenta_de_la_regla_la_compra_se_guarda_sin_asiento(self):
+        CuentaContable.objects.filter(codigo='5130').delete()
+        compra = self.comprar('C-3', planilla='P-002')
+        self.assertIsNone(compra.asiento)
+
+    def test_contabilizar_de_nuevo_no_duplica_el_asiento(self):
+        compra = self.comprar('C-4')
+        asiento_id = compra.asiento_id
+        compra.asiento = None
+        self.assertEqual(contabilizar_documentos([compra]), [])
+        self.assertEqual(compra.asiento_id, asiento_id)
+
+    def test_la_base_es_el_total_menos_iva_no_el_subtotal(self):
+        # 100 gravados + 50 exentos, 20 de descuento: total 146 con 16 de IVA
+        compra = self.comprar('C-5', subtotal='150.00', descuento='20.00', total_compra='146.00')
+        self.assertEqual(self.lineas(compra), [
+            ('2110', Decimal('16.00'), Decimal('0.00')),
+            ('2120', Decimal('0.00'), Decimal('146.00')),
+            ('5120', Decimal('130.00'), Decimal('0.00')),
+        ])
+
+    def test_reglas_que_no_cuadran_responden_400_sin_guardar_la_compra(self):
+        for orden, (codigo, lado, importe) in enumerate([('5120', 'debe', 'base'), ('2120', 'haber', 'total')]):
+            ReglaContabilizacion.objects.create(
+                tipo_documento='compra', cuenta=self.cuentas[codigo], lado=lado, importe=importe, orden=orden
+            )
+        respuesta = self.comprar('C-6', estado=400)
+        self.assertIn('no balanceado', str(respuesta.data['asiento']))
+        self.assertFalse(Compra.objects.filter(numero_factura='C-6').exists())
+
+    # === Exportación del libro de compras ===
+
+    def descargar_libro(self, **parametros):
+        respuesta = self.cliente.get('/api/compras/reportes/libro-compras/', parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        contenido = b''.join(respuesta.streaming_content).decode('utf-8')
+        return respuesta, contenido
+
+    def test_libro_en_csv_con_encabezado_y_totales(self):
+        marzo = self.comprar('C-10')
+        self.comprar('C-11', fecha='2025-04-02', base=Decimal('50.00'), iva=Decimal('8.00'))
+
+        respuesta, contenido = self.descargar_libro(formato='csv', anio=2025, mes=3)
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="libro-compras.csv"', respuesta['Content-Disposition'])
+
+        filas = list(csv.reader(StringIO(contenido)))
+        self.assertEqual(filas[0], ENCABEZADOS_LIBRO)
+        self.assertEqual([fila[:3] for fila in filas[1:-3]], [[str(marzo.id), '2025-03-10', 'C-10']])
+        self.assertEqual(filas[-3:], [
+            ['TOTAL', 'General 16%', '100.00', '16.00'],
+            ['TOTAL', 'Reducida 8%', '0.00', '0.00'],
+            ['TOTAL', 'Adicional 22%', '0.00', '0.00'],
+        ])
+
+    def test_libro_en_txt_tabulado_sin_encabezado(self):
+        primera = self.comprar('C-12')
+        segunda = self.comprar('C-13', fecha='2025-03-20')
+
+        respuesta, contenido = self.descargar_libro(formato='txt')
+        self.assertEqual(respuesta['Content-Type'], 'text/plain; charset=utf-8')
+        filas = list(csv.reader(StringIO(contenido), delimiter='\t'))
+        self.assertEqual([fila[0] for fila in filas[:-3]], [str(primera.id), str(segunda.id)])
+        self.assertEqual(len(filas[0]), len(ENCABEZADOS_LIBRO))
+        self.assertEqual(filas[-3], ['TOTAL', 'General 16%', '200.00', '32.00'])
+
+    def test_libro_se_envia_por_bloques(self):
+        for numero in range(3):
+            self.comprar(f'C-2{numero}')
+        with mock.patch('contabilidad.libros_fiscales.FILAS_POR_BLOQUE', 2):
+            respuesta = self.cliente.get('/api/compras/reportes/libro-compras/', {'formato': 'csv'})
+            bloques = list(respuesta.streaming_content)
+        # Encabezado + 1 fila, 2 filas, totales
+        self.assertEqual(len(bloques), 3)
+
+    def test_formato_o_periodo_invalido_responde_400(self):
+        for parametros in ({'formato': 'pdf'}, {'formato': 'csv', 'mes': 3}, {'formato': 'csv', 'anio': 'x'}):
+            respuesta = self.cliente.get('/api/compras/reportes/libro-compras/', parametros)
+            self.assertEqual(respuesta.status_code, 400, parametros)
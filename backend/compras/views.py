@@ -1,72 +1,51 @@
 # compras/views.py
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework import viewsets
 from rest_framework.response import Response
-from django.contrib.auth import get_user_model
+from django.db import transaction
 from .models import Compra, Proveedor
 from .serializers import CompraSerializer, ProveedorSerializer
-from contabilidad.models import AsientoContable, Movimiento, CuentaContable
-from decimal import Decimal
-
-User = get_user_model()
+from contabilidad.paginacion import FechaIdCursorPagination
+from contabilidad.libros_fiscales import filtrar_periodo, formato_exportacion, respuesta_libro
+from contabilidad.cache_reportes import VERSION_DOCUMENTOS, reporte_cacheado
+from contabilidad.contabilizacion import ErrorContabilizacion
 
 class CompraViewSet(viewsets.ModelViewSet):
     queryset = Compra.objects.all().order_by('-fecha')
     serializer_class = CompraSerializer
+    pagination_class = FechaIdCursorPagination
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        # Guardar la compra
-        compra = serializer.save(usuario=self.request.user)
-
-        # Obtener cuentas del plan de cuentas (ajusta según tu estructura)
+        # Guardar la compra: el asiento lo genera la señal post_save
+        # (crear_asiento_compra) en esta misma transacción
         try:
-            cuenta_proveedores = CuentaContable.objects.get(codigo="2120")  # Cuentas por Pagar
-            cuenta_compras = CuentaContable.objects.get(codigo="5120")      # Compras Netas Nacionales
-            cuenta_iva = CuentaContable.objects.get(codigo="2110")          # Efectos por Pagar (IVA)
-        except CuentaContable.DoesNotExist:
-            raise Exception("Las cuentas contables requeridas no existen. Verifica el Plan de Cuentas.")
-
-        # Calcular total IVA
-        total_iva = (
-            compra.impuesto_general +
-            compra.impuesto_reducido +
-            compra.impuesto_adicional
-        )
-
-        # Crear asiento contable
-        asiento = AsientoContable.objects.create(
-            fecha=compra.fecha,
-            descripcion=f"Compra N° {compra.numero_factura} a {compra.proveedor.nombre}",
-            usuario=self.request.user
-        )
-
-        # Movimientos: Debe (compras + IVA), Haber (proveedor)
-        Movimiento.objects.create(
-            asiento=asiento,
-            cuenta=cuenta_compras,
-            debe=compra.subtotal,
-            haber=Decimal('0.00')
-        )
-        Movimiento.objects.create(
-            asiento=asiento,
-            cuenta=cuenta_iva,
-            debe=total_iva,
-            haber=Decimal('0.00')
-        )
-        Movimiento.objects.create(
-            asiento=asiento,
-            cuenta=cuenta_proveedores,
-            debe=Decimal('0.00'),
-            haber=compra.total_compra
-        )
-
-        # Asociar asiento a la compra
-        compra.asiento = asiento
-        compra.save()
+            serializer.save(usuario=self.request.user)
+        except ErrorContabilizacion as error:
+            # Reglas de contabilización que no cuadran: la compra no se guarda
+            raise ValidationError({'asiento': str(error)})
 
 @api_view(['GET'])
+@reporte_cacheado('libro_compras', versiones=(VERSION_DOCUMENTOS,), sin_cache=('formato',))
 def libro_compras(request):
-    compras = Compra.objects.all().order_by('fecha')
+    """
+    Libro de Compras. Filtra por ?anio= y ?mes=.
+    Con ?formato=csv|txt se descarga en streaming (layout SENIAT en txt),
+    con los totales por alícuota al final.
+    """
+    formato = formato_exportacion(request)
+    compras = filtrar_periodo(Compra.objects.select_related('proveedor'), request).order_by('fecha', 'id')
+
+    if formato:
+        return respuesta_libro(
+            compras.iterator(chunk_size=2000),
+            ENCABEZADOS_LIBRO,
+            _fila_libro,
+            'libro-compras',
+            formato
+        )
+
     data = []
 
     for c in compras:
@@ -90,6 +69,24 @@ def libro_compras(request):
 
     return Response(data)
 
+
+ENCABEZADOS_LIBRO = [
+    'operacion', 'fecha', 'numero_factura', 'numero_control', 'rif_proveedor', 'nombre_proveedor',
+    'tipo_transaccion', 'total_compra', 'compras_sin_derecho_fiscal',
+    'base_general', 'impuesto_general', 'base_reducida', 'impuesto_reducido',
+    'base_adicional', 'impuesto_adicional',
+]
+
+
+def _fila_libro(c):
+    return [
+        c.id, c.fecha.isoformat(), c.numero_factura, c.numero_control or '',
+        c.proveedor.rif, c.proveedor.nombre, 'F', c.total_compra, '0.00',
+        c.base_imponible_general, c.impuesto_general,
+        c.base_imponible_reducida, c.impuesto_reducido,
+        c.base_imponible_adicional, c.impuesto_adicional,
+    ]
+
 class ProveedorViewSet(viewsets.ModelViewSet):
     queryset = Proveedor.objects.all()
     serializer_class = ProveedorSerializer
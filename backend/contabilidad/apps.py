@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ContabilidadConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contabilidad'
+
+    def ready(self):
+        import contabilidad.signals
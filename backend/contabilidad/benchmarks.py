@@ -0,0 +1,311 @@
+# contabilidad/benchmarks.py
+import math
+import multiprocessing
+import statistics
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+
+def percentil(valores, porcentaje):
+    """Percentil por el método del rango más cercano (valores no vacíos)."""
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, math.ceil(porcentaje / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def usuario_benchmark():
+    """Usuario staff con el que se autentican las peticiones (se crea si no existe)."""
+    Usuario = get_user_model()
+    usuario = Usuario.objects.filter(is_staff=True, is_active=True).order_by('id').first()
+    if usuario is None:
+        usuario = Usuario.objects.create_superuser('benchmark@localhost', 'Benchmark', 'Sistema')
+    return usuario
+
+
+def entorno_medicion():
+    """
+    Ajustes durante las mediciones:
+    - 'testserver' en ALLOWED_HOSTS para el cliente de pruebas de DRF.
+    - Sin caché de reportes ni agrupación de peticiones: cada ejecución
+      calcula el reporte (con la caché solo se mediría la primera).
+    - La caché 'reportes' se sustituye por una local y separada. Los datos
+      sintéticos se descartan con un rollback que también devuelve los
+      contadores de versión a su valor anterior: un reporte guardado con esos
+      contadores se serviría después como si fuera de los datos reales.
+    """
+    return override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        REPORTES_CACHE_ACTIVA=False,
+        REPORTES_AGRUPAR=False,
+        CACHES={
+            **settings.CACHES,
+            'reportes': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'},
+        },
+    )
+
+
+def cliente_api(usuario):
+    cliente = APIClient()
+    cliente.force_authenticate(user=usuario)
+    return cliente
+
+
+def reportes(anio):
+    """Reportes medidos: nombre → (url, parámetros)."""
+    return {
+        'balance_comprobacion': ('/api/contabilidad/reportes/balance-comprobacion/', {}),
+        'balance_comprobacion_periodo': ('/api/contabilidad/reportes/balance-comprobacion/', {
+            'desde': f'{anio}-01-01', 'hasta': f'{anio}-12-31',
+        }),
+        'balance_comprobacion_nivel': ('/api/contabilidad/reportes/balance-comprobacion/', {'nivel': 2}),
+        'balance_general': ('/api/contabilidad/reportes/balance-general/', {}),
+        'estado_resultados': ('/api/contabilidad/reportes/estado-resultados/', {}),
+        'libro_diario': ('/api/contabilidad/reportes/libro-diario/', {'page_size': 100}),
+        'libro_mayor': ('/api/contabilidad/reportes/libro-mayor/', {'prefijo': '11', 'page_size': 1000}),
+        'libro_compras': ('/api/compras/reportes/libro-compras/', {'anio': anio}),
+        'libro_compras_txt': ('/api/compras/reportes/libro-compras/', {'anio': anio, 'formato': 'txt'}),
+        'libro_ventas': ('/api/ventas/reportes/libro-ventas/', {'anio': anio}),
+        'libro_ventas_csv': ('/api/ventas/reportes/libro-ventas/', {'anio': anio, 'formato': 'csv'}),
+    }
+
+
+def _peticion(cliente, url, parametros):
+    respuesta = cliente.get(url, parametros)
+    if respuesta.streaming:
+        contenido = b''.join(respuesta.streaming_content)
+    else:
+        contenido = respuesta.content
+    return respuesta.status_code, len(contenido)
+
+
+def medir_reporte(cliente, url, parametros, repeticiones=5):
+    """
+    Mide un reporte a través del cliente de pruebas de DRF, sin caché de
+    reportes (ver entorno_medicion):
+    - Una ejecución de calentamiento y `repeticiones` cronometradas
+      (mediana, p95, mínimo y máximo en milisegundos).
+    - Una ejecución adicional que cuenta las consultas SQL y mide el pico de
+      memoria de Python con tracemalloc (por separado, porque ambos frenan).
+    """
+    with entorno_medicion():
+        estado, tamano = _peticion(cliente, url, parametros)
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            _peticion(cliente, url, parametros)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as consultas:
+                _peticion(cliente, url, parametros)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'estado': estado,
+        'bytes': tamano,
+        'consultas': len(consultas.captured_queries),
+        'memoria_pico_kb': round(pico / 1024),
+        'tiempo_ms': {
+            'p50': round(statistics.median(tiempos), 2),
+            'p95': round(percentil(tiempos, 95), 2),
+            'min': round(min(tiempos), 2),
+            'max': round(max(tiempos), 2),
+        },
+    }
+
+
+def comparar_presupuesto(resultados, presupuesto, tolerancia):
+    """
+    Regresiones respecto a un presupuesto con el formato
+    {tamaño: {reporte: {'consultas', 'tiempo_ms', 'memoria_pico_kb'}}}.
+
+    El número de consultas no depende del equipo: cualquier consulta extra
+    (ej. un N+1) es una regresión. Tiempo (p50) y memoria admiten `tolerancia`
+    (0.25 = 25 % por encima del presupuesto).
+    """
+    regresiones = []
+    for tamano, por_reporte in presupuesto.items():
+        for nombre, limite in por_reporte.items():
+            medido = resultados.get(tamano, {}).get('reportes', {}).get(nombre)
+            if medido is None:
+                continue
+            if medido['estado'] != 200:
+                regresiones.append(f"{tamano} / {nombre}: respondió {medido['estado']}")
+            if 'consultas' in limite and medido['consultas'] > limite['consultas']:
+                regresiones.append(
+                    f"{tamano} / {nombre}: {medido['consultas']} consultas (presupuesto {limite['consultas']})"
+                )
+            if 'tiempo_ms' in limite and medido['tiempo_ms']['p50'] > limite['tiempo_ms'] * (1 + tolerancia):
+                regresiones.append(
+                    f"{tamano} / {nombre}: p50 {medido['tiempo_ms']['p50']} ms (presupuesto {limite['tiempo_ms']} ms)"
+                )
+            if ('memoria_pico_kb' in limite
+                    and medido['memoria_pico_kb'] > limite['memoria_pico_kb'] * (1 + tolerancia)):
+                regresiones.append(
+                    f"{tamano} / {nombre}: {medido['memoria_pico_kb']} KB de memoria "
+                    f"(presupuesto {limite['memoria_pico_kb']} KB)"
+                )
+    return regresiones
+
+
+def presupuesto_desde(resultados):
+    """Presupuesto con los valores medidos, para guardarlo como referencia."""
+    return {
+        tamano: {
+            nombre: {
+                'consultas': medido['consultas'],
+                'tiempo_ms': medido['tiempo_ms']['p50'],
+                'memoria_pico_kb': medido['memoria_pico_kb'],
+            }
+            for nombre, medido in datos['reportes'].items()
+        }
+        for tamano, datos in resultados.items()
+    }
+
+
+# === Escrituras concurrentes ===
+TIPOS_ESCRITURA = {
+    # tipo: (url, modelo del documento creado)
+    'asiento': ('/api/contabilidad/asientos/', 'contabilidad.AsientoContable'),
+    'compra': ('/api/compras/compras/', 'compras.Compra'),
+    'venta': ('/api/ventas/ventas/', 'ventas.Venta'),
+}
+
+
+def clasificar_error(error):
+    """'deadlock', 'serializacion', 'bloqueo' (SQLite) o 'error', según el SQLSTATE."""
+    causa = error.__cause__ or error
+    codigo = getattr(causa, 'pgcode', None) or getattr(getattr(causa, 'diag', None), 'sqlstate', None)
+    if codigo == '40P01':
+        return 'deadlock'
+    if codigo == '40001':
+        return 'serializacion'
+    if 'database is locked' in str(error):
+        return 'bloqueo'
+    return 'error'
+
+
+def _datos_escritura(tipo, numero, contexto):
+    monto = 100 + numero % 900
+    iva = round(monto * 0.16, 2)
+    if tipo == 'asiento':
+        return {
+            'fecha': contexto['fecha'],
+            'descripcion': f"Benchmark {numero}",
+            'movimientos': [
+                {'cuenta': contexto['cuenta_debe'], 'debe': monto, 'haber': 0},
+                {'cuenta': contexto['cuenta_haber'], 'debe': 0, 'haber': monto},
+            ],
+        }
+    documento = {
+        'fecha': contexto['fecha'],
+        'numero_factura': f"BW-{contexto['etiqueta']}-{numero}",
+        'subtotal': monto,
+        'base_imponible_general': monto,
+        'impuesto_general': iva,
+    }
+    if tipo == 'compra':
+        return {**documento, 'proveedor': contexto['proveedor_id'], 'total_compra': round(monto + iva, 2)}
+    return {**documento, 'cliente_id': contexto['cliente_id'], 'total': round(monto + iva, 2), 'estado': 'emitida'}
+
+
+def ejecutar_escritor(argumentos):
+    """
+    Un escritor: `operaciones` POST a la API, alternando los tipos pedidos.
+    Devuelve [(tipo, resultado, latencia_ms, id_creado), ...] donde
+    resultado es 'ok', 'http_<estado>' o la clase de error de clasificar_error().
+    """
+    indice, operaciones, contexto = argumentos
+    cliente = cliente_api(get_user_model().objects.get(pk=contexto['usuario_id']))
+    tipos = contexto['tipos']
+    muestras = []
+    try:
+        for n in range(operaciones):
+            tipo = tipos[(indice + n) % len(tipos)]
+            numero = indice * operaciones + n
+            inicio = time.perf_counter()
+            creado = None
+            try:
+                respuesta = cliente.post(
+                    TIPOS_ESCRITURA[tipo][0], _datos_escritura(tipo, numero, contexto), format='json'
+                )
+                if respuesta.status_code == 201:
+                    resultado = 'ok'
+                    creado = respuesta.data.get('id')
+                else:
+                    resultado = f'http_{respuesta.status_code}'
+            except DatabaseError as error:
+                resultado = clasificar_error(error)
+            muestras.append((tipo, resultado, (time.perf_counter() - inicio) * 1000, creado))
+    finally:
+        # Cada hilo o proceso cierra su propia conexión
+        connections.close_all()
+    return muestras
+
+
+def medir_escrituras(contexto, escritores=8, operaciones=100, procesos=False):
+    """
+    Lanza `escritores` escritores concurrentes (hilos o, con `procesos`,
+    procesos fork) y resume rendimiento, latencias y errores por tipo.
+    Devuelve (resumen, ids creados por tipo).
+    """
+    if escritores < 1 or operaciones < 1:
+        raise ValueError('escritores y operaciones deben ser mayores que 0')
+    argumentos = [(indice, operaciones, contexto) for indice in range(escritores)]
+    if procesos:
+        # Las conexiones abiertas no deben compartirse con los procesos hijos
+        connections.close_all()
+        pool = ProcessPoolExecutor(max_workers=escritores, mp_context=multiprocessing.get_context('fork'))
+    else:
+        pool = ThreadPoolExecutor(max_workers=escritores)
+
+    with entorno_medicion():
+        inicio = time.perf_counter()
+        with pool:
+            muestras = [muestra for resultado in pool.map(ejecutar_escritor, argumentos) for muestra in resultado]
+        duracion = time.perf_counter() - inicio
+
+    creados = defaultdict(list)
+    por_tipo = defaultdict(list)
+    for tipo, resultado, latencia, creado in muestras:
+        por_tipo[tipo].append((resultado, latencia))
+        if creado is not None:
+            creados[tipo].append(creado)
+
+    def resumir(filas):
+        latencias = [latencia for _, latencia in filas]
+        resultados = Counter(resultado for resultado, _ in filas)
+        return {
+            'operaciones': len(filas),
+            'exitosas': resultados.pop('ok', 0),
+            'por_segundo': round(len(filas) / duracion, 1) if duracion else None,
+            'latencia_ms': {
+                'p50': round(percentil(latencias, 50), 2) if latencias else None,
+                'p99': round(percentil(latencias, 99), 2) if latencias else None,
+                'max': round(max(latencias), 2) if latencias else None,
+            },
+            'fallos': dict(resultados),
+        }
+
+    todas = [fila for filas in por_tipo.values() for fila in filas]
+    resumen = {
+        'escritores': escritores,
+        'modo': 'procesos' if procesos else 'hilos',
+        'duracion_s': round(duracion, 2),
+        # Cada operación exitosa genera un asiento (salvo con la cola asíncrona activa)
+        'asientos_por_segundo': round(sum(len(ids) for ids in creados.values()) / duracion, 1) if duracion else None,
+        'total': resumir(todas),
+        'por_tipo': {tipo: resumir(filas) for tipo, filas in por_tipo.items()},
+    }
+    return resumen, dict(creados)
@@ -0,0 +1,210 @@
+# contabilidad/cache_reportes.py
+import hashlib
+import logging
+import os
+import time
+from functools import wraps
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from rest_framework.response import Response
+from sistema_contable.metricas import incrementar
+from .models import VersionContable
+from .versiones import incrementar_version_al_confirmar
+
+logger = logging.getLogger(__name__)
+
+# Contador que cambia con cada escritura de asientos o movimientos
+VERSION_LIBRO = 'libro_contable'
+# Contador que cambia con cada alta, edición o baja de compras, ventas,
+# proveedores o clientes (libros fiscales)
+VERSION_DOCUMENTOS = 'documentos_fiscales'
+# Los reportes también muestran nombres y clasificaciones del plan de cuentas
+VERSIONES_REPORTES = (VERSION_LIBRO, 'plan_cuentas')
+
+# Bloqueos por archivo (motores sin advisory locks): cantidad fija de archivos,
+# dos reportes distintos comparten uno con probabilidad 1/BLOQUEOS_ARCHIVO
+BLOQUEOS_ARCHIVO = 256
+# Espera de un proceso entre dos consultas a la caché y al bloqueo: empieza
+# en INTERVALO_ESPERA y se duplica hasta INTERVALO_ESPERA_MAXIMO segundos
+INTERVALO_ESPERA = 0.05
+INTERVALO_ESPERA_MAXIMO = 1.0
+# Backends cuya caché es propia de cada proceso: los demás workers no ven sus resultados
+CACHES_POR_PROCESO = (LocMemCache, DummyCache)
+
+
+def invalidar_libro():
+    """
+    Registra un cambio en el libro. Se llama dentro de la transacción que
+    escribe asientos o movimientos; la versión cambia una sola vez, al
+    confirmarla (si se revierte, no cambia). Si el incremento falla, se
+    vacía la caché de reportes.
+    """
+    incrementar_version_al_confirmar(VERSION_LIBRO, al_fallar=vaciar_cache_reportes)
+
+
+def invalidar_documentos():
+    """Registra un cambio en compras, ventas o sus contrapartes (misma regla que invalidar_libro)."""
+    incrementar_version_al_confirmar(VERSION_DOCUMENTOS, al_fallar=vaciar_cache_reportes)
+
+
+def vaciar_cache_reportes():
+    """
+    Sin el incremento de versión, las claves actuales seguirían sirviendo los
+    datos anteriores hasta expirar: se borran todas.
+    """
+    try:
+        caches['reportes'].clear()
+    except Exception:
+        logger.exception("No se pudo vaciar la caché de reportes")
+
+
+def version_reportes(versiones=VERSIONES_REPORTES):
+    """Sello con los contadores `versiones` (una consulta)."""
+    valores = dict(
+        VersionContable.objects.filter(nombre__in=versiones).values_list('nombre', 'valor')
+    )
+    return '.'.join(str(valores.get(nombre, 0)) for nombre in versiones)
+
+
+def clave_reporte(nombre, parametros, version):
+    consulta = urlencode(sorted((clave, valor) for clave in parametros for valor in parametros.getlist(clave)))
+    return f"reporte:{nombre}:{version}:{hashlib.sha1(consulta.encode()).hexdigest()}"
+
+
+class BloqueoReporte:
+    """
+    Bloqueo exclusivo entre workers para una clave de reporte, sin espera:
+    `intentar()` devuelve False si otro proceso (o hilo) lo tiene.
+
+    - PostgreSQL: pg_try_advisory_lock sobre un entero derivado de la clave.
+      Es de sesión: si el worker muere, la base de datos lo libera.
+    - Otros motores: flock sobre un archivo en REPORTES_BLOQUEOS_DIRECTORIO
+      (solo coordina procesos del mismo equipo).
+    """
+    def __init__(self, clave):
+        resumen = hashlib.sha1(clave.encode()).digest()
+        self.numero = int.from_bytes(resumen[:8], 'big', signed=True)
+        self.archivo = None
+
+    def intentar(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', [self.numero])
+                return cursor.fetchone()[0]
+
+        import fcntl
+        directorio = settings.REPORTES_BLOQUEOS_DIRECTORIO
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, f'reporte-{self.numero % BLOQUEOS_ARCHIVO:03d}.lock')
+        archivo = open(ruta, 'a')
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            archivo.close()
+            return False
+        self.archivo = archivo
+        return True
+
+    def liberar(self):
+        if self.archivo is not None:
+            # Cerrar el archivo libera el flock
+            self.archivo.close()
+            self.archivo = None
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [self.numero])
+
+
+def agrupar_peticiones():
+    """
+    Si las peticiones idénticas simultáneas deben agruparse: REPORTES_AGRUPAR
+    verdadero o falso, o 'auto' (solo con una caché 'reportes' compartida).
+    """
+    valor = settings.REPORTES_AGRUPAR
+    if not isinstance(valor, str):
+        return bool(valor)
+    if valor.strip().lower() != 'auto':
+        return valor.strip().lower() in ('1', 'true', 'yes', 'on', 'si', 'sí')
+    # Clase exacta: una subclase puede ser un backend compartido
+    return type(caches['reportes']) not in CACHES_POR_PROCESO
+
+
+def _respuesta_cacheada(datos, estado):
+    response = Response(datos)
+    response['X-Cache'] = estado
+    return response
+
+
+def reporte_cacheado(nombre, versiones=VERSIONES_REPORTES, sin_cache=()):
+    """
+    Guarda en la caché 'reportes' los datos de una vista de reporte (debajo de
+    @api_view), con clave = reporte + parámetros + versión de `versiones`.
+
+    No hay expiración por tiempo que esperar: cualquier escritura cambia la
+    versión y las consultas siguientes usan claves nuevas. La versión se lee
+    antes de calcular, de modo que un resultado nunca queda guardado bajo una
+    versión posterior a los datos que contiene.
+
+    Peticiones idénticas simultáneas se agrupan (REPORTES_AGRUPAR): solo la que
+    obtiene el BloqueoReporte de la clave calcula el reporte; las demás esperan
+    a que su resultado aparezca en la caché (X-Cache: COALESCED), hasta
+    REPORTES_ESPERA_MAXIMA segundos, consultando con esperas crecientes
+    (INTERVALO_ESPERA..INTERVALO_ESPERA_MAXIMO). Entre workers requiere un
+    backend de caché compartido: ver agrupar_peticiones(). Las peticiones con
+    algún parámetro de `sin_cache` (ej. descargas en streaming) no pasan por
+    la caché.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            parametros = request.query_params
+            if not settings.REPORTES_CACHE_ACTIVA or any(p in parametros for p in sin_cache):
+                return vista(request, *args, **kwargs)
+
+            cache = caches['reportes']
+            clave = clave_reporte(nombre, parametros, version_reportes(versiones))
+            datos = cache.get(clave)
+            if datos is not None:
+                incrementar('reportes_cache_total', reporte=nombre, resultado='acierto')
+                return _respuesta_cacheada(datos, 'HIT')
+
+            bloqueo = None
+            if agrupar_peticiones():
+                bloqueo = BloqueoReporte(clave)
+                limite = time.monotonic() + settings.REPORTES_ESPERA_MAXIMA
+                espera = INTERVALO_ESPERA
+                while not bloqueo.intentar():
+                    time.sleep(max(min(espera, limite - time.monotonic()), 0))
+                    espera = min(espera * 2, INTERVALO_ESPERA_MAXIMO)
+                    datos = cache.get(clave)
+                    if datos is not None:
+                        incrementar('reportes_cache_total', reporte=nombre, resultado='agrupada')
+                        return _respuesta_cacheada(datos, 'COALESCED')
+                    if time.monotonic() >= limite:
+                        # El cálculo en curso tarda demasiado (o falló): se calcula aparte
+                        bloqueo = None
+                        break
+
+            try:
+                if bloqueo is not None:
+                    # Terminó entre la última consulta a la caché y el bloqueo
+                    datos = cache.get(clave)
+                    if datos is not None:
+                        incrementar('reportes_cache_total', reporte=nombre, resultado='agrupada')
+                        return _respuesta_cacheada(datos, 'COALESCED')
+
+                incrementar('reportes_cache_total', reporte=nombre, resultado='fallo')
+                response = vista(request, *args, **kwargs)
+                if response.status_code == 200 and isinstance(response, Response):
+                    cache.set(clave, response.data)
+            finally:
+                if bloqueo is not None:
+                    bloqueo.liberar()
+            response['X-Cache'] = 'MISS'
+            return response
+        return envoltura
+    return decorador
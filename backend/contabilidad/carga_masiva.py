@@ -0,0 +1,255 @@
+# contabilidad/carga_masiva.py
+import io
+import json
+import logging
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FILAS_POR_BLOQUE = 5000
+
+
+# === Lectura de fixtures en streaming ===
+def _codificacion(ruta):
+    # Los fixtures exportados desde Windows vienen en UTF-16 con BOM
+    with open(ruta, 'rb') as archivo:
+        inicio = archivo.read(2)
+    return 'utf-16' if inicio in (b'\xff\xfe', b'\xfe\xff') else 'utf-8-sig'
+
+
+def leer_fixture(ruta, tamano_lectura=1 << 16):
+    """
+    Recorre los objetos de un fixture JSON (una lista de objetos) sin
+    cargar el archivo completo: lee bloques y decodifica objeto por objeto.
+    """
+    decodificador = json.JSONDecoder()
+    with open(ruta, encoding=_codificacion(ruta)) as archivo:
+        buffer = ''
+        fin_archivo = False
+        while True:
+            buffer = buffer.lstrip(' \t\r\n,[')
+            if buffer.startswith(']'):
+                return
+            if buffer:
+                try:
+                    objeto, fin = decodificador.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    if fin_archivo:
+                        raise
+                else:
+                    yield objeto
+                    buffer = buffer[fin:]
+                    continue
+            elif fin_archivo:
+                return
+
+            bloque = archivo.read(tamano_lectura)
+            fin_archivo = not bloque
+            buffer += bloque
+
+
+# === Escritura masiva ===
+def _texto_copy(valor):
+    """Valor en el formato de texto de COPY de PostgreSQL."""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    return (
+        str(valor).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def copiar_filas(modelo, campos, filas, actualizar=True):
+    """
+    Inserta filas (listas de valores en el orden de `campos`) en la tabla
+    del modelo. En PostgreSQL usa COPY FROM STDIN a una tabla temporal y un
+    INSERT ... SELECT; con `actualizar`, las filas cuya clave primaria ya
+    existe se sobrescriben (como loaddata). En otros motores usa bulk_create.
+    """
+    if not filas:
+        return
+    if connection.vendor != 'postgresql':
+        _bulk_create(modelo, campos, filas, actualizar)
+        return
+
+    qn = connection.ops.quote_name
+    tabla = qn(modelo._meta.db_table)
+    temporal = qn(f'carga_{modelo._meta.db_table}')
+    columnas = ', '.join(qn(campo.column) for campo in campos)
+    datos = ''.join(
+        '\t'.join(_texto_copy(campo.get_db_prep_save(valor, connection)) for campo, valor in zip(campos, fila)) + '\n'
+        for fila in filas
+    )
+
+    conflicto = ''
+    pk = modelo._meta.pk
+    if any(campo.primary_key for campo in campos):
+        otros = [campo for campo in campos if not campo.primary_key]
+        if actualizar and otros:
+            asignaciones = ', '.join(f'{qn(c.column)} = EXCLUDED.{qn(c.column)}' for c in otros)
+            conflicto = f' ON CONFLICT ({qn(pk.column)}) DO UPDATE SET {asignaciones}'
+        else:
+            conflicto = f' ON CONFLICT ({qn(pk.column)}) DO NOTHING'
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE IF NOT EXISTS {temporal} (LIKE {tabla} INCLUDING DEFAULTS) ON COMMIT DROP'
+        )
+        cursor.execute(f'TRUNCATE {temporal}')
+        sql_copy = f'COPY {temporal} ({columnas}) FROM STDIN'
+        crudo = cursor.cursor
+        if hasattr(crudo, 'copy_expert'):  # psycopg2
+            crudo.copy_expert(sql_copy, io.StringIO(datos))
+        else:  # psycopg 3
+            with crudo.copy(sql_copy) as copia:
+                copia.write(datos)
+        cursor.execute(f'INSERT INTO {tabla} ({columnas}) SELECT {columnas} FROM {temporal}{conflicto}')
+
+
+def _bulk_create(modelo, campos, filas, actualizar):
+    instancias = [
+        modelo(**{campo.attname: valor for campo, valor in zip(campos, fila)})
+        for fila in filas
+    ]
+    otros = [campo.name for campo in campos if not campo.primary_key]
+    opciones = {}
+    if any(campo.primary_key for campo in campos):
+        if actualizar and otros:
+            opciones = {'update_conflicts': True, 'update_fields': otros}
+            if connection.features.supports_update_conflicts_with_target:
+                opciones['unique_fields'] = [modelo._meta.pk.name]
+        else:
+            opciones = {'ignore_conflicts': True}
+    modelo.objects.bulk_create(instancias, batch_size=1000, **opciones)
+
+
+def reiniciar_secuencias(modelos):
+    """Ajusta las secuencias de id al máximo cargado (PostgreSQL; en otros motores no hace nada)."""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), list(modelos)):
+            cursor.execute(sql)
+
+
+# === Carga de fixtures ===
+class CargadorFixtures:
+    """
+    Carga objetos de fixtures por bloques de FILAS_POR_BLOQUE con
+    copiar_filas(). No ejecuta save() ni señales. El avance va a
+    `informar(mensaje)` (por defecto, al log).
+    """
+    def __init__(self, informar=logger.info):
+        self.informar = informar
+        self.cargados = {}
+        self._campos = {}
+
+    def cargar(self, objetos):
+        modelo_actual = None
+        filas, relaciones = [], []
+        for objeto in objetos:
+            modelo = apps.get_model(objeto['model'])
+            if modelo is not modelo_actual:
+                self._volcar(modelo_actual, filas, relaciones)
+                modelo_actual, filas, relaciones = modelo, [], []
+            filas.append(self._fila(modelo, objeto, relaciones))
+            if len(filas) >= FILAS_POR_BLOQUE:
+                self._volcar(modelo_actual, filas, relaciones)
+                filas, relaciones = [], []
+        self._volcar(modelo_actual, filas, relaciones)
+
+    def _campos_modelo(self, modelo):
+        if modelo not in self._campos:
+            self._campos[modelo] = (list(modelo._meta.concrete_fields), list(modelo._meta.many_to_many))
+        return self._campos[modelo]
+
+    def _fila(self, modelo, objeto, relaciones):
+        if objeto.get('pk') is None:
+            raise ValueError(f"{objeto['model']}: los objetos del fixture deben incluir 'pk'")
+        campos, muchos = self._campos_modelo(modelo)
+        datos = objeto.get('fields', {})
+        fila = []
+        for campo in campos:
+            if campo.primary_key:
+                valor = campo.to_python(objeto['pk'])
+            elif campo.name in datos:
+                valor = campo.to_python(datos[campo.name])
+            elif getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False):
+                valor = timezone.now()
+            else:
+                valor = campo.get_default()
+            fila.append(valor)
+        for campo in muchos:
+            for destino in datos.get(campo.name) or ():
+                relaciones.append((campo, fila[campos.index(modelo._meta.pk)], destino))
+        return fila
+
+    def _volcar(self, modelo, filas, relaciones):
+        if modelo is None or not filas:
+            return
+        campos, _ = self._campos_modelo(modelo)
+        if modelo._meta.label == 'contabilidad.Movimiento':
+            completar_fecha_movimientos(campos, filas)
+        copiar_filas(modelo, campos, filas)
+        self.cargados[modelo] = self.cargados.get(modelo, 0) + len(filas)
+
+        # Relaciones muchos a muchos (ej. grupos de usuarios)
+        por_campo = {}
+        for campo, origen, destino in relaciones:
+            por_campo.setdefault(campo, []).append((origen, destino))
+        for campo, pares in por_campo.items():
+            intermedia = campo.remote_field.through
+            desde = f'{campo.m2m_field_name()}_id'
+            hacia = f'{campo.m2m_reverse_field_name()}_id'
+            intermedia.objects.bulk_create(
+                [intermedia(**{desde: origen, hacia: destino}) for origen, destino in pares],
+                ignore_conflicts=True
+            )
+
+        self.informar(f"📦 {modelo._meta.label}: {self.cargados[modelo]} filas")
+
+
+def completar_fecha_movimientos(campos, filas):
+    """
+    Movimientos de fixtures sin `fecha` (exportados antes de que existiera):
+    la toman de su asiento, ya cargado, con una consulta por bloque.
+    """
+    from .models import AsientoContable
+
+    nombres = [campo.name for campo in campos]
+    fecha, asiento = nombres.index('fecha'), nombres.index('asiento')
+    faltantes = {fila[asiento] for fila in filas if fila[fecha] is None}
+    if not faltantes:
+        return
+    fechas = dict(AsientoContable.objects.filter(id__in=faltantes).values_list('id', 'fecha'))
+    for fila in filas:
+        if fila[fecha] is None:
+            fila[fecha] = fechas.get(fila[asiento])
+
+
+def enlazar_origenes(modelos):
+    """
+    Marca origen_tipo/origen_id en los asientos enlazados a compras o ventas
+    recién cargadas (los fixtures traen el asiento, pero no su origen).
+    """
+    from .contabilizacion import DOCUMENTOS
+    from .models import AsientoContable
+
+    enlazados = 0
+    for modelo in modelos:
+        lector = DOCUMENTOS.get(modelo._meta.label_lower)
+        if lector is None:
+            continue
+        enlaces = modelo.objects.filter(
+            asiento__isnull=False, asiento__origen_id__isnull=True
+        ).values_list('id', 'asiento_id')
+        asientos = [
+            AsientoContable(id=asiento_id, origen_tipo=lector['tipo'], origen_id=documento_id)
+            for documento_id, asiento_id in enlaces.iterator(chunk_size=2000)
+        ]
+        AsientoContable.objects.bulk_update(asientos, ['origen_tipo', 'origen_id'], batch_size=1000)
+        enlazados += len(asientos)
+    return enlazados
@@ -0,0 +1,141 @@
+# contabilidad/cola.py
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from .models import TrabajoContabilizacion
+from .contabilizacion import contabilizar_documentos, modelo_documento, DOCUMENTOS
+
+# Reintentos antes de pasar un trabajo a la cola de errores ('fallido')
+MAX_INTENTOS = 5
+
+# Espera entre reintentos: 2, 4, 8... segundos, hasta 5 minutos
+ESPERA_MAXIMA = 300
+
+
+def cola_asincrona():
+    return getattr(settings, 'CONTABILIDAD_COLA_ASINCRONA', False)
+
+
+def contabilizar_documento(documento):
+    """
+    Punto de entrada de las señales de compras y ventas: genera el asiento
+    en la misma transacción o, con CONTABILIDAD_COLA_ASINCRONA, solo lo encola.
+    """
+    if cola_asincrona():
+        encolar_documentos([documento])
+    else:
+        contabilizar_documentos([documento])
+
+
+def encolar_documentos(documentos):
+    """
+    Encola la contabilización de los documentos (un INSERT). Volver a
+    encolar un documento ya pendiente no tiene efecto.
+    """
+    ahora = timezone.now()
+    TrabajoContabilizacion.objects.bulk_create([
+        TrabajoContabilizacion(
+            origen_tipo=DOCUMENTOS[documento._meta.label_lower]['tipo'],
+            origen_id=documento.pk,
+            disponible_en=ahora,
+        )
+        for documento in documentos
+    ], ignore_conflicts=True)
+
+
+def procesar_lote(tamano=500):
+    """
+    Toma hasta `tamano` trabajos pendientes y genera sus asientos con
+    inserciones masivas. Varios procesos pueden trabajar a la vez: las filas
+    tomadas se bloquean y los demás las saltan (SKIP LOCKED).
+
+    Si el lote falla se reprocesa documento por documento para aislar los
+    que dan error; estos se reintentan con espera exponencial y, tras
+    MAX_INTENTOS, quedan como 'fallido'.
+
+    Devuelve (contabilizados, con error).
+    """
+    with transaction.atomic():
+        trabajos = list(
+            TrabajoContabilizacion.objects
+            .select_for_update(skip_locked=True)
+            .filter(estado='pendiente', disponible_en__lte=timezone.now())
+            .order_by('disponible_en', 'id')[:tamano]
+        )
+        if not trabajos:
+            return 0, 0
+
+        documentos = {}
+        for trabajo in trabajos:
+            documentos.setdefault(trabajo.origen_tipo, set()).add(trabajo.origen_id)
+        cargados = {}
+        for origen_tipo, ids in documentos.items():
+            modelo, lector = modelo_documento(origen_tipo)
+            for documento in modelo.objects.select_related(*lector['relacionados']).filter(id__in=ids):
+                cargados[(origen_tipo, documento.pk)] = documento
+
+        originales = {documento: documento.asiento_id for documento in cargados.values()}
+
+        # Documentos eliminados antes de contabilizarse: no hay nada que hacer
+        pares = [(trabajo, cargados.get((trabajo.origen_tipo, trabajo.origen_id))) for trabajo in trabajos]
+
+        try:
+            with transaction.atomic():
+                contabilizar_documentos([documento for _, documento in pares if documento is not None])
+            completados, fallidos = trabajos, []
+        except Exception:
+            # Deshacer en memoria los asientos asignados por el intento revertido
+            for documento in cargados.values():
+                documento.asiento_id = originales[documento]
+            completados, fallidos = _procesar_uno_a_uno(pares)
+
+        TrabajoContabilizacion.objects.filter(id__in=[t.id for t in completados]).delete()
+        if fallidos:
+            TrabajoContabilizacion.objects.bulk_update(
+                fallidos, ['estado', 'intentos', 'ultimo_error', 'disponible_en']
+            )
+
+    return len(completados), len(fallidos)
+
+
+def _procesar_uno_a_uno(pares):
+    completados, fallidos = [], []
+    ahora = timezone.now()
+    for trabajo, documento in pares:
+        try:
+            if documento is not None:
+                with transaction.atomic():
+                    contabilizar_documentos([documento])
+            completados.append(trabajo)
+        except Exception as error:
+            trabajo.intentos += 1
+            trabajo.ultimo_error = f"{type(error).__name__}: {error}"
+            trabajo.disponible_en = ahora + timedelta(seconds=min(2 ** trabajo.intentos, ESPERA_MAXIMA))
+            if trabajo.intentos >= MAX_INTENTOS:
+                trabajo.estado = 'fallido'
+            fallidos.append(trabajo)
+    return completados, fallidos
+
+
+def reintentar_fallidos():
+    """Devuelve a la cola los trabajos de la cola de errores. Retorna cuántos."""
+    return TrabajoContabilizacion.objects.filter(estado='fallido').update(
+        estado='pendiente', intentos=0, disponible_en=timezone.now()
+    )
+
+
+def estado_cola():
+    """
+    Métricas de la cola: trabajos pendientes, fallidos y retraso en segundos
+    (antigüedad del trabajo pendiente más viejo; 0 si la cola está vacía).
+    """
+    pendientes = TrabajoContabilizacion.objects.filter(estado='pendiente')
+    resumen = pendientes.aggregate(mas_antiguo=Min('creado_en'))
+    mas_antiguo = resumen['mas_antiguo']
+    return {
+        'pendientes': pendientes.count(),
+        'fallidos': TrabajoContabilizacion.objects.filter(estado='fallido').count(),
+        'retraso_segundos': round((timezone.now() - mas_antiguo).total_seconds(), 1) if mas_antiguo else 0,
+    }
@@ -0,0 +1,256 @@
+# contabilidad/contabilizacion.py
+from collections import defaultdict
+from decimal import Decimal
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from sistema_contable.metricas import incrementar
+from .models import AsientoContable, Movimiento, ReglaContabilizacion
+from .saldos import registrar_movimientos
+from .plan_cuentas import plan_cuentas
+from .versiones import CacheVersionada
+
+CERO = Decimal('0.00')
+
+# Reglas usadas para un tipo de documento que no tiene reglas en la base de datos:
+# (tipo de documento, condición, código de cuenta, lado, importe)
+REGLAS_PREDETERMINADAS = [
+    ('compra', 'nacional', '5120', 'debe', 'base'),       # Compras Netas Nacionales
+    ('compra', 'importacion', '5130', 'debe', 'base'),    # Compras Netas en el Exterior
+    ('compra', 'todas', '2110', 'debe', 'iva'),           # Efectos por Pagar (IVA)
+    ('compra', 'todas', '2120', 'haber', 'total'),        # Cuentas por Pagar
+    ('venta', 'contado', '1111', 'debe', 'total'),        # Efectivo
+    ('venta', 'credito', '1122', 'debe', 'total'),        # Cuentas por Cobrar Clientes
+    ('venta', 'todas', '4110', 'haber', 'base'),          # Ingresos por Servicios
+    ('venta', 'todas', '2111', 'haber', 'iva'),           # IVA Débito Fiscal
+]
+
+# Cuenta a usar si la de una regla predeterminada no está en el plan
+# (bases de datos creadas antes de que el plan incluyera la 2111)
+CUENTAS_ALTERNATIVAS = {
+    '2111': '2110',
+}
+
+
+class ErrorContabilizacion(Exception):
+    pass
+
+
+def _decimal(valor):
+    # Un documento recién creado conserva los valores por defecto del modelo (floats)
+    return valor if isinstance(valor, Decimal) else Decimal(str(valor))
+
+
+def _iva(documento):
+    return sum(
+        _decimal(valor) for valor in (
+            documento.impuesto_general, documento.impuesto_reducido, documento.impuesto_adicional
+        )
+    )
+
+
+# Cómo leer cada tipo de documento: condición, total y descripción del asiento.
+# `relacionados` son los select_related necesarios para contabilizar en lote.
+DOCUMENTOS = {
+    'compras.compra': {
+        'tipo': 'compra',
+        'relacionados': ('usuario', 'proveedor'),
+        'condiciones': ('nacional', 'importacion'),
+        'condicion': lambda c: 'importacion' if c.planilla_importacion else 'nacional',
+        'total': lambda c: c.total_compra,
+        'descripcion': lambda c: f"Compra N° {c.numero_factura} a {c.proveedor.nombre}",
+    },
+    'ventas.venta': {
+        'tipo': 'venta',
+        'relacionados': ('usuario', 'cliente'),
+        'condiciones': ('contado', 'credito'),
+        'condicion': lambda v: v.condicion_pago,
+        'total': lambda v: v.total,
+        'descripcion': lambda v: f"Venta N° {v.numero_factura} a {v.cliente.nombre}",
+    },
+}
+
+
+def modelo_documento(origen_tipo):
+    """Modelo y lector de DOCUMENTOS para un origen_tipo ('compra', 'venta')."""
+    for etiqueta, lector in DOCUMENTOS.items():
+        if lector['tipo'] == origen_tipo:
+            return apps.get_model(etiqueta), lector
+    raise LookupError(f"Tipo de documento desconocido: {origen_tipo}")
+
+
+def _compilar_reglas():
+    """
+    Plan de contabilización: (tipo, condición) → [(código, lado, importe), ...],
+    con las reglas 'todas' ya combinadas con las de cada condición.
+    """
+    filas = list(
+        ReglaContabilizacion.objects.filter(activa=True)
+        .order_by('orden', 'id')
+        .values_list('tipo_documento', 'condicion', 'cuenta__codigo', 'lado', 'importe')
+    )
+    configurados = {fila[0] for fila in filas}
+    filas += [regla for regla in REGLAS_PREDETERMINADAS if regla[0] not in configurados]
+
+    plan = {}
+    for documento in DOCUMENTOS.values():
+        for condicion in documento['condiciones']:
+            plan[(documento['tipo'], condicion)] = [
+                (codigo, lado, importe)
+                for tipo, cond, codigo, lado, importe in filas
+                if tipo == documento['tipo'] and cond in ('todas', condicion)
+            ]
+    return plan
+
+
+# Se compila una vez por worker; se recompila al cambiar reglas o cuentas
+_reglas = CacheVersionada('reglas_contabilizacion', _compilar_reglas)
+
+
+def invalidar_reglas():
+    _reglas.invalidar()
+
+
+def asiento_documento(documento):
+    """
+    Datos del asiento de una compra o venta según las reglas compiladas,
+    en el formato de `registrar_asientos()`. No consulta la base de datos
+    salvo para verificar las versiones una vez por petición.
+    Lanza CuentaContable.DoesNotExist si una regla usa una cuenta inexistente
+    (sin alternativa en CUENTAS_ALTERNATIVAS).
+    """
+    lector = DOCUMENTOS[documento._meta.label_lower]
+    total = _decimal(lector['total'](documento))
+    iva = _iva(documento)
+    # La base es total - IVA, no `subtotal`: con el descuento ya restado y los
+    # montos exentos incluidos, de modo que el asiento siempre cuadra con el
+    # total. (El asiento de las vistas anteriores debitaba `subtotal`, que no
+    # cuadraba en una compra con descuento.)
+    importes = {'total': total, 'iva': iva, 'base': total - iva}
+
+    plan = plan_cuentas()
+    movimientos = []
+    for codigo, lado, importe in _reglas.obtener()[(lector['tipo'], lector['condicion'](documento))]:
+        monto = importes[importe]
+        if not monto:
+            continue
+        if codigo not in plan.por_codigo and codigo in CUENTAS_ALTERNATIVAS:
+            codigo = CUENTAS_ALTERNATIVAS[codigo]
+        movimientos.append({
+            'cuenta': plan.cuenta(codigo),
+            'debe': monto if lado == 'debe' else CERO,
+            'haber': monto if lado == 'haber' else CERO,
+        })
+
+    if sum(m['debe'] for m in movimientos) != sum(m['haber'] for m in movimientos):
+        raise ErrorContabilizacion(
+            f"Las reglas de contabilización de {lector['tipo']} generan un asiento no balanceado."
+        )
+
+    return {
+        'fecha': documento.fecha,
+        'descripcion': lector['descripcion'](documento),
+        'usuario': documento.usuario,
+        'origen_tipo': lector['tipo'],
+        'origen_id': documento.pk,
+        'movimientos': movimientos,
+    }
+
+
+def contabilizar_documentos(documentos):
+    """
+    Genera y guarda los asientos de muchas compras/ventas a la vez
+    (bulk_create de asientos y movimientos, bulk_update del documento).
+    Para lotes grandes, cargar los documentos con
+    select_related('usuario', 'proveedor'/'cliente').
+
+    Es idempotente: cada asiento lleva la clave única (origen_tipo, origen_id),
+    los documentos que ya tienen asiento se omiten y los que otro proceso
+    contabilizó antes se enlazan a ese asiento en lugar de duplicarlo.
+    Devuelve los asientos creados.
+    """
+    pendientes = [documento for documento in documentos if documento.asiento_id is None]
+    if not pendientes:
+        return []
+
+    try:
+        with transaction.atomic():
+            return _contabilizar(pendientes)
+    except IntegrityError:
+        # Un proceso concurrente contabilizó alguno de los documentos:
+        # al repetir, sus asientos ya son visibles y solo se enlazan
+        with transaction.atomic():
+            return _contabilizar(pendientes)
+
+
+def _contabilizar(pendientes):
+    claves = defaultdict(list)
+    for documento in pendientes:
+        claves[DOCUMENTOS[documento._meta.label_lower]['tipo']].append(documento.pk)
+
+    existentes = {}
+    for origen_tipo, ids in claves.items():
+        existentes.update({
+            (origen_tipo, origen_id): asiento_id
+            for origen_id, asiento_id in AsientoContable.objects.filter(
+                origen_tipo=origen_tipo, origen_id__in=ids
+            ).values_list('origen_id', 'id')
+        })
+
+    nuevos = []
+    for documento in pendientes:
+        clave = (DOCUMENTOS[documento._meta.label_lower]['tipo'], documento.pk)
+        if clave in existentes:
+            documento.asiento_id = existentes[clave]
+        else:
+            nuevos.append(documento)
+
+    asientos = registrar_asientos([asiento_documento(documento) for documento in nuevos])
+    for documento, asiento in zip(nuevos, asientos):
+        documento.asiento = asiento
+
+    por_modelo = defaultdict(list)
+    for documento in pendientes:
+        por_modelo[type(documento)].append(documento)
+    for modelo, docs in por_modelo.items():
+        modelo.objects.bulk_update(docs, ['asiento'], batch_size=1000)
+
+    return asientos
+
+
+def registrar_asientos(asientos_data, usuario=None):
+    """
+    Guarda muchos asientos con sus movimientos usando bulk_create, en una
+    sola transacción, y actualiza SaldoCuenta.
+
+    Cada elemento de `asientos_data` es un dict con `fecha`, `descripcion`,
+    `movimientos` (lista de dicts con `cuenta`, `debe`, `haber`) y,
+    opcionalmente, `usuario` (si se pasa `usuario` a la función, prevalece)
+    y el documento de origen (`origen_tipo`, `origen_id`).
+    Los datos deben venir ya validados.
+    """
+    with transaction.atomic():
+        asientos = AsientoContable.objects.bulk_create([
+            AsientoContable(
+                fecha=data['fecha'],
+                descripcion=data['descripcion'],
+                usuario=usuario or data.get('usuario'),
+                origen_tipo=data.get('origen_tipo', ''),
+                origen_id=data.get('origen_id'),
+            )
+            for data in asientos_data
+        ], batch_size=1000)
+
+        movimientos = [
+            Movimiento(asiento=asiento, fecha=asiento.fecha, **movimiento)
+            for asiento, data in zip(asientos, asientos_data)
+            for movimiento in data['movimientos']
+        ]
+        Movimiento.objects.bulk_create(movimientos, batch_size=2000)
+        registrar_movimientos(movimientos)
+
+        transaction.on_commit(lambda: (
+            incrementar('contabilidad_asientos_creados_total', len(asientos)),
+            incrementar('contabilidad_movimientos_creados_total', len(movimientos)),
+        ))
+
+    return asientos
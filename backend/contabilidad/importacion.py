@@ -0,0 +1,258 @@
+# contabilidad/importacion.py
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from openpyxl import load_workbook
+from .cache_reportes import invalidar_documentos
+from .cola import cola_asincrona, encolar_documentos
+from .contabilizacion import contabilizar_documentos, modelo_documento
+
+CAMPOS_IVA = [
+    'base_imponible_general', 'impuesto_general',
+    'base_imponible_reducida', 'impuesto_reducido',
+    'base_imponible_adicional', 'impuesto_adicional',
+]
+
+# Columnas reconocidas por tipo de documento. `rif` y `nombre` identifican
+# al proveedor/cliente; los demás nombres coinciden con los campos del modelo.
+FORMATOS = {
+    'compra': {
+        'contraparte': 'proveedor',
+        'total': 'total_compra',
+        'decimales': ['subtotal', 'descuento', 'total_compra'] + CAMPOS_IVA,
+        'textos': ['numero_control', 'planilla_importacion'],
+    },
+    'venta': {
+        'contraparte': 'cliente',
+        'total': 'total',
+        'decimales': ['subtotal', 'total'] + CAMPOS_IVA,
+        'textos': ['numero_control', 'condicion_pago'],
+    },
+}
+
+FILAS_POR_LOTE = 2000
+
+# Errores detallados que se devuelven (el resto solo se cuenta)
+MAX_ERRORES = 100
+
+
+class ErrorFila(Exception):
+    pass
+
+
+# === Lectura en streaming ===
+def leer_filas(archivo, nombre):
+    """
+    Recorre un CSV o XLSX fila por fila como dicts {columna: valor},
+    sin cargar el archivo completo en memoria.
+    """
+    if nombre.lower().endswith('.xlsx'):
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezados = [str(valor or '').strip().lower() for valor in next(filas, ())]
+            for valores in filas:
+                if any(valor not in (None, '') for valor in valores):
+                    yield dict(zip(encabezados, valores))
+        finally:
+            libro.close()
+    else:
+        texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+        lector = csv.DictReader(texto)
+        lector.fieldnames = [campo.strip().lower() for campo in lector.fieldnames or []]
+        for fila in lector:
+            if any(fila.values()):
+                yield fila
+
+
+def _decimal(valor, campo):
+    if valor in (None, ''):
+        return Decimal('0.00')
+    try:
+        return Decimal(str(valor).strip().replace(',', ''))
+    except InvalidOperation:
+        raise ErrorFila(f"{campo}: '{valor}' no es un número válido")
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor or '').strip()
+    try:
+        fecha = parse_date(texto) or datetime.strptime(texto, '%d/%m/%Y').date()
+    except ValueError:
+        raise ErrorFila(f"fecha: '{valor}' no es una fecha válida (AAAA-MM-DD o DD/MM/AAAA)")
+    return fecha
+
+
+def _texto(valor):
+    return str(valor).strip() if valor not in (None, '') else None
+
+
+def interpretar_fila(fila, formato):
+    """Campos del documento a partir de una fila; lanza ErrorFila si no es válida."""
+    rif = _texto(fila.get('rif'))
+    numero_factura = _texto(fila.get('numero_factura'))
+    if not rif:
+        raise ErrorFila("rif: requerido")
+    if not numero_factura:
+        raise ErrorFila("numero_factura: requerido")
+
+    # 'total' se acepta también en compras
+    if formato['total'] not in fila and 'total' in fila:
+        fila[formato['total']] = fila['total']
+    if fila.get(formato['total']) in (None, ''):
+        raise ErrorFila(f"{formato['total']}: requerido")
+
+    datos = {
+        'rif': rif,
+        'nombre': _texto(fila.get('nombre')) or rif,
+        'fecha': _fecha(fila.get('fecha')),
+        'numero_factura': numero_factura,
+    }
+    for campo in formato['decimales']:
+        datos[campo] = _decimal(fila.get(campo), campo)
+    for campo in formato['textos']:
+        valor = _texto(fila.get(campo))
+        if valor is not None:
+            datos[campo] = valor
+    if datos.get('condicion_pago', 'contado') not in ('contado', 'credito'):
+        raise ErrorFila("condicion_pago: debe ser 'contado' o 'credito'")
+    return datos
+
+
+# === Importación ===
+class Importador:
+    """
+    Importa compras o ventas en lotes de FILAS_POR_LOTE filas. Por lote:
+    proveedores/clientes nuevos con un bulk_create, documentos con otro
+    bulk_create y asientos con contabilizar_documentos() (o la cola
+    asíncrona si está activa). Los documentos ya existentes se omiten.
+    Cada lote es una transacción: un lote que falla no deshace los anteriores.
+    """
+    def __init__(self, tipo, usuario=None, tamano=FILAS_POR_LOTE):
+        self.tipo = tipo
+        self.formato = FORMATOS[tipo]
+        self.usuario = usuario
+        self.tamano = tamano
+        self.modelo, _ = modelo_documento(tipo)
+        self.contraparte = self.formato['contraparte']
+        self.modelo_contraparte = self.modelo._meta.get_field(self.contraparte).related_model
+
+        # Proveedores/clientes existentes, por RIF (una consulta)
+        self.contrapartes = {
+            contraparte.rif: contraparte
+            for contraparte in self.modelo_contraparte.objects.only('id', 'rif', 'nombre')
+        }
+        self.resumen = {'filas': 0, 'creados': 0, 'omitidos': 0, 'errores': 0, 'contrapartes_creadas': 0}
+        self.errores = []
+
+    def importar(self, filas, progreso=None):
+        lote = []
+        for numero, fila in enumerate(filas, start=2):  # la fila 1 es el encabezado
+            self.resumen['filas'] += 1
+            try:
+                lote.append((numero, interpretar_fila(fila, self.formato)))
+            except ErrorFila as error:
+                self._error(numero, error)
+            if len(lote) >= self.tamano:
+                self._guardar_lote(lote)
+                lote = []
+                if progreso:
+                    progreso(self.resumen)
+        if lote:
+            self._guardar_lote(lote)
+        if progreso:
+            progreso(self.resumen)
+        return self.resumen
+
+    def _error(self, numero, error):
+        self.resumen['errores'] += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append({'fila': numero, 'error': str(error)})
+
+    def _guardar_lote(self, lote):
+        """
+        Guarda el lote en una transacción. Si falla (ej. un documento creado
+        a la vez por otro proceso o una cuenta de las reglas que no existe),
+        los lotes anteriores ya confirmados se conservan y este se reintenta
+        fila por fila: las filas que fallan se informan como errores.
+        """
+        try:
+            self._guardar(lote)
+        except Exception:
+            for numero, datos in lote:
+                try:
+                    self._guardar([(numero, datos)])
+                except Exception as error:
+                    self._error(numero, f"{type(error).__name__}: {error}")
+
+    def _guardar(self, lote):
+        # Lo hecho en memoria por una transacción revertida no debe conservarse
+        contrapartes, resumen = dict(self.contrapartes), dict(self.resumen)
+        try:
+            with transaction.atomic():
+                self._guardar_documentos(lote)
+        except Exception:
+            self.contrapartes = contrapartes
+            self.resumen.update(resumen)
+            raise
+
+    def _guardar_documentos(self, lote):
+        self._crear_contrapartes({datos['rif']: datos['nombre'] for _, datos in lote})
+
+        documentos = []
+        vistos = self._existentes(lote)
+        for numero, datos in lote:
+            contraparte = self.contrapartes[datos['rif']]
+            clave = self._clave(contraparte.id, datos['numero_factura'])
+            if clave in vistos:
+                self.resumen['omitidos'] += 1
+                continue
+            vistos.add(clave)
+
+            campos = {k: v for k, v in datos.items() if k not in ('rif', 'nombre')}
+            documentos.append(self.modelo(
+                **campos, **{self.contraparte: contraparte}, usuario=self.usuario
+            ))
+
+        self.modelo.objects.bulk_create(documentos, batch_size=1000)
+        if cola_asincrona():
+            encolar_documentos(documentos)
+        else:
+            contabilizar_documentos(documentos)
+        # bulk_create no emite señales: nueva versión de los libros fiscales.
+        # Después de contabilizar, en el mismo orden que las señales (saldos,
+        # libro, documentos); los contadores se incrementan al confirmar
+        invalidar_documentos()
+        self.resumen['creados'] += len(documentos)
+
+    def _crear_contrapartes(self, nombres):
+        nuevos = [rif for rif in nombres if rif not in self.contrapartes]
+        if not nuevos:
+            return
+        self.modelo_contraparte.objects.bulk_create(
+            [self.modelo_contraparte(rif=rif, nombre=nombres[rif]) for rif in nuevos],
+            ignore_conflicts=True
+        )
+        # ignore_conflicts no devuelve ids: se releen (incluye los creados por otro proceso)
+        for contraparte in self.modelo_contraparte.objects.filter(rif__in=nuevos).only('id', 'rif', 'nombre'):
+            self.contrapartes[contraparte.rif] = contraparte
+        self.resumen['contrapartes_creadas'] += len(nuevos)
+
+    def _clave(self, contraparte_id, numero_factura):
+        # Ventas: el número de factura es único; compras: único por proveedor
+        return numero_factura if self.tipo == 'venta' else (contraparte_id, numero_factura)
+
+    def _existentes(self, lote):
+        """Claves de los documentos del lote que ya existen, en una consulta."""
+        numeros = {datos['numero_factura'] for _, datos in lote}
+        existentes = self.modelo.objects.filter(numero_factura__in=numeros)
+        if self.tipo == 'venta':
+            return set(existentes.values_list('numero_factura', flat=True))
+        return set(existentes.values_list(f'{self.contraparte}_id', 'numero_factura'))
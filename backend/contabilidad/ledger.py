@@ -0,0 +1,272 @@
+# contabilidad/ledger.py
+from decimal import Decimal
+from functools import lru_cache
+from django.db.models import Sum, Q, F, Value, DecimalField, Window
+from django.db.models.functions import Coalesce
+from .models import CuentaContable, Movimiento, SaldoCuenta
+from .plan_cuentas import plan_cuentas
+
+# Cuentas de naturaleza deudora: su saldo es Debe - Haber
+TIPOS_DEUDORES = ('activo', 'gasto')
+
+CERO = Decimal('0.00')
+
+# Nodos del árbol de clasificación del P.C.G.A. ('1' → '11' → '111' → '1111')
+NOMBRES_CLASIFICACION = dict(CuentaContable.CLASIFICACIONES)
+
+# Tipo de cada grupo del P.C.G.A., para los nodos sin cuenta propia en el plan
+TIPOS_POR_GRUPO = {
+    '1': 'activo',
+    '2': 'pasivo',
+    '3': 'patrimonio',
+    '4': 'ingreso',
+    '5': 'gasto',
+    '6': 'gasto',
+}
+
+
+def signo_saldo(tipo):
+    """
+    1 para cuentas deudoras (activo, gasto), -1 para acreedoras
+    (pasivo, patrimonio, ingreso).
+    """
+    return 1 if tipo in TIPOS_DEUDORES else -1
+
+
+def saldo_segun_tipo(tipo, debe, haber):
+    return (debe - haber) * signo_saldo(tipo)
+
+
+def saldos_cuentas(desde=None, hasta=None, prefijo=None):
+    """
+    Devuelve debe, haber y saldo de todas las cuentas del plan, ordenadas por código,
+    en una sola consulta.
+
+    - Sin fechas: lee los totales acumulados de SaldoCuenta.
+    - Con `desde` y/o `hasta`: agrupa los movimientos del periodo por cuenta.
+    - `prefijo` limita el resultado a una rama de la clasificación (ej. '11').
+
+    Formato de cada fila:
+        {'id', 'codigo', 'nombre', 'tipo', 'clasificacion', 'debe', 'haber', 'saldo'}
+    """
+    cuentas = CuentaContable.objects.order_by('codigo')
+    if prefijo:
+        cuentas = cuentas.filter(clasificacion__startswith=prefijo)
+
+    campos = ('id', 'codigo', 'nombre', 'tipo', 'clasificacion')
+    cero = Value(CERO, output_field=DecimalField(max_digits=18, decimal_places=2))
+
+    if desde is None and hasta is None:
+        filas = cuentas.values(*campos).annotate(
+            debe=Coalesce('saldo_acumulado__total_debe', cero),
+            haber=Coalesce('saldo_acumulado__total_haber', cero),
+        )
+    else:
+        periodo = Q()
+        if desde is not None:
+            periodo &= Q(movimientos__fecha__gte=desde)
+        if hasta is not None:
+            periodo &= Q(movimientos__fecha__lte=hasta)
+        filas = cuentas.values(*campos).annotate(
+            debe=Coalesce(Sum('movimientos__debe', filter=periodo), cero),
+            haber=Coalesce(Sum('movimientos__haber', filter=periodo), cero),
+        )
+
+    resultado = []
+    for fila in filas:
+        fila['saldo'] = saldo_segun_tipo(fila['tipo'], fila['debe'], fila['haber'])
+        resultado.append(fila)
+    return resultado
+
+
+
+# Orden cronológico de los movimientos dentro de una cuenta (índice
+# movimiento_mayor_idx: cuenta, fecha, asiento, id)
+ORDEN_MAYOR = ('fecha', 'asiento_id', 'id')
+
+
+def movimientos_mayor(cuenta_ids, desde=None, hasta=None):
+    """
+    Movimientos de las cuentas, filtrados por su copia de la fecha del
+    asiento: el periodo y el cursor del mayor se resuelven sobre el índice
+    sin unir con los asientos. El saldo acumulado de una página lo agrega
+    `con_saldo_acumulado()`.
+    """
+    movimientos = Movimiento.objects.filter(cuenta_id__in=cuenta_ids)
+    if desde is not None:
+        movimientos = movimientos.filter(fecha__gte=desde)
+    if hasta is not None:
+        movimientos = movimientos.filter(fecha__lte=hasta)
+    return movimientos.values('id', 'cuenta_id', 'asiento_id', 'fecha', 'debe', 'haber')
+
+
+def con_saldo_acumulado(pagina):
+    """
+    Filas de `pagina` (movimientos_mayor() ya ordenado y limitado) con su
+    saldo acumulado (Debe - Haber) calculado en la base de datos:
+        SUM(debe - haber) OVER (PARTITION BY cuenta_id ORDER BY fecha, asiento_id, id)
+
+    La ventana recibe solo las filas de la página (WHERE id IN (... LIMIT n)),
+    no todas las posteriores al cursor: el acumulado parte de la primera fila
+    de cada cuenta en la página. `saldos_al_inicio()` y `saldos_anteriores()`
+    dan el saldo con el que cada cuenta llega a esa fila.
+    """
+    return Movimiento.objects.filter(id__in=pagina.values('id')).annotate(
+        acumulado=Window(
+            Sum(F('debe') - F('haber')),
+            partition_by=[F('cuenta_id')],
+            order_by=[F(campo).asc() for campo in ORDEN_MAYOR],
+        )
+    ).values(
+        'id', 'cuenta_id', 'asiento_id', 'fecha', 'asiento__descripcion', 'debe', 'haber', 'acumulado'
+    ).order_by(*pagina.query.order_by)
+
+
+def _totales(cuenta_ids):
+    """Debe - Haber acumulado de cada cuenta según SaldoCuenta (una fila por cuenta)."""
+    filas = (
+        SaldoCuenta.objects.filter(cuenta_id__in=cuenta_ids)
+        .values_list('cuenta_id', F('total_debe') - F('total_haber'))
+    )
+    totales = {cuenta_id: CERO for cuenta_id in cuenta_ids}
+    totales.update(dict(filas))
+    return totales
+
+
+def saldos_anteriores(primeras_filas):
+    """
+    Saldo (Debe - Haber) de cada cuenta antes de una fila dada, en dos consultas.
+    `primeras_filas` mapea cuenta_id → fila de `movimientos_mayor()`.
+
+    Se parte del total de SaldoCuenta y se restan los movimientos desde esa
+    fila en adelante: el costo depende de las filas posteriores, no de todo
+    el historial anterior de la cuenta (las páginas profundas del mayor
+    quedan cerca del final).
+    """
+    if not primeras_filas:
+        return {}
+
+    condicion = Q()
+    for cuenta_id, fila in primeras_filas.items():
+        posteriores = Q()
+        iguales = Q()
+        for campo in ORDEN_MAYOR:
+            posteriores |= iguales & Q(**{f'{campo}__gt': fila[campo]})
+            iguales &= Q(**{campo: fila[campo]})
+        condicion |= Q(cuenta_id=cuenta_id) & (posteriores | iguales)
+
+    filas = (
+        Movimiento.objects.filter(condicion)
+        .values('cuenta_id')
+        .annotate(total=Sum(F('debe') - F('haber')))
+    )
+    saldos = _totales(list(primeras_filas))
+    for fila in filas:
+        saldos[fila['cuenta_id']] -= fila['total']
+    return saldos
+
+
+def saldos_al_inicio(cuenta_ids, desde=None, hasta=None):
+    """
+    Saldo (Debe - Haber) de cada cuenta antes de `desde` (cero sin `desde`).
+
+    Sin `hasta` el periodo llega hasta hoy y se calcula como total de
+    SaldoCuenta menos los movimientos del periodo (tantos como los que
+    muestra el reporte); con `hasta` se suman los movimientos anteriores.
+    """
+    if desde is None:
+        return {cuenta_id: CERO for cuenta_id in cuenta_ids}
+
+    movimientos = Movimiento.objects.filter(cuenta_id__in=cuenta_ids)
+    if hasta is None:
+        saldos = _totales(cuenta_ids)
+        signo, movimientos = -1, movimientos.filter(fecha__gte=desde)
+    else:
+        saldos = {cuenta_id: CERO for cuenta_id in cuenta_ids}
+        signo, movimientos = 1, movimientos.filter(fecha__lt=desde)
+
+    for fila in movimientos.values('cuenta_id').annotate(total=Sum(F('debe') - F('haber'))):
+        saldos[fila['cuenta_id']] += signo * fila['total']
+    return saldos
+
+
+@lru_cache(maxsize=None)
+def ruta_clasificacion(codigo):
+    """
+    Nodos del árbol desde la raíz hasta `codigo` inclusive.
+    Ej: '1210' → ('1', '12', '1210'); los prefijos que no son
+    clasificaciones del plan ('121') no forman nivel.
+    """
+    ancestros = tuple(
+        codigo[:i] for i in range(1, len(codigo))
+        if codigo[:i] in NOMBRES_CLASIFICACION
+    )
+    return ancestros + (codigo,)
+
+
+def tipo_nodo(plan, codigo, tipo_cuenta):
+    """
+    Tipo de un nodo del árbol: el de la cuenta del plan con ese código; si no
+    la hay, el de su grupo ('1' activo, '2' pasivo, ...). `tipo_cuenta` (el de
+    una cuenta de la rama) queda para códigos fuera del P.C.G.A.
+    """
+    cuenta = plan.por_codigo.get(codigo)
+    if cuenta is not None:
+        return cuenta.tipo
+    return TIPOS_POR_GRUPO.get(codigo[:1], tipo_cuenta)
+
+
+def acumular_por_nivel(filas, nivel=None):
+    """
+    Subtotales de debe/haber/saldo para cada nodo del árbol de clasificación,
+    calculados en una sola pasada sobre las filas de `saldos_cuentas()`.
+
+    Las filas se recorren ordenadas por clasificación, de modo que cada rama
+    es contigua: se mantiene una pila con la ruta abierta, cada fila suma en
+    todos los nodos de la pila y un nodo se cierra cuando la siguiente fila
+    ya no pertenece a su rama.
+
+    `nivel` es la profundidad en el árbol (1 = grupo '1', 2 = '11', ...);
+    se devuelven los nodos de profundidad <= nivel, ordenados por código.
+    El tipo de cada nodo (y el signo de su saldo) lo da `tipo_nodo()`.
+    Formato de cada nodo: {'codigo', 'nombre', 'nivel', 'tipo', 'debe', 'haber', 'saldo'}
+    """
+    plan = plan_cuentas()
+    abiertos = []
+    cerrados = []
+
+    for fila in sorted(filas, key=lambda f: f['clasificacion']):
+        ruta = ruta_clasificacion(fila['clasificacion'])
+
+        comunes = 0
+        while (comunes < len(abiertos) and comunes < len(ruta)
+               and abiertos[comunes]['codigo'] == ruta[comunes]):
+            comunes += 1
+        while len(abiertos) > comunes:
+            cerrados.append(abiertos.pop())
+
+        for codigo in ruta[comunes:]:
+            abiertos.append({
+                'codigo': codigo,
+                'nombre': NOMBRES_CLASIFICACION.get(codigo, codigo),
+                'nivel': len(abiertos) + 1,
+                'tipo': tipo_nodo(plan, codigo, fila['tipo']),
+                'debe': CERO,
+                'haber': CERO,
+            })
+
+        for nodo in abiertos:
+            nodo['debe'] += fila['debe']
+            nodo['haber'] += fila['haber']
+
+    cerrados.extend(abiertos)
+
+    resultado = []
+    for nodo in cerrados:
+        if nivel is not None and nodo['nivel'] > nivel:
+            continue
+        nodo['saldo'] = saldo_segun_tipo(nodo['tipo'], nodo['debe'], nodo['haber'])
+        resultado.append(nodo)
+
+    resultado.sort(key=lambda n: n['codigo'])
+    return resultado
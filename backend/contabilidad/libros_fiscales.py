@@ -0,0 +1,98 @@
+# contabilidad/libros_fiscales.py
+import calendar
+import csv
+from datetime import date
+from decimal import Decimal
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+# Alícuotas de IVA: (etiqueta, campo base imponible, campo impuesto)
+TASAS_IVA = [
+    ('General 16%', 'base_imponible_general', 'impuesto_general'),
+    ('Reducida 8%', 'base_imponible_reducida', 'impuesto_reducido'),
+    ('Adicional 22%', 'base_imponible_adicional', 'impuesto_adicional'),
+]
+
+FORMATOS = {
+    # formato: (delimitador, content type, incluye encabezado)
+    'csv': (',', 'text/csv; charset=utf-8', True),
+    'txt': ('\t', 'text/plain; charset=utf-8', False),  # Layout SENIAT: tabulado, sin encabezado
+}
+
+FILAS_POR_BLOQUE = 1000
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: devuelve la línea en lugar de guardarla."""
+    def write(self, valor):
+        return valor
+
+
+def filtrar_periodo(queryset, request):
+    """
+    Filtra por ?anio= y opcionalmente ?mes= usando un rango de fechas,
+    para aprovechar el índice sobre `fecha`.
+    """
+    anio = request.query_params.get('anio')
+    mes = request.query_params.get('mes')
+    if not anio:
+        if mes:
+            raise ValidationError({'anio': 'Debe indicar el año junto con el mes.'})
+        return queryset
+
+    try:
+        anio = int(anio)
+        if mes:
+            mes = int(mes)
+            inicio = date(anio, mes, 1)
+            fin = date(anio, mes, calendar.monthrange(anio, mes)[1])
+        else:
+            inicio = date(anio, 1, 1)
+            fin = date(anio, 12, 31)
+    except ValueError:
+        raise ValidationError({'periodo': 'Año o mes inválido.'})
+
+    return queryset.filter(fecha__gte=inicio, fecha__lte=fin)
+
+
+def formato_exportacion(request):
+    formato = request.query_params.get('formato')
+    if formato and formato not in FORMATOS:
+        raise ValidationError({'formato': f"Formatos válidos: {', '.join(FORMATOS)}."})
+    return formato
+
+
+def respuesta_libro(documentos, encabezados, fila, nombre, formato):
+    """
+    Respuesta en streaming del libro de compras o ventas.
+
+    - `documentos`: iterable de compras/ventas (idealmente `.iterator()`).
+    - `fila(doc)`: valores de la línea, en el orden de `encabezados`.
+    Al final se escriben los totales de base e impuesto por alícuota.
+    """
+    delimitador, content_type, con_encabezado = FORMATOS[formato]
+
+    def generar():
+        escritor = csv.writer(_Eco(), delimiter=delimitador)
+        totales = [[Decimal('0.00'), Decimal('0.00')] for _ in TASAS_IVA]
+        bloque = []
+
+        if con_encabezado:
+            bloque.append(escritor.writerow(encabezados))
+
+        for doc in documentos:
+            for total, (_, campo_base, campo_impuesto) in zip(totales, TASAS_IVA):
+                total[0] += getattr(doc, campo_base)
+                total[1] += getattr(doc, campo_impuesto)
+            bloque.append(escritor.writerow(fila(doc)))
+            if len(bloque) >= FILAS_POR_BLOQUE:
+                yield ''.join(bloque)
+                bloque = []
+
+        for (etiqueta, _, _), (base, impuesto) in zip(TASAS_IVA, totales):
+            bloque.append(escritor.writerow(['TOTAL', etiqueta, base, impuesto]))
+        yield ''.join(bloque)
+
+    respuesta = StreamingHttpResponse(generar(), content_type=content_type)
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    return respuesta
@@ -0,0 +1,133 @@
+# contabilidad/management/commands/benchmark_escrituras.py
+import json
+import time
+from pathlib import Path
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from compras.models import Proveedor
+from ventas.models import Cliente
+from contabilidad.benchmarks import TIPOS_ESCRITURA, medir_escrituras, usuario_benchmark
+from contabilidad.models import AsientoContable, CuentaContable
+
+
+def _tipos(valor):
+    tipos = [parte.strip() for parte in valor.split(',') if parte.strip()]
+    invalidos = [tipo for tipo in tipos if tipo not in TIPOS_ESCRITURA]
+    if not tipos or invalidos:
+        raise CommandError(f"--tipos admite: {', '.join(TIPOS_ESCRITURA)}")
+    return tipos
+
+
+def _positivo(valor):
+    try:
+        numero = int(valor)
+    except ValueError:
+        numero = 0
+    if numero < 1:
+        raise CommandError(f"Se esperaba un entero mayor que 0 (recibido: {valor})")
+    return numero
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el camino de escritura con N escritores concurrentes que crean asientos, compras y '
+        'ventas por la API (serializers, señales y contabilización reales): asientos/s, latencias '
+        'p50/p99, deadlocks y fallos de serialización. Pensado para un PostgreSQL local.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=_positivo, default=8, help='Escritores concurrentes (por defecto 8)')
+        parser.add_argument(
+            '--operaciones',
+            type=_positivo,
+            default=100,
+            help='Operaciones por escritor (por defecto 100)'
+        )
+        parser.add_argument(
+            '--tipos',
+            type=_tipos,
+            default=list(TIPOS_ESCRITURA),
+            help='Documentos a crear, separados por comas (por defecto asiento,compra,venta)'
+        )
+        parser.add_argument('--procesos', action='store_true', help='Usa procesos (fork) en lugar de hilos')
+        parser.add_argument('--salida', help='Archivo JSON de resultados')
+        parser.add_argument(
+            '--conservar',
+            action='store_true',
+            help='Conserva los documentos creados (por defecto se eliminan al terminar)'
+        )
+
+    def handle(self, *args, **options):
+        # === 1. Datos de referencia ===
+        try:
+            cuenta_debe = CuentaContable.objects.get(codigo='1111')   # Efectivo
+            cuenta_haber = CuentaContable.objects.get(codigo='4110')  # Ingresos por servicios
+        except CuentaContable.DoesNotExist:
+            raise CommandError("Faltan las cuentas 1111 y 4110. Ejecuta: python manage.py cargar_plan_cuentas")
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                "⚠️ SQLite admite un solo escritor a la vez: los resultados no representan producción"
+            ))
+
+        proveedor, _ = Proveedor.objects.get_or_create(rif='J-00000000-1', defaults={'nombre': 'Proveedor Benchmark'})
+        cliente, _ = Cliente.objects.get_or_create(rif='J-00000000-0', defaults={'nombre': 'Cliente Benchmark'})
+        contexto = {
+            'usuario_id': usuario_benchmark().pk,
+            'cuenta_debe': cuenta_debe.id,
+            'cuenta_haber': cuenta_haber.id,
+            'proveedor_id': proveedor.id,
+            'cliente_id': cliente.id,
+            'fecha': timezone.localdate().isoformat(),
+            'etiqueta': f"{int(time.time()):x}",  # números de factura únicos por ejecución
+            'tipos': options['tipos'],
+        }
+
+        # === 2. Escritores concurrentes ===
+        self.stdout.write(
+            f"🔹 {options['escritores']} escritores ({'procesos' if options['procesos'] else 'hilos'}) × "
+            f"{options['operaciones']} operaciones: {', '.join(options['tipos'])}"
+        )
+        resumen, creados = medir_escrituras(
+            contexto,
+            escritores=options['escritores'],
+            operaciones=options['operaciones'],
+            procesos=options['procesos'],
+        )
+        resumen['cola_asincrona'] = settings.CONTABILIDAD_COLA_ASINCRONA
+
+        # === 3. Informe ===
+        self.stdout.write("\n" + "="*60)
+        self.stdout.write(self.style.SUCCESS(
+            f"🚀 {resumen['asientos_por_segundo']} asientos/s en {resumen['duracion_s']}s"
+        ))
+        self.stdout.write("="*60)
+        for tipo, datos in {**resumen['por_tipo'], 'total': resumen['total']}.items():
+            fallos = ', '.join(f"{clase}={cantidad}" for clase, cantidad in datos['fallos'].items()) or 'ninguno'
+            self.stdout.write(
+                f"📊 {tipo}: {datos['exitosas']}/{datos['operaciones']} ok | {datos['por_segundo']} op/s | "
+                f"p50 {datos['latencia_ms']['p50']} ms | p99 {datos['latencia_ms']['p99']} ms | fallos: {fallos}"
+            )
+        fallos = resumen['total'].get('fallos', {})
+        if fallos.get('deadlock') or fallos.get('serializacion'):
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Deadlocks: {fallos.get('deadlock', 0)} | Fallos de serialización: {fallos.get('serializacion', 0)}"
+            ))
+        self.stdout.write("="*60)
+
+        if options['salida']:
+            Path(options['salida']).write_text(json.dumps(resumen, indent=2, ensure_ascii=False), encoding='utf-8')
+            self.stdout.write(f"💾 Resultados guardados en {options['salida']}")
+
+        # === 4. Limpieza (las señales de borrado descuentan los saldos) ===
+        if not options['conservar']:
+            asientos = set(creados.get('asiento', []))
+            for tipo in ('compra', 'venta'):
+                modelo = apps.get_model(TIPOS_ESCRITURA[tipo][1])
+                documentos = modelo.objects.filter(id__in=creados.get(tipo, []))
+                asientos.update(documentos.exclude(asiento=None).values_list('asiento_id', flat=True))
+                documentos.delete()
+            AsientoContable.objects.filter(id__in=asientos).delete()
+            self.stdout.write(f"🧹 Eliminados los documentos del benchmark ({len(asientos)} asientos)")
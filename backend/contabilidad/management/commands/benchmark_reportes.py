@@ -0,0 +1,136 @@
+# contabilidad/management/commands/benchmark_reportes.py
+import json
+import platform
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from contabilidad.benchmarks import (
+    cliente_api, comparar_presupuesto, medir_reporte, presupuesto_desde, reportes, usuario_benchmark
+)
+from contabilidad.models import CuentaContable
+from contabilidad.sinteticos import GeneradorSintetico, HASTA_PREDETERMINADO
+
+
+def _tamanos(valor):
+    try:
+        return [int(parte) for parte in valor.split(',') if parte.strip()]
+    except ValueError:
+        raise CommandError("--tamanos debe ser una lista de enteros separados por comas")
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide los reportes (tiempo, consultas SQL y pico de memoria) sobre libros sintéticos de '
+        'varios tamaños y compara con un presupuesto. Los datos generados se descartan al terminar '
+        '(rollback); úsese en una base de datos de pruebas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos',
+            type=_tamanos,
+            default=[1000, 100000, 1000000],
+            help='Movimientos de cada libro, separados por comas (por defecto 1000,100000,1000000)'
+        )
+        parser.add_argument(
+            '--datos-actuales',
+            action='store_true',
+            help='Mide sobre los datos existentes, sin generar libros sintéticos'
+        )
+        parser.add_argument('--reporte', action='append', help='Solo estos reportes (se puede repetir)')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones cronometradas por reporte')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla de los datos sintéticos')
+        parser.add_argument('--salida', default='benchmark_reportes.json', help='Archivo JSON de resultados')
+        parser.add_argument(
+            '--presupuesto',
+            help='JSON de presupuesto: el comando falla si algún reporte lo supera'
+        )
+        parser.add_argument(
+            '--tolerancia',
+            type=float,
+            default=0.25,
+            help='Margen sobre el presupuesto de tiempo y memoria (por defecto 0.25 = 25 %%)'
+        )
+        parser.add_argument(
+            '--guardar-presupuesto',
+            help='Guarda los valores medidos como nuevo presupuesto en este archivo'
+        )
+
+    def handle(self, *args, **options):
+        if not CuentaContable.objects.exists():
+            raise CommandError("No hay plan de cuentas. Ejecuta primero: python manage.py cargar_plan_cuentas")
+
+        presupuesto = None
+        if options['presupuesto']:
+            try:
+                presupuesto = json.loads(Path(options['presupuesto']).read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer el presupuesto: {e}")
+
+        tamanos = ['actual'] if options['datos_actuales'] else options['tamanos']
+        resultados = {}
+        for tamano in tamanos:
+            resultados[str(tamano)] = self._medir_tamano(tamano, options)
+
+        # === Resultados ===
+        salida = {
+            'generado_en': timezone.now().isoformat(),
+            'motor': connection.vendor,
+            'python': platform.python_version(),
+            'semilla': options['semilla'],
+            'repeticiones': options['repeticiones'],
+            'tamanos': resultados,
+        }
+        Path(options['salida']).write_text(json.dumps(salida, indent=2, ensure_ascii=False), encoding='utf-8')
+        self.stdout.write(f"💾 Resultados guardados en {options['salida']}")
+
+        if options['guardar_presupuesto']:
+            Path(options['guardar_presupuesto']).write_text(
+                json.dumps(presupuesto_desde(resultados), indent=2, ensure_ascii=False), encoding='utf-8'
+            )
+            self.stdout.write(f"💾 Presupuesto guardado en {options['guardar_presupuesto']}")
+
+        if presupuesto is not None:
+            regresiones = comparar_presupuesto(resultados, presupuesto, options['tolerancia'])
+            for regresion in regresiones:
+                self.stdout.write(self.style.ERROR(f"❌ {regresion}"))
+            if regresiones:
+                raise CommandError(f"{len(regresiones)} reportes superan el presupuesto")
+            self.stdout.write(self.style.SUCCESS("✅ Todos los reportes dentro del presupuesto"))
+
+    def _medir_tamano(self, tamano, options):
+        with transaction.atomic():
+            datos = {}
+            if tamano != 'actual':
+                self.stdout.write(f"\n🔹 Generando libro de {tamano} movimientos...")
+                # Proporciones aproximadas de un comercio: ~8 % de los movimientos vienen de ventas
+                generador = GeneradorSintetico(semilla=options['semilla'], informar=lambda mensaje: None)
+                datos = generador.generar(
+                    clientes=max(10, tamano // 200),
+                    proveedores=max(5, tamano // 2000),
+                    ventas=tamano // 40,
+                    compras=tamano // 160,
+                    movimientos=tamano,
+                )
+
+            cliente = cliente_api(usuario_benchmark())
+            # Los libros fiscales se piden para el último año de los datos
+            anio = timezone.localdate().year if tamano == 'actual' else HASTA_PREDETERMINADO.year
+            medidos = {}
+            for nombre, (url, parametros) in reportes(anio).items():
+                if options['reporte'] and nombre not in options['reporte']:
+                    continue
+                medido = medir_reporte(cliente, url, parametros, repeticiones=options['repeticiones'])
+                medidos[nombre] = medido
+                estilo = self.style.SUCCESS if medido['estado'] == 200 else self.style.ERROR
+                self.stdout.write(estilo(
+                    f"📊 {tamano} | {nombre}: p50 {medido['tiempo_ms']['p50']} ms | "
+                    f"p95 {medido['tiempo_ms']['p95']} ms | {medido['consultas']} consultas | "
+                    f"{medido['memoria_pico_kb']} KB"
+                ))
+
+            # Los libros sintéticos no se conservan
+            transaction.set_rollback(True)
+
+        return {'datos': {str(nombre): cantidad for nombre, cantidad in datos.items()}, 'reportes': medidos}
@@ -0,0 +1,94 @@
+# contabilidad/management/commands/cargar_fixtures.py
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from contabilidad.cache_reportes import invalidar_documentos
+from contabilidad.carga_masiva import CargadorFixtures, leer_fixture, reiniciar_secuencias, enlazar_origenes
+from contabilidad.contabilizacion import invalidar_reglas
+from contabilidad.models import CuentaContable, Movimiento
+from contabilidad.plan_cuentas import invalidar_plan_cuentas
+
+# Orden de carga de inicializar_db.py (cada fixture depende de los anteriores)
+FIXTURES = [
+    'roles.json',
+    'usuarios.json',
+    'cuentas_contables.json',
+    'clientes.json',
+    'proveedores.json',
+    'asientos.json',
+    'movimientos.json',
+    'ventas.json',
+    'compras.json',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga fixtures JSON de forma masiva: COPY FROM STDIN en PostgreSQL '
+        '(bulk_create en otros motores), sin save() ni señales'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fixtures',
+            nargs='*',
+            help='Archivos a cargar, en orden (por defecto los de fixtures/ en el orden de inicializar_db)'
+        )
+        parser.add_argument(
+            '--contabilizar',
+            action='store_true',
+            help='Contabiliza las compras/ventas cargadas sin asiento (por defecto no se generan asientos: '
+                 'los fixtures ya los incluyen)'
+        )
+
+    def handle(self, *args, **options):
+        rutas = [Path(ruta) for ruta in options['fixtures']]
+        if not rutas:
+            directorio = Path(settings.BASE_DIR) / 'fixtures'
+            rutas = [directorio / nombre for nombre in FIXTURES]
+        for ruta in rutas:
+            if not ruta.exists():
+                raise CommandError(f"No existe el fixture {ruta}")
+
+        cargador = CargadorFixtures(informar=self.stdout.write)
+        inicio = time.perf_counter()
+
+        # === 1. Carga de las filas (una sola transacción, como loaddata) ===
+        with transaction.atomic():
+            with connection.constraint_checks_disabled():
+                for ruta in rutas:
+                    self.stdout.write(f"🔹 Cargando {ruta.name}...")
+                    cargador.cargar(leer_fixture(ruta))
+
+            modelos = list(cargador.cargados)
+            # En PostgreSQL las claves foráneas son diferidas y se verifican al confirmar
+            connection.check_constraints(table_names=[modelo._meta.db_table for modelo in modelos])
+
+            # === 2. Secuencias de id al máximo cargado ===
+            reiniciar_secuencias(modelos)
+
+            # === 3. Origen de los asientos de compras y ventas ===
+            enlazados = enlazar_origenes(modelos)
+
+        # === 4. Estado derivado: saldos por cuenta, cachés del plan y de reportes ===
+        invalidar_documentos()
+        if Movimiento in modelos:
+            call_command('recalcular_saldos', stdout=self.stdout)
+        if CuentaContable in modelos:
+            invalidar_plan_cuentas()
+            invalidar_reglas()
+
+        # === 5. Documentos sin asiento (opcional) ===
+        if options['contabilizar']:
+            call_command('corregir_documentos_sin_asiento', stdout=self.stdout)
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write(self.style.SUCCESS(
+            f"🚀 Filas cargadas: {sum(cargador.cargados.values())} en {duracion:.1f}s"
+        ))
+        self.stdout.write(f"🔗 Asientos enlazados a su documento: {enlazados}")
+        self.stdout.write("="*50)
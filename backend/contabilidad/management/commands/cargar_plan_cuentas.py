@@ -1,10 +1,99 @@
 # contabilidad/management/commands/cargar_plan_cuentas.py
-from django.core.management.base import BaseCommand
+import csv
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from contabilidad.carga_masiva import leer_fixture
+from contabilidad.contabilizacion import invalidar_reglas
 from contabilidad.models import CuentaContable, TipoCuenta, ClasificacionCuenta
+from contabilidad.plan_cuentas import invalidar_plan_cuentas
+
+# Campos que --actualizar sobrescribe en las cuentas existentes (la descripción solo se fija al crear)
+CAMPOS_ACTUALIZABLES = ['nombre', 'tipo', 'clasificacion', 'nivel']
+
+
+def leer_plan(ruta):
+    """
+    Cuentas de un archivo externo, como pares (ubicación, datos) para
+    señalar en los errores la línea o el registro de origen:
+    - JSON: lista de objetos {codigo, nombre, tipo, clasificacion?, nivel?, descripcion?}
+      o un fixture de contabilidad.cuentacontable (ej. fixtures/plan_de_cuentas.json).
+    - CSV: encabezados con los mismos nombres de columna.
+    """
+    if ruta.suffix.lower() == '.csv':
+        with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+            lector = csv.DictReader(archivo)
+            return [
+                (
+                    f"{ruta.name}, línea {lector.line_num}",
+                    {campo: valor.strip() for campo, valor in fila.items() if campo and valor and valor.strip()},
+                )
+                for fila in lector
+            ]
+    return [
+        (f"{ruta.name}, registro {numero}", objeto.get('fields', objeto))
+        for numero, objeto in enumerate(leer_fixture(ruta), start=1)
+    ]
+
+
+def clasificacion_por_defecto(codigo, clasificaciones):
+    """La clasificación más específica que es prefijo del código (ej. 2111 → 211)."""
+    for largo in range(len(codigo), 0, -1):
+        if codigo[:largo] in clasificaciones:
+            return codigo[:largo]
+    return None
+
+
+def interpretar_cuenta(ubicacion, data, tipos, clasificaciones):
+    """CuentaContable (sin guardar) de una fila del plan; CommandError si no es válida."""
+    codigo = str(data.get('codigo', '')).strip()
+    if not codigo or not data.get('nombre'):
+        raise CommandError(f"{ubicacion}: cuenta sin código o nombre")
+    if data.get('tipo') not in tipos:
+        raise CommandError(f"{ubicacion}: cuenta {codigo} con tipo inválido '{data.get('tipo')}'")
+
+    clasificacion = str(data.get('clasificacion') or '').strip() or clasificacion_por_defecto(codigo, clasificaciones)
+    if clasificacion not in clasificaciones:
+        raise CommandError(
+            f"{ubicacion}: cuenta {codigo} con clasificación inválida '{data.get('clasificacion') or codigo}'"
+        )
+
+    nivel = data.get('nivel') or len(codigo) // 2 + 1
+    try:
+        nivel = int(nivel)
+    except (TypeError, ValueError):
+        nivel = 0
+    if nivel < 1:
+        raise CommandError(f"{ubicacion}: cuenta {codigo} con nivel inválido '{data.get('nivel')}'")
+
+    return CuentaContable(
+        codigo=codigo,
+        nombre=data['nombre'],
+        tipo=data['tipo'],
+        clasificacion=clasificacion,
+        nivel=nivel,
+        descripcion=data.get('descripcion') or f"Cuenta {data['nombre']}",
+    )
+
 
 class Command(BaseCommand):
-    help = 'Carga el Plan de Cuentas completo del P.C.G.A. venezolano'
+    help = 'Carga el Plan de Cuentas completo del P.C.G.A. venezolano (o uno externo en JSON/CSV)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archivo',
+            help='Plan de cuentas externo (.json o .csv) en lugar del P.C.G.A. incluido'
+        )
+        parser.add_argument(
+            '--actualizar',
+            action='store_true',
+            help=(
+                'Sobrescribe nombre, tipo, clasificación y nivel de las cuentas existentes '
+                'que difieran (por defecto solo se crean las que faltan)'
+            )
+        )
 
+    @transaction.atomic
     def handle(self, *args, **options):
         # === 1. Crear Tipos de Cuenta si no existen ===
         tipos_data = [
@@ -15,13 +104,12 @@ class Command(BaseCommand):
             ('gasto', 'Gasto'),
         ]
 
-        for codigo, nombre in tipos_data:
-            tipo, created = TipoCuenta.objects.get_or_create(
-                nombre=codigo,
-                defaults={'nombre': nombre}
-            )
-            if created:
-                self.stdout.write(f"✅ Tipo creado: {tipo.nombre}")
+        existentes = set(TipoCuenta.objects.values_list('nombre', flat=True))
+        tipos = TipoCuenta.objects.bulk_create([
+            TipoCuenta(nombre=codigo) for codigo, _ in tipos_data if codigo not in existentes
+        ])
+        for tipo in tipos:
+            self.stdout.write(f"✅ Tipo creado: {tipo.nombre}")
 
         # === 2. Crear Clasificaciones si no existen ===
         clasificaciones_data = [
@@ -114,13 +202,13 @@ class Command(BaseCommand):
             ('6122', 'GASTOS BANCARIOS Y FINANCIEROS'),
         ]
 
-        for codigo, nombre in clasificaciones_data:
-            clasificacion, created = ClasificacionCuenta.objects.get_or_create(
-                codigo=codigo,
-                defaults={'nombre': nombre}
-            )
-            if created:
-                self.stdout.write(f"✅ Clasificación creada: {clasificacion.codigo} - {clasificacion.nombre}")
+        existentes = set(ClasificacionCuenta.objects.values_list('codigo', flat=True))
+        clasificaciones = ClasificacionCuenta.objects.bulk_create([
+            ClasificacionCuenta(codigo=codigo, nombre=nombre)
+            for codigo, nombre in clasificaciones_data if codigo not in existentes
+        ])
+        for clasificacion in clasificaciones:
+            self.stdout.write(f"✅ Clasificación creada: {clasificacion.codigo} - {clasificacion.nombre}")
 
         # === 3. Crear Cuentas Contables ===
         cuentas_data = [
@@ -158,6 +246,7 @@ class Command(BaseCommand):
 
             # Pasivo
             {'codigo': '2110', 'nombre': 'EXP MERCANTILES', 'tipo': 'pasivo', 'clasificacion': '2110'},
+            {'codigo': '2111', 'nombre': 'IVA DEBITO FISCAL', 'tipo': 'pasivo', 'clasificacion': '211'},
             {'codigo': '2120', 'nombre': 'CUENTAS POR PAGAR', 'tipo': 'pasivo', 'clasificacion': '2120'},
             {'codigo': '2150', 'nombre': 'OTRAS CUENTAS POR PAGAR', 'tipo': 'pasivo', 'clasificacion': '2150'},
             {'codigo': '2210', 'nombre': 'RETENCIONES POR PAGAR', 'tipo': 'pasivo', 'clasificacion': '2210'},
@@ -195,27 +284,71 @@ class Command(BaseCommand):
             {'codigo': '6122', 'nombre': 'GASTOS BANCARIOS Y FINANCIEROS', 'tipo': 'gasto', 'clasificacion': '6122'},
         ]
 
-        total_creadas = 0
-        for data in cuentas_data:
-            cuenta, created = CuentaContable.objects.get_or_create(
-                codigo=data['codigo'],
-                defaults={
-                    'nombre': data['nombre'],
-                    'tipo': data['tipo'],
-                    'clasificacion': data['clasificacion'],
-                    'nivel': len(data['codigo']) // 2 + 1,
-                    'descripcion': f"Cuenta {data['nombre']}"
-                }
+        plan = [(f"cuenta {data['codigo']}", data) for data in cuentas_data]
+        if options['archivo']:
+            ruta = Path(options['archivo'])
+            if not ruta.exists():
+                raise CommandError(f"No existe el archivo {ruta}")
+            plan = leer_plan(ruta)
+
+        # === 4. Comparar con las cuentas existentes (una sola consulta) ===
+        existentes = {
+            cuenta['codigo']: cuenta
+            for cuenta in CuentaContable.objects.values('codigo', *CAMPOS_ACTUALIZABLES)
+        }
+        tipos_validos = dict(CuentaContable.TIPOS)
+        clasificaciones_validas = dict(CuentaContable.CLASIFICACIONES)
+        por_codigo = {}
+        for ubicacion, data in plan:
+            cuenta = interpretar_cuenta(ubicacion, data, tipos_validos, clasificaciones_validas)
+            # Si el archivo repite un código, prevalece la última fila
+            por_codigo[cuenta.codigo] = cuenta
+
+        nuevas, modificadas = [], []
+        for codigo, cuenta in por_codigo.items():
+            actual = existentes.get(codigo)
+            if actual is None:
+                nuevas.append(cuenta)
+            elif any(getattr(cuenta, campo) != actual[campo] for campo in CAMPOS_ACTUALIZABLES):
+                modificadas.append(cuenta)
+
+        # === 5. Insertar (y con --actualizar, sobrescribir) en una sola sentencia ===
+        # Sin --actualizar se respetan los cambios hechos por los usuarios a las cuentas existentes
+        diferentes = []
+        if not options['actualizar']:
+            diferentes, modificadas = modificadas, []
+        if modificadas:
+            CuentaContable.objects.bulk_create(
+                nuevas + modificadas,
+                update_conflicts=True,
+                unique_fields=['codigo'],
+                update_fields=CAMPOS_ACTUALIZABLES,
+                batch_size=1000
             )
-            if created:
-                total_creadas += 1
-                self.stdout.write(f"✅ Cuenta creada: {cuenta.codigo} - {cuenta.nombre}")
+        elif nuevas:
+            CuentaContable.objects.bulk_create(nuevas, ignore_conflicts=True, batch_size=1000)
+        if nuevas or modificadas:
+            # Las operaciones masivas no disparan las señales que invalidan las cachés
+            invalidar_plan_cuentas()
+            invalidar_reglas()
+
+        for cuenta in nuevas:
+            self.stdout.write(f"✅ Cuenta creada: {cuenta.codigo} - {cuenta.nombre}")
+        for cuenta in modificadas:
+            self.stdout.write(f"🔄 Cuenta actualizada: {cuenta.codigo} - {cuenta.nombre}")
+        total_creadas = len(nuevas)
 
         # === Mensaje final ===
         self.stdout.write("\n" + "="*50)
         self.stdout.write(self.style.SUCCESS("🚀 PLAN DE CUENTAS CARGADO CON ÉXITO"))
         self.stdout.write("="*50)
         self.stdout.write(f"📊 Total de cuentas creadas: {total_creadas}")
+        self.stdout.write(f"🔄 Total de cuentas actualizadas: {len(modificadas)}")
+        if diferentes:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Cuentas existentes que difieren del plan y no se modificaron: {len(diferentes)} "
+                "(use --actualizar para sobrescribirlas)"
+            ))
         self.stdout.write("💡 Ahora puedes registrar compras, ventas y asientos")
         self.stdout.write("📈 Verifica: Estado de Resultados y Balance General")
         self.stdout.write("="*50)
\ No newline at end of file
@@ -0,0 +1,42 @@
+# contabilidad/management/commands/corregir_asientos_duplicados.py
+from django.core.management.base import BaseCommand
+from contabilidad.reparacion import asientos_duplicados, eliminar_asientos_duplicados
+
+# Duplicados listados uno por uno (el resto solo se cuenta)
+MAX_LISTADOS = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Lista los asientos duplicados de compras y ventas (doble contabilización '
+        'anterior a la clave de origen) y, con --eliminar, los elimina'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--eliminar',
+            action='store_true',
+            help='Elimina los duplicados y descuenta sus movimientos de los saldos'
+        )
+
+    def handle(self, *args, **options):
+        duplicados = asientos_duplicados()
+        if not duplicados:
+            self.stdout.write(self.style.SUCCESS("✅ No hay asientos duplicados"))
+            return
+
+        self.stdout.write(f"🔎 Asientos duplicados: {len(duplicados)}")
+        for duplicado in duplicados[:MAX_LISTADOS]:
+            self.stdout.write(
+                f"  - Asiento {duplicado['id']} ({duplicado['fecha']}, {duplicado['descripcion']}) "
+                f"duplica al asiento {duplicado['conservar']}"
+            )
+        if len(duplicados) > MAX_LISTADOS:
+            self.stdout.write(f"  ... y {len(duplicados) - MAX_LISTADOS} más")
+
+        if not options['eliminar']:
+            self.stdout.write(self.style.WARNING("🧪 No se modificó nada: use --eliminar para eliminarlos"))
+            return
+
+        eliminados = eliminar_asientos_duplicados(duplicados)
+        self.stdout.write(self.style.SUCCESS(f"🧹 Asientos duplicados eliminados: {eliminados}"))
@@ -0,0 +1,48 @@
+# contabilidad/management/commands/corregir_documentos_sin_asiento.py
+import time
+from django.core.management.base import BaseCommand
+from contabilidad.reparacion import reparar_documentos, TIPOS_DOCUMENTO
+
+class Command(BaseCommand):
+    help = 'Genera o enlaza los asientos de las ventas y compras que no tienen uno asociado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tipo',
+            choices=TIPOS_DOCUMENTO,
+            action='append',
+            help='Tipo de documento a reparar (puede repetirse; por defecto ventas y compras)'
+        )
+        parser.add_argument('--lote', type=int, default=1000, help='Documentos por bloque (por defecto 1000)')
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=1,
+            help='Procesos en paralelo para repartir los bloques (por defecto 1)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa cuántos documentos hay sin asiento, sin modificar nada'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resumen = reparar_documentos(
+            tipos=options['tipo'] or TIPOS_DOCUMENTO,
+            tamano=options['lote'],
+            procesos=options['procesos'],
+            dry_run=options['dry_run'],
+            informar=self.stdout.write,
+        )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("🧪 Modo dry-run: no se modificó ningún documento"))
+            return
+
+        reparados = sum(datos['reparados'] for datos in resumen.values())
+        errores = sum(datos['errores'] for datos in resumen.values())
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(f"✅ Total de documentos corregidos: {reparados} en {duracion:.1f}s"))
+        if errores:
+            self.stdout.write(self.style.ERROR(f"❌ Documentos con error: {errores}"))
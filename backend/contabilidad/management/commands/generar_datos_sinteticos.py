@@ -0,0 +1,80 @@
+# contabilidad/management/commands/generar_datos_sinteticos.py
+import time
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from contabilidad.carga_masiva import FILAS_POR_BLOQUE
+from contabilidad.contabilizacion import ErrorContabilizacion
+from contabilidad.models import CuentaContable
+from contabilidad.sinteticos import GeneradorSintetico
+
+class Command(BaseCommand):
+    help = (
+        'Genera un libro contable sintético reproducible (semilla fija) para pruebas de carga y '
+        'benchmarks. Ej: --movimientos 10000000 --ventas 500000 --clientes 50000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=1000, help='Clientes a crear (por defecto 1000)')
+        parser.add_argument('--proveedores', type=int, default=200, help='Proveedores a crear (por defecto 200)')
+        parser.add_argument('--ventas', type=int, default=10000, help='Ventas contabilizadas (por defecto 10000)')
+        parser.add_argument('--compras', type=int, default=3000, help='Compras contabilizadas (por defecto 3000)')
+        parser.add_argument(
+            '--movimientos',
+            type=int,
+            default=100000,
+            help='Total de movimientos: los que no generen las ventas y compras se completan con '
+                 'asientos manuales (por defecto 100000)'
+        )
+        parser.add_argument('--desde', type=date.fromisoformat, help='Fecha inicial AAAA-MM-DD (por defecto 3 años antes de --hasta)')
+        parser.add_argument('--hasta', type=date.fromisoformat, help='Fecha final AAAA-MM-DD (por defecto 2025-12-31)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador (por defecto 42)')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=FILAS_POR_BLOQUE,
+            help=f'Movimientos por bloque escrito (por defecto {FILAS_POR_BLOQUE})'
+        )
+        parser.add_argument('--usuario', help='Correo del usuario al que se asignan los documentos')
+
+    def handle(self, *args, **options):
+        if not CuentaContable.objects.exists():
+            raise CommandError("No hay plan de cuentas. Ejecuta primero: python manage.py cargar_plan_cuentas")
+        if options['desde'] and options['hasta'] and options['desde'] > options['hasta']:
+            raise CommandError("--desde debe ser anterior a --hasta")
+
+        usuario = None
+        if options['usuario']:
+            Usuario = get_user_model()
+            try:
+                usuario = Usuario.objects.get(**{Usuario.USERNAME_FIELD: options['usuario']})
+            except Usuario.DoesNotExist:
+                raise CommandError(f"No existe el usuario {options['usuario']}")
+
+        generador = GeneradorSintetico(
+            semilla=options['semilla'],
+            desde=options['desde'],
+            hasta=options['hasta'],
+            tamano=options['lote'],
+            usuario=usuario,
+            informar=self.stdout.write,
+        )
+        inicio = time.perf_counter()
+        try:
+            resumen = generador.generar(
+                clientes=options['clientes'],
+                proveedores=options['proveedores'],
+                ventas=options['ventas'],
+                compras=options['compras'],
+                movimientos=options['movimientos'],
+            )
+        except (CuentaContable.DoesNotExist, ErrorContabilizacion, ValueError) as e:
+            raise CommandError(f"No se pudieron generar los datos: {e}")
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write(self.style.SUCCESS(f"🚀 DATOS SINTÉTICOS GENERADOS en {duracion:.1f}s (semilla {options['semilla']})"))
+        self.stdout.write("="*50)
+        for nombre, cantidad in resumen.items():
+            self.stdout.write(f"📊 {nombre}: {cantidad}")
+        self.stdout.write("="*50)
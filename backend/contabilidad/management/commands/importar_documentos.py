@@ -0,0 +1,55 @@
+# contabilidad/management/commands/importar_documentos.py
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from contabilidad.importacion import Importador, leer_filas, FORMATOS, FILAS_POR_LOTE
+
+class Command(BaseCommand):
+    help = 'Importa compras o ventas desde un archivo CSV o XLSX, con sus asientos contables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx (la primera fila son los encabezados)')
+        parser.add_argument('--tipo', choices=list(FORMATOS), required=True, help='Tipo de documento')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=FILAS_POR_LOTE,
+            help=f'Filas por lote (por defecto {FILAS_POR_LOTE})'
+        )
+        parser.add_argument('--usuario', help='Correo del usuario al que se asignan los documentos')
+
+    def handle(self, *args, **options):
+        usuario = None
+        if options['usuario']:
+            Usuario = get_user_model()
+            try:
+                usuario = Usuario.objects.get(**{Usuario.USERNAME_FIELD: options['usuario']})
+            except Usuario.DoesNotExist:
+                raise CommandError(f"No existe el usuario {options['usuario']}")
+
+        importador = Importador(options['tipo'], usuario=usuario, tamano=options['lote'])
+        inicio = time.perf_counter()
+
+        def progreso(resumen):
+            self.stdout.write(
+                f"📥 {resumen['filas']} filas leídas | {resumen['creados']} creadas | "
+                f"{resumen['omitidos']} omitidas | {resumen['errores']} con error"
+            )
+
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resumen = importador.importar(leer_filas(archivo, options['archivo']), progreso)
+        except FileNotFoundError:
+            raise CommandError(f"No existe el archivo {options['archivo']}")
+
+        for error in importador.errores:
+            self.stdout.write(self.style.ERROR(f"❌ Fila {error['fila']}: {error['error']}"))
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write(self.style.SUCCESS(f"🚀 Documentos importados: {resumen['creados']} en {duracion:.1f}s"))
+        self.stdout.write(f"👥 Proveedores/clientes creados: {resumen['contrapartes_creadas']}")
+        self.stdout.write(f"⏭️ Omitidos por existir: {resumen['omitidos']}")
+        if resumen['errores']:
+            self.stdout.write(self.style.WARNING(f"⚠️ Filas con error: {resumen['errores']}"))
+        self.stdout.write("="*50)
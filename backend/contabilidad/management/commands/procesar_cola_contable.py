@@ -0,0 +1,78 @@
+# contabilidad/management/commands/procesar_cola_contable.py
+import time
+from django.core.management.base import BaseCommand
+from contabilidad.cola import procesar_lote, reintentar_fallidos, estado_cola
+from contabilidad.tareas import procesar_tareas_pendientes
+from contabilidad.versiones import verificar_caches
+
+class Command(BaseCommand):
+    help = (
+        'Genera por lotes los asientos de la cola de contabilización asíncrona '
+        'y ejecuta las tareas de reparación e importación pendientes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Trabajos por lote (por defecto 500)')
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='No termina al vaciar la cola: sigue esperando trabajos nuevos'
+        )
+        parser.add_argument(
+            '--espera',
+            type=float,
+            default=1.0,
+            help='Segundos de espera con la cola vacía en modo continuo (por defecto 1)'
+        )
+        parser.add_argument(
+            '--reintentar-fallidos',
+            action='store_true',
+            help='Devuelve a la cola los trabajos fallidos antes de procesar'
+        )
+
+    def handle(self, *args, **options):
+        if options['reintentar_fallidos']:
+            cantidad = reintentar_fallidos()
+            self.stdout.write(f"🔁 Trabajos fallidos devueltos a la cola: {cantidad}")
+
+        total_ok = 0
+        total_error = 0
+        try:
+            while True:
+                # Recarga plan de cuentas y reglas si cambiaron desde el último lote
+                verificar_caches()
+
+                inicio = time.perf_counter()
+                ok, error = procesar_lote(options['lote'])
+                total_ok += ok
+                total_error += error
+
+                if ok or error:
+                    duracion = time.perf_counter() - inicio
+                    estado = estado_cola()
+                    self.stdout.write(
+                        f"📒 Lote: {ok} contabilizados, {error} con error en {duracion:.2f}s | "
+                        f"pendientes={estado['pendientes']} fallidos={estado['fallidos']} "
+                        f"retraso={estado['retraso_segundos']}s"
+                    )
+                    continue
+
+                tareas = procesar_tareas_pendientes()
+                if tareas:
+                    self.stdout.write(f"🛠️ Tareas en segundo plano ejecutadas: {tareas}")
+                    continue
+
+                if not options['continuo']:
+                    break
+                time.sleep(options['espera'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("⏹️ Interrumpido"))
+
+        estado = estado_cola()
+        self.stdout.write(self.style.SUCCESS(f"✅ Documentos contabilizados: {total_ok}"))
+        if total_error:
+            self.stdout.write(self.style.WARNING(f"⚠️ Intentos con error: {total_error}"))
+        if estado['fallidos']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Trabajos en la cola de errores: {estado['fallidos']} (use --reintentar-fallidos)"
+            ))
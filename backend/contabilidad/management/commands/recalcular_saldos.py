@@ -0,0 +1,77 @@
+# contabilidad/management/commands/recalcular_saldos.py
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum, Count
+from contabilidad.cache_reportes import invalidar_libro
+from contabilidad.models import CuentaContable, Movimiento, SaldoCuenta
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla de saldos por cuenta a partir de los movimientos e informa las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-verificar',
+            action='store_true',
+            help='Solo informa las diferencias, sin reconstruir la tabla'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Bloquea las escrituras de saldos mientras se recalcula, para que
+            # ninguna contabilización en curso quede fuera ni se cuente dos veces
+            if connection.vendor == 'postgresql' and not options['solo_verificar']:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LOCK TABLE {SaldoCuenta._meta.db_table} IN EXCLUSIVE MODE')
+
+            # === 1. Totales reales desde los movimientos (una sola consulta) ===
+            reales = {
+                fila['cuenta_id']: (fila['debe'], fila['haber'], fila['cantidad'])
+                for fila in Movimiento.objects.values('cuenta_id').annotate(
+                    debe=Sum('debe'), haber=Sum('haber'), cantidad=Count('id')
+                )
+            }
+
+            # === 2. Totales almacenados ===
+            almacenados = {
+                saldo.cuenta_id: (saldo.total_debe, saldo.total_haber, saldo.cantidad_movimientos)
+                for saldo in SaldoCuenta.objects.all()
+            }
+
+            # === 3. Informar diferencias ===
+            cero = (Decimal('0.00'), Decimal('0.00'), 0)
+            codigos = dict(CuentaContable.objects.values_list('id', 'codigo'))
+            diferencias = 0
+            for cuenta_id in sorted(set(reales) | set(almacenados)):
+                real = reales.get(cuenta_id, cero)
+                almacenado = almacenados.get(cuenta_id, cero)
+                if real != almacenado:
+                    diferencias += 1
+                    self.stdout.write(self.style.WARNING(
+                        f"⚠️ Cuenta {codigos.get(cuenta_id, cuenta_id)}: "
+                        f"almacenado debe={almacenado[0]} haber={almacenado[1]} movs={almacenado[2]} | "
+                        f"real debe={real[0]} haber={real[1]} movs={real[2]}"
+                    ))
+
+            if diferencias == 0:
+                self.stdout.write(self.style.SUCCESS("✅ Los saldos almacenados coinciden con los movimientos"))
+            else:
+                self.stdout.write(self.style.WARNING(f"⚠️ Cuentas con diferencias: {diferencias}"))
+
+            if options['solo_verificar']:
+                return
+
+            # === 4. Reconstruir la tabla ===
+            SaldoCuenta.objects.all().delete()
+            SaldoCuenta.objects.bulk_create([
+                SaldoCuenta(
+                    cuenta_id=cuenta_id,
+                    total_debe=debe,
+                    total_haber=haber,
+                    cantidad_movimientos=cantidad
+                )
+                for cuenta_id, (debe, haber, cantidad) in reales.items()
+            ], batch_size=1000)
+            invalidar_libro()
+
+        self.stdout.write(self.style.SUCCESS(f"🚀 Saldos reconstruidos para {len(reales)} cuentas"))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def poblar_saldos(apps, schema_editor):
+    Movimiento = apps.get_model('contabilidad', 'Movimiento')
+    SaldoCuenta = apps.get_model('contabilidad', 'SaldoCuenta')
+    filas = Movimiento.objects.values('cuenta_id').annotate(
+        debe=Sum('debe'), haber=Sum('haber'), cantidad=Count('id')
+    )
+    SaldoCuenta.objects.bulk_create([
+        SaldoCuenta(
+            cuenta_id=fila['cuenta_id'],
+            total_debe=fila['debe'],
+            total_haber=fila['haber'],
+            cantidad_movimientos=fila['cantidad'],
+        )
+        for fila in filas
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0006_alter_movimiento_cuenta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoCuenta',
+            fields=[
+                ('cuenta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='saldo_acumulado', serialize=False, to='contabilidad.cuentacontable')),
+                ('total_debe', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_haber', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('cantidad_movimientos', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Saldo de Cuenta',
+                'verbose_name_plural': 'Saldos de Cuentas',
+            },
+        ),
+        migrations.RunPython(poblar_saldos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0007_saldocuenta'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asientocontable',
+            index=models.Index(fields=['fecha', 'id'], name='asiento_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0008_asiento_fecha_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionContable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('valor', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versión Contable',
+                'verbose_name_plural': 'Versiones Contables',
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def crear_cuenta_iva_debito(apps, schema_editor):
+    """
+    Las ventas registran el IVA en su propia cuenta (regla predeterminada).
+    Si el plan de cuentas ya está cargado, agrega la cuenta 2111.
+    """
+    CuentaContable = apps.get_model('contabilidad', 'CuentaContable')
+    if not CuentaContable.objects.filter(codigo='2110').exists():
+        return
+    _, creada = CuentaContable.objects.get_or_create(
+        codigo='2111',
+        defaults={
+            'nombre': 'IVA DEBITO FISCAL',
+            'tipo': 'pasivo',
+            'clasificacion': '211',
+            'nivel': 3,
+            'descripcion': 'Cuenta IVA DEBITO FISCAL',
+        }
+    )
+    if creada:
+        # Los workers en ejecución recargan el plan de cuentas en memoria
+        VersionContable = apps.get_model('contabilidad', 'VersionContable')
+        version, _ = VersionContable.objects.get_or_create(nombre='plan_cuentas')
+        version.valor += 1
+        version.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0009_versioncontable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReglaContabilizacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_documento', models.CharField(choices=[('compra', 'Compra'), ('venta', 'Venta')], max_length=10)),
+                ('condicion', models.CharField(choices=[('todas', 'Todas'), ('nacional', 'Compra nacional'), ('importacion', 'Compra de importación'), ('contado', 'Venta de contado'), ('credito', 'Venta a crédito')], default='todas', max_length=15)),
+                ('lado', models.CharField(choices=[('debe', 'Debe'), ('haber', 'Haber')], max_length=5)),
+                ('importe', models.CharField(choices=[('total', 'Total del documento'), ('base', 'Base (total - IVA)'), ('iva', 'IVA')], max_length=5)),
+                ('orden', models.PositiveSmallIntegerField(default=0)),
+                ('activa', models.BooleanField(default=True)),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reglas_contabilizacion', to='contabilidad.cuentacontable')),
+            ],
+            options={
+                'verbose_name': 'Regla de Contabilización',
+                'verbose_name_plural': 'Reglas de Contabilización',
+                'ordering': ['tipo_documento', 'orden', 'id'],
+            },
+        ),
+        migrations.RunPython(crear_cuenta_iva_debito, migrations.RunPython.noop),
+    ]
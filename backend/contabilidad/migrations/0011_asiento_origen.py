@@ -0,0 +1,63 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:09
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def asignar_origen(apps, schema_editor):
+    """
+    Marca el origen de los asientos ya enlazados a una compra o venta e
+    informa los duplicados sin enlace que dejó la doble contabilización: no
+    se eliminan aquí (afectan los saldos); se revisan y eliminan con
+    `manage.py corregir_asientos_duplicados`.
+    """
+    AsientoContable = apps.get_model('contabilidad', 'AsientoContable')
+    documentos = (('compra', apps.get_model('compras', 'Compra')), ('venta', apps.get_model('ventas', 'Venta')))
+    for origen_tipo, modelo in documentos:
+        enlaces = modelo.objects.filter(asiento__isnull=False).values_list('id', 'asiento_id')
+        asientos = [
+            AsientoContable(id=asiento_id, origen_tipo=origen_tipo, origen_id=documento_id)
+            for documento_id, asiento_id in enlaces.iterator(chunk_size=2000)
+        ]
+        AsientoContable.objects.bulk_update(asientos, ['origen_tipo', 'origen_id'], batch_size=1000)
+
+    sin_enlace = AsientoContable.objects.filter(origen_id__isnull=True)
+    for _, modelo in documentos:
+        sin_enlace = sin_enlace.exclude(Exists(modelo.objects.filter(asiento=OuterRef('pk'))))
+    duplicados = sin_enlace.filter(Exists(AsientoContable.objects.filter(
+        origen_id__isnull=False, fecha=OuterRef('fecha'), descripcion=OuterRef('descripcion')
+    ))).count()
+    if duplicados:
+        print(
+            f"\n  ⚠️ {duplicados} asientos sin documento repiten el asiento de una compra o venta "
+            "y se suman a los saldos: revíselos con `manage.py corregir_asientos_duplicados`"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0010_reglacontabilizacion'),
+        ('compras', '0002_compra_fecha_id_idx'),
+        ('ventas', '0004_venta_condicion_pago'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asientocontable',
+            name='origen_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='asientocontable',
+            name='origen_tipo',
+            field=models.CharField(blank=True, choices=[('compra', 'Compra'), ('venta', 'Venta')], default='', max_length=10),
+        ),
+        migrations.RunPython(asignar_origen, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='asientocontable',
+            constraint=models.UniqueConstraint(condition=models.Q(('origen_id__isnull', False)), fields=('origen_tipo', 'origen_id'), name='asiento_origen_unico'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0011_asiento_origen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoContabilizacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origen_tipo', models.CharField(choices=[('compra', 'Compra'), ('venta', 'Venta')], max_length=10)),
+                ('origen_id', models.PositiveBigIntegerField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('fallido', 'Fallido')], default='pendiente', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+                ('disponible_en', models.DateTimeField()),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Contabilización',
+                'verbose_name_plural': 'Trabajos de Contabilización',
+                'indexes': [models.Index(fields=['estado', 'disponible_en', 'id'], name='trabajo_cola_idx')],
+                'constraints': [models.UniqueConstraint(fields=('origen_tipo', 'origen_id'), name='trabajo_origen_unico')],
+            },
+        ),
+    ]
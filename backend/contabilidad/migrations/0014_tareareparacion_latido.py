@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0013_tareareparacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tareareparacion',
+            name='latido_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tareareparacion',
+            name='pid',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tareareparacion',
+            name='servidor',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='tareareparacion',
+            name='tipos',
+            field=models.CharField(default='venta,compra', max_length=50),
+        ),
+    ]
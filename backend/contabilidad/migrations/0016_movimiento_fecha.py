@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copiar_fecha_asiento(apps, schema_editor):
+    """Copia la fecha de cada asiento en sus movimientos (un solo UPDATE)."""
+    AsientoContable = apps.get_model('contabilidad', 'AsientoContable')
+    Movimiento = apps.get_model('contabilidad', 'Movimiento')
+    Movimiento.objects.update(fecha=Subquery(
+        AsientoContable.objects.filter(pk=OuterRef('asiento_id')).values('fecha')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0015_tareaimportacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimiento',
+            name='fecha',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(copiar_fecha_asiento, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separada de 0016: en PostgreSQL no se altera la tabla en la misma
+    # transacción que la actualiza
+
+    dependencies = [
+        ('contabilidad', '0016_movimiento_fecha'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movimiento',
+            name='fecha',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['cuenta', 'fecha', 'asiento', 'id'], name='movimiento_mayor_idx'),
+        ),
+    ]
@@ -123,25 +123,38 @@ class CuentaContable(models.Model):
         Calcula el saldo de la cuenta según su tipo.
         - Para activos y gastos: Debe - Haber
         - Para pasivos, patrimonio e ingresos: Haber - Debe
+
+        Lee los totales acumulados en SaldoCuenta, sin recorrer los movimientos.
         """
-        from contabilidad.models import Movimiento
-        movimientos = self.movimientos.all()
-        
-        debe = sum(m.debe for m in movimientos)
-        haber = sum(m.haber for m in movimientos)
-        
+        try:
+            saldo = self.saldo_acumulado
+        except SaldoCuenta.DoesNotExist:
+            return 0
+
+        debe = saldo.total_debe
+        haber = saldo.total_haber
+
         if self.tipo in ['activo', 'gasto']:
             return debe - haber
         else:
             return haber - debe
 
 class AsientoContable(models.Model):
+    ORIGENES = [
+        ('compra', 'Compra'),
+        ('venta', 'Venta'),
+    ]
+
     fecha = models.DateField()
     descripcion = models.TextField()
     usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
 
+    # Documento que generó el asiento (vacío en asientos manuales)
+    origen_tipo = models.CharField(max_length=10, choices=ORIGENES, blank=True, default='')
+    origen_id = models.PositiveBigIntegerField(null=True, blank=True)
+
     def __str__(self):
         return f"Asiento {self.id} - {self.fecha}"
 
@@ -149,6 +162,18 @@ class AsientoContable(models.Model):
         verbose_name = "Asiento Contable"
         verbose_name_plural = "Asientos Contables"
         ordering = ['-creado_en']
+        indexes = [
+            # Respaldo de la paginación por cursor (fecha, id)
+            models.Index(fields=['fecha', 'id'], name='asiento_fecha_id_idx'),
+        ]
+        constraints = [
+            # Un solo asiento por documento, aunque se contabilice dos veces o en paralelo
+            models.UniqueConstraint(
+                fields=['origen_tipo', 'origen_id'],
+                condition=models.Q(origen_id__isnull=False),
+                name='asiento_origen_unico',
+            ),
+        ]
 
 
 class Movimiento(models.Model):
@@ -156,6 +181,11 @@ class Movimiento(models.Model):
     cuenta = models.ForeignKey(CuentaContable, on_delete=models.PROTECT, related_name='movimientos')
     debe = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     haber = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Copia de asiento.fecha, para recorrer el mayor de una cuenta por índice
+    # sin unir con los asientos. La asignan las señales de save() de
+    # Movimiento y AsientoContable, y quien crea movimientos con bulk_create
+    # (registrar_asientos, datos sintéticos, carga de fixtures)
+    fecha = models.DateField(editable=False)
 
     def __str__(self):
         return f"{self.cuenta.codigo} - {self.debe}/{self.haber}"
@@ -163,6 +193,10 @@ class Movimiento(models.Model):
     class Meta:
         verbose_name = "Movimiento"
         verbose_name_plural = "Movimientos"
+        indexes = [
+            # Respaldo del cursor del libro mayor (cuenta, fecha, asiento, id)
+            models.Index(fields=['cuenta', 'fecha', 'asiento', 'id'], name='movimiento_mayor_idx'),
+        ]
         
         
 class TipoCuenta(models.Model):
@@ -170,4 +204,202 @@ class TipoCuenta(models.Model):
 
 class ClasificacionCuenta(models.Model):
     codigo = models.CharField(max_length=10)
-    nombre = models.CharField(max_length=100)
\ No newline at end of file
+    nombre = models.CharField(max_length=100)
+
+
+class SaldoCuenta(models.Model):
+    """
+    Totales acumulados de debe/haber por cuenta (modelo de lectura).
+    Se actualiza en la misma transacción en que se registran, modifican o
+    eliminan movimientos (ver contabilidad/saldos.py):
+
+    - save() y delete() de Movimiento (uno por uno) y delete() de
+      AsientoContable: señales de contabilidad/signals.py.
+    - Movimiento.objects.bulk_create(): quien lo usa llama a
+      registrar_movimientos() (ej. registrar_asientos()).
+    - update() y bulk_update() de Movimiento, o SQL directo, no emiten
+      señales: no deben usarse para cambiar cuentas o montos sin ejecutar
+      después el comando `recalcular_saldos`, que la reconstruye.
+    """
+    cuenta = models.OneToOneField(
+        CuentaContable,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='saldo_acumulado'
+    )
+    total_debe = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_haber = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    cantidad_movimientos = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.cuenta_id} - {self.total_debe}/{self.total_haber}"
+
+    class Meta:
+        verbose_name = "Saldo de Cuenta"
+        verbose_name_plural = "Saldos de Cuentas"
+
+
+class VersionContable(models.Model):
+    """
+    Contadores de versión compartidos entre procesos (ej. 'plan_cuentas').
+    Cada worker compara el valor con el de su caché en memoria para saber
+    si debe recargarla; ver contabilidad/plan_cuentas.py.
+    """
+    nombre = models.CharField(max_length=50, unique=True)
+    valor = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.nombre} v{self.valor}"
+
+    class Meta:
+        verbose_name = "Versión Contable"
+        verbose_name_plural = "Versiones Contables"
+
+
+class ReglaContabilizacion(models.Model):
+    """
+    Plantilla de un movimiento del asiento automático de una compra o venta.
+    El asiento de un documento se arma con las reglas activas de su tipo
+    cuya condición sea 'todas' o la del documento, en el orden indicado.
+    Si no hay reglas para un tipo de documento se usan las predeterminadas
+    (ver contabilidad/contabilizacion.py).
+    """
+    DOCUMENTOS = [
+        ('compra', 'Compra'),
+        ('venta', 'Venta'),
+    ]
+
+    CONDICIONES = [
+        ('todas', 'Todas'),
+        ('nacional', 'Compra nacional'),
+        ('importacion', 'Compra de importación'),
+        ('contado', 'Venta de contado'),
+        ('credito', 'Venta a crédito'),
+    ]
+
+    LADOS = [
+        ('debe', 'Debe'),
+        ('haber', 'Haber'),
+    ]
+
+    IMPORTES = [
+        ('total', 'Total del documento'),
+        ('base', 'Base (total - IVA)'),
+        ('iva', 'IVA'),
+    ]
+
+    tipo_documento = models.CharField(max_length=10, choices=DOCUMENTOS)
+    condicion = models.CharField(max_length=15, choices=CONDICIONES, default='todas')
+    cuenta = models.ForeignKey(CuentaContable, on_delete=models.PROTECT, related_name='reglas_contabilizacion')
+    lado = models.CharField(max_length=5, choices=LADOS)
+    importe = models.CharField(max_length=5, choices=IMPORTES)
+    orden = models.PositiveSmallIntegerField(default=0)
+    activa = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"{self.tipo_documento}/{self.condicion}: {self.lado} {self.importe}"
+
+    class Meta:
+        verbose_name = "Regla de Contabilización"
+        verbose_name_plural = "Reglas de Contabilización"
+        ordering = ['tipo_documento', 'orden', 'id']
+
+
+class TrabajoContabilizacion(models.Model):
+    """
+    Documento pendiente de contabilizar en la cola asíncrona
+    (ver contabilidad/cola.py y el comando `procesar_cola_contable`).
+    Los trabajos procesados se eliminan; los que agotan los reintentos
+    quedan en estado 'fallido' (cola de errores) para revisión.
+    """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('fallido', 'Fallido'),
+    ]
+
+    origen_tipo = models.CharField(max_length=10, choices=AsientoContable.ORIGENES)
+    origen_id = models.PositiveBigIntegerField()
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    ultimo_error = models.TextField(blank=True, default='')
+    disponible_en = models.DateTimeField()
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.origen_tipo} {self.origen_id} ({self.estado})"
+
+    class Meta:
+        verbose_name = "Trabajo de Contabilización"
+        verbose_name_plural = "Trabajos de Contabilización"
+        constraints = [
+            models.UniqueConstraint(fields=['origen_tipo', 'origen_id'], name='trabajo_origen_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['estado', 'disponible_en', 'id'], name='trabajo_cola_idx'),
+        ]
+
+
+class TareaSegundoPlano(models.Model):
+    """
+    Campos comunes de las tareas largas que se ejecutan fuera de la petición
+    (ver contabilidad/tareas.py), consultables por su id. El proceso que la
+    ejecuta renueva `latido_en`; si deja de hacerlo, la tarea se da por
+    abandonada y pasa a 'error'.
+    """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completada', 'Completada'),
+        ('error', 'Error'),
+    ]
+
+    estado = models.CharField(max_length=12, choices=ESTADOS, default='pendiente')
+    total = models.PositiveIntegerField(default=0)
+    procesados = models.PositiveIntegerField(default=0)
+    log = models.TextField(blank=True, default='')
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    servidor = models.CharField(max_length=255, blank=True, default='')
+    pid = models.PositiveIntegerField(null=True, blank=True)
+    latido_en = models.DateTimeField(null=True, blank=True)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    finalizado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['-creado_en']
+
+
+class TareaReparacion(TareaSegundoPlano):
+    """Reparación de documentos sin asiento (ver contabilidad/reparacion.py)."""
+    tipos = models.CharField(max_length=50, default='venta,compra')
+
+    def __str__(self):
+        return f"Reparación {self.id} ({self.estado})"
+
+    class Meta(TareaSegundoPlano.Meta):
+        verbose_name = "Tarea de Reparación"
+        verbose_name_plural = "Tareas de Reparación"
+
+
+class TareaImportacion(TareaSegundoPlano):
+    """
+    Importación de un archivo de compras o ventas demasiado grande para
+    procesarse dentro de la petición (ver contabilidad/importacion.py).
+    `archivo` es la copia guardada en IMPORTACIONES_DIRECTORIO.
+    """
+    TIPOS = [
+        ('compra', 'Compras'),
+        ('venta', 'Ventas'),
+    ]
+
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    archivo = models.CharField(max_length=500)
+    nombre_archivo = models.CharField(max_length=255)
+    resultado = models.JSONField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Importación {self.id} de {self.nombre_archivo} ({self.estado})"
+
+    class Meta(TareaSegundoPlano.Meta):
+        verbose_name = "Tarea de Importación"
+        verbose_name_plural = "Tareas de Importación"
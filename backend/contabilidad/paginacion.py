@@ -0,0 +1,232 @@
+# contabilidad/paginacion.py
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from .ledger import con_saldo_acumulado
+
+
+class FechaIdCursorPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (fecha, id).
+
+    En lugar de OFFSET/COUNT filtra por la clave de la última fila entregada,
+    de modo que cualquier página cuesta lo mismo que la primera si existe un
+    índice compuesto sobre los campos de `ordering`. Los cursores `next` y
+    `previous` son opacos (JSON en base64).
+    """
+    ordering = ('-fecha', '-id')
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        valores, reverso = self.decode_cursor(request)
+        if valores is not None:
+            valores = self.validar_clave(queryset.model, valores)
+
+        orden = self._invertir(self.ordering) if reverso else self.ordering
+        queryset = queryset.order_by(*orden)
+        if valores is not None:
+            queryset = queryset.filter(self.filtro_posterior(orden, valores))
+
+        filas = list(self.limitar(queryset, page_size + 1))
+        hay_mas = len(filas) > page_size
+        filas = filas[:page_size]
+        if reverso:
+            filas.reverse()
+
+        if reverso:
+            self.has_next = valores is not None
+            self.has_previous = hay_mas
+        else:
+            self.has_next = hay_mas
+            self.has_previous = valores is not None
+
+        self.primera_clave = self.clave(filas[0]) if filas else valores
+        self.ultima_clave = self.clave(filas[-1]) if filas else valores
+        return filas
+
+    def limitar(self, queryset, cantidad):
+        """Primeras `cantidad` filas del queryset ya filtrado y ordenado."""
+        return queryset[:cantidad]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next or self.ultima_clave is None:
+            return None
+        return self.encode_cursor(self.ultima_clave, reverso=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.primera_clave is None:
+            return None
+        return self.encode_cursor(self.primera_clave, reverso=True)
+
+    # === Cursor ===
+    def encode_cursor(self, valores, reverso, **extra):
+        datos = json.dumps({'v': valores, 'r': int(reverso), **extra}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(datos.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        self.datos_cursor = None
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            valores = datos['v']
+            reverso = bool(datos.get('r'))
+        except (TypeError, ValueError, KeyError, AttributeError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(valores, list) or len(valores) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        self.datos_cursor = datos
+        return valores, reverso
+
+    def validar_clave(self, modelo, valores):
+        """
+        Convierte cada valor del cursor al tipo de su campo (fecha, entero...).
+        Un cursor alterado responde 404 en lugar de llegar al filtro.
+        """
+        convertidos = []
+        for campo, valor in zip(self.ordering, valores):
+            if valor is None or isinstance(valor, (list, dict, bool)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                convertidos.append(self._campo(modelo, campo.lstrip('-')).to_python(valor))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        return convertidos
+
+    @staticmethod
+    def _campo(modelo, ruta):
+        partes = ruta.split('__')
+        for parte in partes[:-1]:
+            modelo = modelo._meta.get_field(parte).related_model
+        return modelo._meta.get_field(partes[-1])
+
+    # === Clave de ordenamiento ===
+    def clave(self, fila):
+        """
+        Valores de los campos de `ordering` para una fila (modelo o dict),
+        serializados como texto para el cursor.
+        """
+        valores = []
+        for campo in self.ordering:
+            nombre = campo.lstrip('-')
+            if isinstance(fila, dict):
+                valor = fila[nombre]
+            else:
+                valor = fila
+                for parte in nombre.split('__'):
+                    valor = getattr(valor, parte)
+            valores.append(valor.isoformat() if hasattr(valor, 'isoformat') else valor)
+        return valores
+
+    @staticmethod
+    def _invertir(ordering):
+        return tuple(campo[1:] if campo.startswith('-') else '-' + campo for campo in ordering)
+
+    @staticmethod
+    def filtro_posterior(orden, valores):
+        """
+        Filas estrictamente posteriores a `valores` según `orden`:
+            (a, b) > (x, y)  ≡  a ≥ x AND (a > x OR (a = x AND b > y))
+        La primera condición acota el rango del índice sobre el campo principal.
+        """
+        campos = [
+            (campo.lstrip('-'), 'lt' if campo.startswith('-') else 'gt')
+            for campo in orden
+        ]
+        primero, op_primero = campos[0]
+        condicion = Q()
+        iguales = Q()
+        for (campo, op), valor in zip(campos, valores):
+            condicion |= iguales & Q(**{f'{campo}__{op}': valor})
+            iguales &= Q(**{campo: valor})
+        return Q(**{f'{primero}__{op_primero}e': valores[0]}) & condicion
+
+
+class LibroMayorPagination(FechaIdCursorPagination):
+    """
+    Cursor sobre movimientos del mayor: por cuenta y, dentro de cada cuenta,
+    en orden cronológico (fecha del asiento, asiento, movimiento). Recibe
+    movimientos_mayor() y entrega las filas con su saldo acumulado.
+
+    Cada cursor lleva además, firmado, el saldo (Debe - Haber) de la cuenta
+    de su fila en el borde con la página a la que apunta: después de la
+    última fila (`next`) o antes de la primera (`previous`). La vista lo
+    asigna en `saldo_siguiente` / `saldo_anterior` antes de pedir los enlaces
+    y lo recibe en `saldo_cursor` (None si falta o la firma no es válida).
+    """
+    ordering = ('cuenta_id', 'fecha', 'asiento_id', 'id')
+    page_size = 100
+    max_page_size = 1000
+    firmante = signing.Signer(salt='contabilidad.libro_mayor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        filas = super().paginate_queryset(queryset, request, view)
+        self.saldo_siguiente = None
+        self.saldo_anterior = None
+        self.reverso = bool(self.datos_cursor and self.datos_cursor.get('r'))
+        self.cuenta_cursor = self.datos_cursor['v'][0] if self.datos_cursor else None
+        self.saldo_cursor = self._leer_saldo(self.datos_cursor)
+        return filas
+
+    def limitar(self, queryset, cantidad):
+        # El saldo acumulado se calcula solo sobre las filas de la página
+        return con_saldo_acumulado(super().limitar(queryset, cantidad))
+
+    def _leer_saldo(self, datos):
+        if not datos or 's' not in datos:
+            return None
+        try:
+            saldo, valores = self.firmante.unsign_object(datos['s'])
+            if valores != datos['v']:
+                return None
+            return Decimal(saldo)
+        except (signing.BadSignature, TypeError, ValueError, InvalidOperation):
+            return None
+
+    def encode_cursor(self, valores, reverso):
+        saldo = self.saldo_anterior if reverso else self.saldo_siguiente
+        if saldo is None:
+            return super().encode_cursor(valores, reverso)
+        return super().encode_cursor(valores, reverso, s=self.firmante.sign_object([str(saldo), valores]))
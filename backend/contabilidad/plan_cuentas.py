@@ -0,0 +1,61 @@
+# contabilidad/plan_cuentas.py
+import bisect
+from .models import CuentaContable
+from .versiones import CacheVersionada
+
+
+class PlanCuentas:
+    """
+    Instantánea del plan de cuentas en memoria, indexada por id, código y
+    clasificación. Es compartida por todos los hilos del proceso: las
+    cuentas que entrega no deben modificarse.
+    """
+    def __init__(self, cuentas):
+        self.por_id = {cuenta.id: cuenta for cuenta in cuentas}
+        self.por_codigo = {cuenta.codigo: cuenta for cuenta in cuentas}
+        self._por_clasificacion = sorted(cuentas, key=lambda c: (c.clasificacion, c.codigo))
+        self._clasificaciones = [cuenta.clasificacion for cuenta in self._por_clasificacion]
+
+    def cuenta(self, codigo):
+        try:
+            return self.por_codigo[codigo]
+        except KeyError:
+            raise CuentaContable.DoesNotExist(f"La cuenta {codigo} no existe en el plan de cuentas.")
+
+    def con_prefijo(self, prefijo):
+        """Cuentas cuya clasificación empieza por `prefijo` (ej. '11'), por búsqueda binaria."""
+        inicio = bisect.bisect_left(self._clasificaciones, prefijo)
+        fin = bisect.bisect_left(self._clasificaciones, prefijo + '\uffff')
+        return self._por_clasificacion[inicio:fin]
+
+
+# Se carga una vez por worker y se recarga cuando cambia la versión 'plan_cuentas'
+_cache = CacheVersionada('plan_cuentas', lambda: PlanCuentas(list(CuentaContable.objects.all())))
+
+
+def plan_cuentas():
+    return _cache.obtener()
+
+
+def invalidar_plan_cuentas():
+    """
+    Registra un cambio en el plan de cuentas. Las señales de CuentaContable
+    la llaman; los cambios masivos que no disparan señales (update,
+    bulk_create) deben llamarla explícitamente.
+    """
+    _cache.invalidar()
+
+
+def cuenta_por_codigo(codigo):
+    """Cuenta con el código dado. Lanza CuentaContable.DoesNotExist si no existe."""
+    return plan_cuentas().cuenta(codigo)
+
+
+def cuentas_por_ids(ids):
+    """Dict id → cuenta para los ids que existen en el plan."""
+    por_id = plan_cuentas().por_id
+    return {cuenta_id: por_id[cuenta_id] for cuenta_id in ids if cuenta_id in por_id}
+
+
+def cuentas_con_prefijo(prefijo):
+    return plan_cuentas().con_prefijo(prefijo)
@@ -0,0 +1,203 @@
+# contabilidad/reparacion.py
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Subquery
+from .models import AsientoContable
+from .contabilizacion import contabilizar_documentos, modelo_documento
+
+logger = logging.getLogger(__name__)
+
+TIPOS_DOCUMENTO = ('venta', 'compra')
+
+# Errores detallados por bloque en el log (el resto solo se cuenta)
+MAX_ERRORES_LOG = 20
+
+
+def documentos_sin_asiento(origen_tipo):
+    """
+    Ids de los documentos sin asiento enlazado, en una sola consulta.
+    `enlazable` es True si ya existe un asiento con su clave de origen
+    (basta con enlazarlo) y False si hay que generarlo.
+    """
+    modelo, _ = modelo_documento(origen_tipo)
+    asiento_origen = AsientoContable.objects.filter(origen_tipo=origen_tipo, origen_id=OuterRef('pk'))
+    return list(
+        modelo.objects.filter(asiento__isnull=True)
+        .annotate(enlazable=Exists(asiento_origen))
+        .order_by('id')
+        .values_list('id', 'enlazable')
+    )
+
+
+def reparar_bloque(origen_tipo, ids):
+    """
+    Genera (o enlaza) los asientos de un bloque de documentos con inserciones
+    masivas. Si el bloque falla, se reintenta documento por documento para
+    no perder los válidos. Devuelve (reparados, errores, mensajes).
+    """
+    modelo, lector = modelo_documento(origen_tipo)
+    documentos = list(
+        modelo.objects.select_related(*lector['relacionados'])
+        .filter(id__in=ids, asiento__isnull=True)
+    )
+    try:
+        with transaction.atomic():
+            contabilizar_documentos(documentos)
+        return len(documentos), 0, []
+    except Exception:
+        for documento in documentos:
+            documento.asiento_id = None
+
+    reparados, mensajes = 0, []
+    for documento in documentos:
+        try:
+            with transaction.atomic():
+                contabilizar_documentos([documento])
+            reparados += 1
+        except Exception as error:
+            documento.asiento_id = None
+            mensajes.append(f"{origen_tipo} {documento.id}: {type(error).__name__}: {error}")
+    return reparados, len(mensajes), mensajes
+
+
+def _reparar_bloque_en_proceso(argumentos):
+    return reparar_bloque(*argumentos)
+
+
+def _iniciar_proceso():
+    # Cada proceso hijo abre sus propias conexiones
+    connections.close_all()
+
+
+def reparar_documentos(tipos=TIPOS_DOCUMENTO, tamano=1000, procesos=1, dry_run=False,
+                       informar=logger.info, al_iniciar=None, avance=None):
+    """
+    Repara compras y ventas sin asiento, en bloques de `tamano` documentos,
+    repartidos entre `procesos` procesos (fork) si es mayor que 1.
+
+    - `informar(mensaje)`: mensajes de progreso (por defecto, al log).
+    - `al_iniciar(total)`: documentos a procesar, antes del primer bloque.
+    - `avance(procesados)`: documentos procesados hasta el momento.
+    Devuelve el resumen por tipo de documento.
+    """
+    pendientes_por_tipo = {origen_tipo: documentos_sin_asiento(origen_tipo) for origen_tipo in tipos}
+    if al_iniciar:
+        al_iniciar(sum(len(pendientes) for pendientes in pendientes_por_tipo.values()))
+
+    resumen = {}
+    procesados = 0
+    for origen_tipo, pendientes in pendientes_por_tipo.items():
+        enlazables = sum(1 for _, enlazable in pendientes if enlazable)
+        resumen[origen_tipo] = {
+            'pendientes': len(pendientes),
+            'enlazables': enlazables,
+            'reparados': 0,
+            'errores': 0,
+        }
+        informar(
+            f"🔎 {origen_tipo}: {len(pendientes)} sin asiento "
+            f"({enlazables} solo por enlazar, {len(pendientes) - enlazables} por generar)"
+        )
+        if dry_run or not pendientes:
+            continue
+
+        ids = [documento_id for documento_id, _ in pendientes]
+        bloques = [(origen_tipo, ids[i:i + tamano]) for i in range(0, len(ids), tamano)]
+
+        if procesos > 1:
+            # Las conexiones abiertas no deben compartirse con los procesos hijos
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                max_workers=procesos,
+                mp_context=multiprocessing.get_context('fork'),
+                initializer=_iniciar_proceso,
+            )
+            resultados = pool.map(_reparar_bloque_en_proceso, bloques)
+        else:
+            pool = None
+            resultados = (reparar_bloque(*bloque) for bloque in bloques)
+
+        errores_log = 0
+        try:
+            for reparados, errores, mensajes in resultados:
+                datos = resumen[origen_tipo]
+                datos['reparados'] += reparados
+                datos['errores'] += errores
+                procesados += reparados + errores
+                if avance:
+                    avance(procesados)
+                for mensaje in mensajes:
+                    if errores_log < MAX_ERRORES_LOG:
+                        informar(f"❌ {mensaje}")
+                    errores_log += 1
+                informar(
+                    f"📒 {origen_tipo}: {datos['reparados'] + datos['errores']}/{datos['pendientes']} procesados "
+                    f"({datos['errores']} con error)"
+                )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    return resumen
+
+
+# === Asientos duplicados ===
+def asientos_duplicados():
+    """
+    Asientos de compras y ventas repetidos por la doble contabilización
+    anterior a la clave de origen (señal + vista, o cargar_datos_prueba).
+    Son asientos que ningún documento enlaza y que:
+
+    - tienen la clave de origen de un documento enlazado a otro asiento, o
+    - no tienen clave de origen y repiten la fecha y la descripción del
+      asiento de un documento.
+
+    Devuelve una lista de dicts con el asiento duplicado (`id`, `fecha`,
+    `descripcion`, `origen_tipo`, `origen_id`) y el que se conserva
+    (`conservar`: el enlazado al documento).
+    """
+    sin_enlace = AsientoContable.objects.all()
+    for origen_tipo in TIPOS_DOCUMENTO:
+        modelo, _ = modelo_documento(origen_tipo)
+        sin_enlace = sin_enlace.exclude(Exists(modelo.objects.filter(asiento=OuterRef('pk'))))
+    campos = ('id', 'fecha', 'descripcion', 'origen_tipo', 'origen_id', 'conservar')
+
+    duplicados = []
+    for origen_tipo in TIPOS_DOCUMENTO:
+        modelo, _ = modelo_documento(origen_tipo)
+        enlazado = modelo.objects.filter(pk=OuterRef('origen_id'), asiento__isnull=False).values('asiento_id')
+        duplicados += (
+            sin_enlace.filter(origen_tipo=origen_tipo, origen_id__isnull=False)
+            .annotate(conservar=Subquery(enlazado[:1]))
+            .filter(conservar__isnull=False)
+            .values(*campos)
+        )
+
+    original = AsientoContable.objects.filter(
+        origen_id__isnull=False, fecha=OuterRef('fecha'), descripcion=OuterRef('descripcion')
+    ).order_by('id').values('id')
+    duplicados += (
+        sin_enlace.filter(origen_id__isnull=True)
+        .annotate(conservar=Subquery(original[:1]))
+        .filter(conservar__isnull=False)
+        .values(*campos)
+    )
+    return sorted(duplicados, key=lambda duplicado: duplicado['id'])
+
+
+def eliminar_asientos_duplicados(duplicados):
+    """
+    Elimina los asientos de `asientos_duplicados()` (SaldoCuenta se descuenta
+    al borrarlos) y pasa su clave de origen al asiento conservado si este no
+    tiene una. Devuelve cuántos eliminó.
+    """
+    with transaction.atomic():
+        _, eliminados = AsientoContable.objects.filter(id__in=[d['id'] for d in duplicados]).delete()
+        for duplicado in duplicados:
+            if duplicado['origen_id'] is not None:
+                AsientoContable.objects.filter(id=duplicado['conservar'], origen_id__isnull=True).update(
+                    origen_tipo=duplicado['origen_tipo'], origen_id=duplicado['origen_id']
+                )
+    return eliminados.get(AsientoContable._meta.label, 0)
@@ -0,0 +1,96 @@
+# contabilidad/saldos.py
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Sum, Count
+from .models import SaldoCuenta, Movimiento
+from .cache_reportes import invalidar_libro
+
+
+def _decimal(valor):
+    # Un movimiento recién creado conserva los valores tal como se pasaron (int, float)
+    return valor if isinstance(valor, Decimal) else Decimal(str(valor))
+
+
+def registrar_movimientos(movimientos):
+    """
+    Suma a SaldoCuenta los movimientos recién guardados con bulk_create
+    (que no emite señales). Debe llamarse dentro de la transacción que los crea.
+    """
+    totales = defaultdict(lambda: [Decimal('0.00'), Decimal('0.00'), 0])
+    for mov in movimientos:
+        total = totales[mov.cuenta_id]
+        total[0] += _decimal(mov.debe)
+        total[1] += _decimal(mov.haber)
+        total[2] += 1
+
+    _aplicar(totales, signo=1)
+
+
+def ajustar_movimiento(movimiento, anterior=None):
+    """
+    Ajusta SaldoCuenta por un movimiento guardado individualmente (save():
+    admin, shell, comandos): resta los valores `anterior` = (cuenta_id, debe,
+    haber) si el movimiento ya existía y suma los actuales.
+    Lo llama la señal post_save de Movimiento.
+    """
+    totales = defaultdict(lambda: [Decimal('0.00'), Decimal('0.00'), 0])
+    if anterior is not None:
+        cuenta_id, debe, haber = anterior
+        total = totales[cuenta_id]
+        total[0] -= debe
+        total[1] -= haber
+        total[2] -= 1
+    total = totales[movimiento.cuenta_id]
+    total[0] += _decimal(movimiento.debe)
+    total[1] += _decimal(movimiento.haber)
+    total[2] += 1
+
+    # Un save() sin cambios de cuenta ni montos no escribe nada
+    _aplicar({cuenta_id: total for cuenta_id, total in totales.items() if any(total)}, signo=1)
+
+
+def descontar_movimiento(movimiento):
+    """Resta de SaldoCuenta un movimiento eliminado individualmente (señal post_delete)."""
+    _aplicar({movimiento.cuenta_id: [_decimal(movimiento.debe), _decimal(movimiento.haber), 1]}, signo=-1)
+
+
+def descontar_asiento(asiento):
+    """
+    Resta de SaldoCuenta los movimientos de un asiento que va a eliminarse.
+    Agrupa por cuenta en una sola consulta.
+    """
+    filas = (
+        Movimiento.objects.filter(asiento=asiento)
+        .values('cuenta_id')
+        .annotate(debe=Sum('debe'), haber=Sum('haber'), cantidad=Count('id'))
+    )
+    totales = {
+        fila['cuenta_id']: [fila['debe'], fila['haber'], fila['cantidad']]
+        for fila in filas
+    }
+
+    _aplicar(totales, signo=-1)
+
+
+def _aplicar(totales, signo):
+    if not totales:
+        return
+
+    # Orden fijo de cuentas para que escrituras concurrentes no se bloqueen mutuamente
+    cuentas = sorted(totales)
+
+    with transaction.atomic():
+        SaldoCuenta.objects.bulk_create(
+            [SaldoCuenta(cuenta_id=cuenta_id) for cuenta_id in cuentas],
+            ignore_conflicts=True
+        )
+        for cuenta_id in cuentas:
+            debe, haber, cantidad = totales[cuenta_id]
+            SaldoCuenta.objects.filter(cuenta_id=cuenta_id).update(
+                total_debe=F('total_debe') + signo * debe,
+                total_haber=F('total_haber') + signo * haber,
+                cantidad_movimientos=F('cantidad_movimientos') + signo * cantidad,
+            )
+        # La versión del libro cambia una vez, al confirmarse la transacción
+        invalidar_libro()
@@ -1,14 +1,62 @@
 # contabilidad/serializers.py
 from rest_framework import serializers
-from .models import CuentaContable, AsientoContable, Movimiento
+from .models import CuentaContable, AsientoContable, Movimiento, ReglaContabilizacion
+from .contabilizacion import registrar_asientos
+from .plan_cuentas import cuentas_por_ids
 
 class CuentaContableSerializer(serializers.ModelSerializer):
     class Meta:
         model = CuentaContable
         fields = '__all__'
 
+class ReglaContabilizacionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReglaContabilizacion
+        fields = ['id', 'tipo_documento', 'condicion', 'cuenta', 'lado', 'importe', 'orden', 'activa']
+
+def precargar_cuentas(asientos_data):
+    """
+    Resuelve desde el plan de cuentas en memoria todas las cuentas
+    referenciadas por los movimientos de uno o varios asientos (datos sin validar).
+    Devuelve un dict id → CuentaContable para `context['cuentas']`.
+    """
+    ids = set()
+    for asiento in asientos_data:
+        if not isinstance(asiento, dict) or not isinstance(asiento.get('movimientos'), list):
+            continue
+        for movimiento in asiento['movimientos']:
+            if not isinstance(movimiento, dict):
+                continue
+            try:
+                ids.add(int(movimiento.get('cuenta')))
+            except (TypeError, ValueError):
+                pass
+    return cuentas_por_ids(ids)
+
+
+class CuentaPrecargadaField(serializers.PrimaryKeyRelatedField):
+    """
+    Resuelve la cuenta desde `context['cuentas']` cuando el llamador las
+    precargó con `precargar_cuentas()`; si no, consulta la base de datos.
+    """
+    def to_internal_value(self, data):
+        cuentas = self.context.get('cuentas')
+        if cuentas is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return cuentas[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
 # contabilidad/serializers.py
 class MovimientoSerializer(serializers.ModelSerializer):
+    cuenta = CuentaPrecargadaField(queryset=CuentaContable.objects.all())
+
     class Meta:
         model = Movimiento
         fields = ['cuenta', 'debe', 'haber']
@@ -49,9 +97,4 @@ class AsientoContableSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         user = self.context['request'].user
-        validated_data['usuario'] = user
-        movimientos_data = validated_data.pop('movimientos')
-        asiento = AsientoContable.objects.create(**validated_data)
-        for movimiento in movimientos_data:
-            Movimiento.objects.create(asiento=asiento, **movimiento)
-        return asiento
\ No newline at end of file
+        return registrar_asientos([validated_data], usuario=user)[0]
\ No newline at end of file
@@ -0,0 +1,91 @@
+# contabilidad/signals.py
+from django.core.signals import request_started
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import AsientoContable, CuentaContable, Movimiento, ReglaContabilizacion
+from .cache_reportes import invalidar_libro
+from .saldos import ajustar_movimiento, descontar_asiento, descontar_movimiento
+from .plan_cuentas import invalidar_plan_cuentas
+from .contabilizacion import invalidar_reglas
+from .versiones import verificar_caches
+
+@receiver(pre_delete, sender=AsientoContable)
+def descontar_saldos_asiento(sender, instance, **kwargs):
+    """
+    Al eliminar un asiento, sus movimientos se borran en cascada:
+    se descuentan de SaldoCuenta antes de que desaparezcan.
+    """
+    descontar_asiento(instance)
+
+
+@receiver(pre_save, sender=Movimiento)
+def copiar_fecha_asiento(sender, instance, **kwargs):
+    instance.fecha = instance.asiento.fecha
+
+
+@receiver(post_save, sender=AsientoContable)
+def actualizar_fecha_movimientos(sender, instance, created, **kwargs):
+    # Movimiento.fecha es una copia de la fecha del asiento
+    if not created:
+        instance.movimientos.exclude(fecha=instance.fecha).update(fecha=instance.fecha)
+
+
+@receiver(pre_save, sender=Movimiento)
+def recordar_movimiento_anterior(sender, instance, **kwargs):
+    # Cuenta y montos antes de la edición, para ajustar SaldoCuenta después de guardar
+    instance._saldo_anterior = None
+    if instance.pk is not None:
+        instance._saldo_anterior = (
+            Movimiento.objects.filter(pk=instance.pk).values_list('cuenta_id', 'debe', 'haber').first()
+        )
+
+
+@receiver(post_save, sender=Movimiento)
+def ajustar_saldos_movimiento(sender, instance, **kwargs):
+    """
+    Movimientos creados o editados uno por uno (admin, shell, comandos):
+    SaldoCuenta resta los valores anteriores y suma los nuevos. Los creados
+    con bulk_create pasan por registrar_movimientos().
+    """
+    ajustar_movimiento(instance, getattr(instance, '_saldo_anterior', None))
+
+
+@receiver(post_delete, sender=Movimiento)
+def descontar_saldos_movimiento(sender, instance, origin=None, **kwargs):
+    # Los movimientos de un asiento eliminado ya se descontaron en su pre_delete
+    if isinstance(origin, AsientoContable) or getattr(origin, 'model', None) is AsientoContable:
+        return
+    descontar_movimiento(instance)
+
+
+@receiver(post_save, sender=AsientoContable)
+@receiver(post_save, sender=Movimiento)
+@receiver(post_delete, sender=Movimiento)
+def invalidar_cache_reportes(sender, **kwargs):
+    """
+    Ediciones que no cambian SaldoCuenta (ej. la fecha de un asiento o el
+    asiento de un movimiento) también cambian la versión del libro. Las altas
+    y bajas masivas la cambian en saldos._aplicar().
+    """
+    invalidar_libro()
+
+
+@receiver(post_save, sender=CuentaContable)
+@receiver(post_delete, sender=CuentaContable)
+def invalidar_cache_plan(sender, **kwargs):
+    """
+    Cualquier alta, cambio o baja de cuentas invalida el plan en memoria de
+    todos los workers, y las reglas compiladas (que guardan códigos de cuenta).
+    """
+    invalidar_plan_cuentas()
+    invalidar_reglas()
+
+
+@receiver(post_save, sender=ReglaContabilizacion)
+@receiver(post_delete, sender=ReglaContabilizacion)
+def invalidar_cache_reglas(sender, **kwargs):
+    invalidar_reglas()
+
+
+# Cada petición vuelve a comprobar (con una consulta, solo si se usan) las versiones de las cachés
+request_started.connect(verificar_caches, dispatch_uid='contabilidad.verificar_caches')
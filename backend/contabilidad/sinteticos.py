@@ -0,0 +1,279 @@
+# contabilidad/sinteticos.py
+import logging
+import math
+import random
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from compras.models import Proveedor, Compra
+from ventas.models import Cliente, Venta
+from .cache_reportes import invalidar_documentos
+from .carga_masiva import copiar_filas, reiniciar_secuencias, FILAS_POR_BLOQUE
+from .contabilizacion import asiento_documento
+from .models import AsientoContable, Movimiento
+from .plan_cuentas import plan_cuentas
+from .saldos import registrar_movimientos
+
+logger = logging.getLogger(__name__)
+
+CENTIMO = Decimal('0.01')
+
+# Fin del periodo por defecto: fijo, para que la misma semilla genere siempre las mismas fechas
+HASTA_PREDETERMINADO = date(2025, 12, 31)
+
+Linea = namedtuple('Linea', 'cuenta_id debe haber')
+
+# Alícuotas de IVA: (peso, tasa, campo base imponible, campo impuesto)
+ALICUOTAS = [
+    (85, Decimal('0.16'), 'base_imponible_general', 'impuesto_general'),
+    (10, Decimal('0.08'), 'base_imponible_reducida', 'impuesto_reducido'),
+    (5, Decimal('0.22'), 'base_imponible_adicional', 'impuesto_adicional'),
+]
+
+# Actividad relativa por día de la semana (lunes = 0) y por mes
+PESO_DIA_SEMANA = [1.0, 1.0, 1.0, 1.0, 1.1, 0.4, 0.15]
+PESO_MES = {1: 0.8, 7: 0.9, 8: 0.9, 11: 1.2, 12: 1.5}
+
+NOMBRES = ['Inversiones', 'Distribuidora', 'Comercial', 'Servicios', 'Suministros', 'Tecnología', 'Alimentos']
+APELLIDOS = ['Andina', 'del Centro', 'Caribe', 'Oriente', 'Los Llanos', 'Guayana', 'Zulia', 'Falcón', 'Lara']
+FORMAS = ['C.A.', 'S.A.', 'S.R.L.', '2000 C.A.', 'Hermanos C.A.']
+CONCEPTOS = [
+    'Pago de nómina', 'Depósito bancario', 'Pago a proveedor', 'Cobro a cliente',
+    'Gastos de oficina', 'Comisiones bancarias', 'Depreciación del mes', 'Aporte de capital',
+    'Retenciones del periodo', 'Reclasificación de cuentas',
+]
+
+
+class _Tabla:
+    """Filas pendientes de un modelo, con ids asignados de antemano."""
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.campos = list(modelo._meta.concrete_fields)
+        ahora = timezone.now()
+        self.defectos = [
+            (campo.attname, ahora if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+             else campo.get_default())
+            for campo in self.campos
+        ]
+        self.siguiente_id = (modelo.objects.aggregate(maximo=Max('id'))['maximo'] or 0) + 1
+        self.filas = []
+        self.total = 0
+
+    def agregar(self, **valores):
+        valores['id'] = self.siguiente_id
+        self.siguiente_id += 1
+        self.filas.append([valores.get(nombre, defecto) for nombre, defecto in self.defectos])
+        return valores['id']
+
+    def agregar_instancia(self, instancia):
+        """Fila con los valores de una instancia sin guardar (sus fechas automáticas se fijan aquí)."""
+        return self.agregar(**{
+            campo.attname: getattr(instancia, campo.attname) for campo in self.campos
+            if not (campo.primary_key or getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False))
+        })
+
+    def volcar(self):
+        copiar_filas(self.modelo, self.campos, self.filas, actualizar=False)
+        self.total += len(self.filas)
+        self.filas = []
+
+
+class GeneradorSintetico:
+    """
+    Genera clientes, proveedores, ventas y compras contabilizadas y asientos
+    manuales con distribuciones realistas:
+    - Fechas: más actividad en días hábiles y en fin de año, con crecimiento
+      a lo largo del periodo; los ids crecen con la fecha.
+    - Clientes, proveedores y cuentas: popularidad tipo Zipf (pocos concentran
+      la mayoría de los documentos o movimientos).
+    - Importes: distribución log-normal (muchos montos pequeños, pocos grandes).
+
+    Con la misma semilla y los mismos parámetros los datos son idénticos.
+    Las filas se escriben por bloques con copiar_filas() (COPY en PostgreSQL);
+    el avance va a `informar(mensaje)` (por defecto, al log).
+    """
+    def __init__(self, semilla=42, desde=None, hasta=None, tamano=FILAS_POR_BLOQUE, usuario=None,
+                 informar=logger.info):
+        self.aleatorio = random.Random(semilla)
+        self.hasta = hasta or HASTA_PREDETERMINADO
+        self.desde = desde or self.hasta - timedelta(days=3 * 365)
+        self.tamano = tamano
+        self.usuario = usuario
+        self.informar = informar
+        self.tablas = {
+            modelo: _Tabla(modelo)
+            for modelo in (Cliente, Proveedor, AsientoContable, Movimiento, Venta, Compra)
+        }
+        self.lineas = []
+
+        dias = [self.desde + timedelta(days=i) for i in range((self.hasta - self.desde).days + 1)]
+        self.dias = dias
+        self.pesos_dias = list(accumulate(
+            PESO_DIA_SEMANA[dia.weekday()] * PESO_MES.get(dia.month, 1.0) * (0.8 + 0.4 * i / len(dias))
+            for i, dia in enumerate(dias)
+        ))
+
+    # === Distribuciones ===
+    def _fechas(self, cantidad):
+        return sorted(self.aleatorio.choices(self.dias, cum_weights=self.pesos_dias, k=cantidad))
+
+    def _zipf(self, elementos, exponente=1.0):
+        """Elementos en orden aleatorio con pesos acumulados 1/rango^exponente."""
+        elementos = list(elementos)
+        self.aleatorio.shuffle(elementos)
+        return elementos, list(accumulate(1 / (i + 1) ** exponente for i in range(len(elementos))))
+
+    def _monto(self, mediana, dispersion=1.0):
+        valor = self.aleatorio.lognormvariate(math.log(mediana), dispersion)
+        return max(Decimal(f'{valor:.2f}'), CENTIMO)
+
+    @staticmethod
+    def _repartir(total, partes):
+        """
+        Reparte `total` según `partes` (porcentajes que suman 100) con un
+        céntimo como mínimo por parte; la última recibe el redondeo.
+        """
+        resto = int(total / CENTIMO) - len(partes)
+        centimos = [1 + resto * parte // 100 for parte in partes]
+        centimos[-1] += resto - sum(resto * parte // 100 for parte in partes)
+        return [cantidad * CENTIMO for cantidad in centimos]
+
+    def _importes(self, mediana):
+        """Campos de base, IVA y subtotal de un documento con una sola alícuota."""
+        _, tasa, campo_base, campo_impuesto = self.aleatorio.choices(
+            ALICUOTAS, weights=[alicuota[0] for alicuota in ALICUOTAS]
+        )[0]
+        base = self._monto(mediana)
+        impuesto = (base * tasa).quantize(CENTIMO)
+        return base, impuesto, {'subtotal': base, campo_base: base, campo_impuesto: impuesto}
+
+    def _razon_social(self):
+        return (f"{self.aleatorio.choice(NOMBRES)} {self.aleatorio.choice(APELLIDOS)} "
+                f"{self.aleatorio.choice(FORMAS)}")
+
+    # === Escritura por bloques ===
+    def _volcar(self, forzar=False):
+        if not forzar and len(self.tablas[Movimiento].filas) < self.tamano:
+            return
+        # Orden de las claves foráneas: asientos antes que movimientos y documentos
+        with transaction.atomic():
+            for tabla in self.tablas.values():
+                tabla.volcar()
+            registrar_movimientos(self.lineas)
+        self.lineas = []
+        self.informar(
+            f"📦 {self.tablas[AsientoContable].total} asientos | "
+            f"{self.tablas[Movimiento].total} movimientos | "
+            f"{self.tablas[Venta].total} ventas | {self.tablas[Compra].total} compras"
+        )
+
+    def _contabilizar(self, documento):
+        asiento = asiento_documento(documento)
+        documento.asiento_id = self._asiento(asiento['fecha'], asiento['descripcion'], [
+            (movimiento['cuenta'].id, movimiento['debe'], movimiento['haber'])
+            for movimiento in asiento['movimientos']
+        ], asiento['origen_tipo'], asiento['origen_id'])
+
+    def _asiento(self, fecha, descripcion, lineas, origen_tipo='', origen_id=None):
+        asiento_id = self.tablas[AsientoContable].agregar(
+            fecha=fecha, descripcion=descripcion, usuario_id=self.usuario_id,
+            origen_tipo=origen_tipo, origen_id=origen_id
+        )
+        for cuenta_id, debe, haber in lineas:
+            self.tablas[Movimiento].agregar(
+                asiento_id=asiento_id, cuenta_id=cuenta_id, debe=debe, haber=haber, fecha=fecha
+            )
+            self.lineas.append(Linea(cuenta_id, debe, haber))
+        return asiento_id
+
+    # === Generación ===
+    def generar(self, clientes, proveedores, ventas, compras, movimientos):
+        self.usuario_id = self.usuario.pk if self.usuario else None
+
+        # Contrapartes (se guardan también en memoria para las descripciones)
+        lista_clientes = []
+        for _ in range(clientes):
+            tabla = self.tablas[Cliente]
+            cliente = Cliente(id=tabla.siguiente_id, rif=f"J-{tabla.siguiente_id:08d}-0", nombre=self._razon_social())
+            tabla.agregar(rif=cliente.rif, nombre=cliente.nombre, direccion='Caracas')
+            lista_clientes.append(cliente)
+        lista_proveedores = []
+        for _ in range(proveedores):
+            tabla = self.tablas[Proveedor]
+            proveedor = Proveedor(id=tabla.siguiente_id, rif=f"J-{tabla.siguiente_id:08d}-1", nombre=self._razon_social())
+            tabla.agregar(rif=proveedor.rif, nombre=proveedor.nombre, tipo_proveedor='PJ')
+            lista_proveedores.append(proveedor)
+        if (ventas and not lista_clientes) or (compras and not lista_proveedores):
+            raise ValueError("Se necesita al menos un cliente y un proveedor para generar documentos")
+
+        # Ventas: 60 % de contado, 40 % a crédito
+        if ventas:
+            clientes_zipf, pesos = self._zipf(lista_clientes)
+            for fecha in self._fechas(ventas):
+                cliente = self.aleatorio.choices(clientes_zipf, cum_weights=pesos)[0]
+                base, impuesto, campos = self._importes(mediana=400)
+                venta = Venta(
+                    id=self.tablas[Venta].siguiente_id, cliente=cliente, fecha=fecha,
+                    numero_factura=f"SV-{self.tablas[Venta].siguiente_id:09d}", total=base + impuesto,
+                    estado='emitida', usuario=self.usuario,
+                    condicion_pago='contado' if self.aleatorio.random() < 0.6 else 'credito', **campos
+                )
+                self._contabilizar(venta)
+                self.tablas[Venta].agregar_instancia(venta)
+                self._volcar()
+
+        # Compras: 10 % importaciones
+        if compras:
+            proveedores_zipf, pesos = self._zipf(lista_proveedores, exponente=1.2)
+            for fecha in self._fechas(compras):
+                proveedor = self.aleatorio.choices(proveedores_zipf, cum_weights=pesos)[0]
+                base, impuesto, campos = self._importes(mediana=900)
+                numero = self.tablas[Compra].siguiente_id
+                compra = Compra(
+                    id=numero, proveedor=proveedor, fecha=fecha, numero_factura=f"SC-{numero:09d}",
+                    total_compra=base + impuesto, usuario=self.usuario,
+                    planilla_importacion=f"PI-{numero:09d}" if self.aleatorio.random() < 0.1 else None,
+                    **campos
+                )
+                self._contabilizar(compra)
+                self.tablas[Compra].agregar_instancia(compra)
+                self._volcar()
+
+        # Asientos manuales hasta completar los movimientos pedidos (2 a 6 líneas cada uno)
+        faltantes = movimientos - self.tablas[Movimiento].total - len(self.tablas[Movimiento].filas)
+        if faltantes > 0:
+            # Ordenadas por código: el orden del plan en memoria no depende de la semilla
+            cuentas = [cuenta.id for codigo, cuenta in sorted(plan_cuentas().por_codigo.items()) if len(codigo) == 4]
+            cuentas_zipf, pesos = self._zipf(cuentas, exponente=0.9)
+            cantidades = []
+            while faltantes >= 2:
+                lineas = min(self.aleatorio.randint(2, 6), faltantes)
+                if faltantes - lineas == 1:
+                    lineas += 1  # Sin asientos de una sola línea al final
+                cantidades.append(lineas)
+                faltantes -= lineas
+
+            for fecha, lineas in zip(self._fechas(len(cantidades)), cantidades):
+                seleccion = self.aleatorio.choices(cuentas_zipf, cum_weights=pesos, k=lineas)
+                deudoras = self.aleatorio.randint(1, lineas - 1)
+                montos = [self._monto(mediana=250, dispersion=1.2) for _ in range(deudoras)]
+                cortes = sorted(self.aleatorio.sample(range(1, 100), lineas - deudoras - 1))
+                partes = [b - a for a, b in zip([0] + cortes, cortes + [100])]
+                # Al menos un céntimo por línea acreedora
+                montos[0] += max(len(partes) * CENTIMO - sum(montos), 0)
+                creditos = self._repartir(sum(montos), partes)
+                self._asiento(fecha, self.aleatorio.choice(CONCEPTOS), [
+                    (cuenta_id, debe, Decimal('0.00')) for cuenta_id, debe in zip(seleccion, montos)
+                ] + [
+                    (cuenta_id, Decimal('0.00'), haber) for cuenta_id, haber in zip(seleccion[deudoras:], creditos)
+                ])
+                self._volcar()
+
+        self._volcar(forzar=True)
+        reiniciar_secuencias(self.tablas)
+        invalidar_documentos()
+        return {modelo._meta.verbose_name_plural: tabla.total for modelo, tabla in self.tablas.items()}
@@ -0,0 +1,162 @@
+# contabilidad/tareas.py
+import os
+import socket
+import threading
+from datetime import timedelta
+from django.db import connections, transaction
+from django.db.models import Q, TextField, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from .models import TareaImportacion, TareaReparacion
+from .cola import cola_asincrona
+from .importacion import Importador, leer_filas
+from .reparacion import reparar_documentos, TIPOS_DOCUMENTO
+
+# Segundos sin latido tras los que una tarea se da por abandonada
+LATIDO_MAXIMO = 300
+
+
+class Seguimiento:
+    """Avance y log de una tarea en curso; cada actualización renueva su latido."""
+
+    def __init__(self, tarea):
+        self.tareas = type(tarea).objects.filter(id=tarea.id)
+        self.lineas = []
+
+    def actualizar(self, **campos):
+        self.tareas.update(latido_en=timezone.now(), **campos)
+
+    def informar(self, mensaje):
+        self.lineas.append(mensaje)
+        self.actualizar(log='\n'.join(self.lineas))
+
+
+# === Tareas ===
+def iniciar_tarea_reparacion(usuario=None, tipos=TIPOS_DOCUMENTO):
+    """Reparación de documentos sin asiento (contabilidad/reparacion.py)."""
+    return _iniciar(TareaReparacion.objects.create(usuario=usuario, tipos=','.join(tipos)))
+
+
+def iniciar_tarea_importacion(tipo, archivo, nombre_archivo, usuario=None):
+    """
+    Importación de un archivo ya guardado en disco (`archivo`), que la tarea
+    elimina al terminar.
+    """
+    return _iniciar(TareaImportacion.objects.create(
+        tipo=tipo, archivo=archivo, nombre_archivo=nombre_archivo, usuario=usuario
+    ))
+
+
+def _reparar(tarea, seguimiento):
+    resumen = reparar_documentos(
+        tarea.tipos.split(','),
+        informar=seguimiento.informar,
+        al_iniciar=lambda total: seguimiento.actualizar(total=total),
+        avance=lambda procesados: seguimiento.actualizar(procesados=procesados),
+    )
+    seguimiento.informar(f"✅ Documentos reparados: {sum(datos['reparados'] for datos in resumen.values())}")
+
+
+def _importar(tarea, seguimiento):
+    importador = Importador(tarea.tipo, usuario=tarea.usuario)
+    try:
+        with open(tarea.archivo, 'rb') as archivo:
+            resumen = importador.importar(
+                leer_filas(archivo, tarea.nombre_archivo),
+                lambda resumen: seguimiento.actualizar(procesados=resumen['filas']),
+            )
+    finally:
+        if os.path.exists(tarea.archivo):
+            os.remove(tarea.archivo)
+    seguimiento.actualizar(total=resumen['filas'], resultado={**resumen, 'detalle_errores': importador.errores})
+    seguimiento.informar(
+        f"🚀 Documentos importados: {resumen['creados']} | omitidos: {resumen['omitidos']} | "
+        f"filas con error: {resumen['errores']}"
+    )
+
+
+EJECUTORES = {
+    TareaReparacion: _reparar,
+    TareaImportacion: _importar,
+}
+
+
+# === Ejecución ===
+def _iniciar(tarea):
+    """
+    Con CONTABILIDAD_COLA_ASINCRONA la tarea queda pendiente para el worker
+    `procesar_cola_contable`; si no, la ejecuta un hilo al confirmarse la
+    transacción.
+    """
+    if not cola_asincrona():
+        hilo = threading.Thread(target=_ejecutar_en_hilo, args=(type(tarea), tarea.id), daemon=True)
+        transaction.on_commit(hilo.start)
+    return tarea
+
+
+def _ejecutar_en_hilo(modelo, tarea_id):
+    try:
+        ejecutar_tarea(modelo, tarea_id)
+    finally:
+        connections.close_all()
+
+
+def ejecutar_tarea(modelo, tarea_id):
+    """
+    Ejecuta una tarea pendiente. La tarea se reclama con un UPDATE
+    condicional: si otro proceso ya la tomó, no hace nada y devuelve False.
+    """
+    reclamada = modelo.objects.filter(id=tarea_id, estado='pendiente').update(
+        estado='en_proceso', servidor=socket.gethostname(), pid=os.getpid(), latido_en=timezone.now()
+    )
+    if not reclamada:
+        return False
+
+    tarea = modelo.objects.select_related('usuario').get(id=tarea_id)
+    seguimiento = Seguimiento(tarea)
+    try:
+        EJECUTORES[modelo](tarea, seguimiento)
+        seguimiento.actualizar(estado='completada', finalizado_en=timezone.now())
+    except Exception as error:
+        seguimiento.informar(f"❌ {type(error).__name__}: {error}")
+        seguimiento.actualizar(estado='error', finalizado_en=timezone.now())
+    return True
+
+
+def marcar_tareas_abandonadas():
+    """
+    Pasa a 'error' las tareas cuyo proceso dejó de dar señales (reinicio
+    del worker o del servidor web) durante más de LATIDO_MAXIMO segundos.
+    Sin cola asíncrona, también las pendientes que ningún hilo llegó a tomar.
+    Devuelve cuántas marcó.
+    """
+    limite = timezone.now() - timedelta(seconds=LATIDO_MAXIMO)
+    abandonadas = Q(estado='en_proceso', latido_en__lt=limite)
+    if not cola_asincrona():
+        abandonadas |= Q(estado='pendiente', creado_en__lt=limite)
+    return sum(
+        modelo.objects.filter(abandonadas).update(
+            estado='error',
+            finalizado_en=timezone.now(),
+            log=Concat(
+                'log',
+                Value(f"\n❌ Tarea abandonada: sin actividad durante más de {LATIDO_MAXIMO}s"),
+                output_field=TextField(),
+            ),
+        )
+        for modelo in EJECUTORES
+    )
+
+
+def procesar_tareas_pendientes():
+    """
+    Ejecuta, de la más antigua a la más reciente, las tareas pendientes.
+    La usa el worker de la cola asíncrona. Devuelve cuántas ejecutó.
+    """
+    marcar_tareas_abandonadas()
+    ejecutadas = 0
+    for modelo in EJECUTORES:
+        pendientes = modelo.objects.filter(estado='pendiente').order_by('creado_en', 'id')
+        for tarea_id in pendientes.values_list('id', flat=True):
+            ejecutadas += ejecutar_tarea(modelo, tarea_id)
+    return ejecutadas
@@ -1,3 +1,1299 @@
-from django.test import TestCase
+# contabilidad/tests.py
+import base64
+import json
+import os
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from unittest import mock
+from datetime import date, timedelta
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+from django.contrib.auth import get_user_model
+from io import BytesIO, StringIO
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.http import QueryDict
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import Count, F, Q, QuerySet, Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from sistema_contable.middleware import huella_sql
+from compras.models import Compra, Proveedor
+from ventas.models import Cliente, Venta
+from .benchmarks import clasificar_error, medir_escrituras, medir_reporte
+from .cola import MAX_INTENTOS, procesar_lote, reintentar_fallidos
+from .cache_reportes import (
+    BloqueoReporte, VERSION_LIBRO, agrupar_peticiones, clave_reporte, version_reportes,
+)
+from .contabilizacion import registrar_asientos
+from .importacion import Importador
+from .ledger import CERO, movimientos_mayor, saldos_anteriores, saldos_cuentas
+from .models import (
+    AsientoContable, CuentaContable, Movimiento, SaldoCuenta, TareaImportacion, TareaReparacion,
+    TrabajoContabilizacion,
+)
+from .plan_cuentas import plan_cuentas
+from .serializers import precargar_cuentas
+from .sinteticos import GeneradorSintetico, HASTA_PREDETERMINADO
+from .versiones import _caches, incrementar_version, version_actual, verificar_caches
+from .tareas import LATIDO_MAXIMO, ejecutar_tarea, procesar_tareas_pendientes
+from .views import AsientoContableViewSet
 
-# Create your tests here.
+# Cuentas mínimas para las reglas de contabilización predeterminadas
+CUENTAS_PRUEBA = [
+    ('1111', 'EFECTIVO', 'activo', '1111'),
+    ('1122', 'CUENTAS POR COBRAR CLIENTES', 'activo', '1122'),
+    ('2110', 'EXP MERCANTILES', 'pasivo', '2110'),
+    ('2111', 'IVA DEBITO FISCAL', 'pasivo', '211'),
+    ('2120', 'CUENTAS POR PAGAR', 'pasivo', '2120'),
+    ('3110', 'CAPITAL SOCIAL', 'patrimonio', '3110'),
+    ('4110', 'INGRESOS POR SERVICIOS', 'ingreso', '4110'),
+    ('5120', 'COMPRAS NETAS NACIONALES', 'gasto', '5120'),
+    ('5130', 'COMPRAS NETAS EN EL EXTERIOR', 'gasto', '5130'),
+    ('6120', 'GASTOS DE OFICINA Y VENTAS', 'gasto', '6120'),
+]
+
+
+def crear_cuentas():
+    return {
+        codigo: CuentaContable.objects.create(
+            codigo=codigo, nombre=nombre, tipo=tipo, clasificacion=clasificacion, nivel=len(codigo)
+        )
+        for codigo, nombre, tipo, clasificacion in CUENTAS_PRUEBA
+    }
+
+
+def reiniciar_caches():
+    # Las cachés del proceso sobreviven a la reversión de cada prueba (y al
+    # vaciado de la base): no deben conservar un plan o reglas de otra prueba
+    for cache in _caches:
+        cache._version = None
+
+
+def cursor(valores, reverso=False):
+    datos = json.dumps({'v': valores, 'r': int(reverso)})
+    return base64.urlsafe_b64encode(datos.encode()).decode()
+
+
+class PruebaContable(TestCase):
+    """Plan de cuentas mínimo y un cliente de la API autenticado como staff."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_superuser('pruebas@localhost', 'Pruebas', 'Sistema')
+        cls.cuentas = crear_cuentas()
+
+    def setUp(self):
+        reiniciar_caches()
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(user=self.usuario)
+
+    def asiento(self, fecha, monto, debe='1111', haber='4110', descripcion='Prueba'):
+        respuesta = self.cliente.post('/api/contabilidad/asientos/', {
+            'fecha': str(fecha),
+            'descripcion': descripcion,
+            'movimientos': [
+                {'cuenta': self.cuentas[debe].id, 'debe': str(monto), 'haber': '0'},
+                {'cuenta': self.cuentas[haber].id, 'debe': '0', 'haber': str(monto)},
+            ],
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        return AsientoContable.objects.get(pk=respuesta.data['id'])
+
+
+# === Saldos por cuenta ===
+class SaldoCuentaTests(PruebaContable):
+
+    def totales(self):
+        """SaldoCuenta almacenado y real (desde los movimientos), por código de cuenta."""
+        almacenados = {
+            saldo.cuenta.codigo: (saldo.total_debe, saldo.total_haber, saldo.cantidad_movimientos)
+            for saldo in SaldoCuenta.objects.select_related('cuenta')
+            if saldo.cantidad_movimientos or saldo.total_debe or saldo.total_haber
+        }
+        reales = {
+            fila['cuenta__codigo']: (fila['debe'], fila['haber'], fila['cantidad'])
+            for fila in Movimiento.objects.values('cuenta__codigo').annotate(
+                debe=Sum('debe'), haber=Sum('haber'), cantidad=Count('id')
+            )
+        }
+        return almacenados, reales
+
+    def assertSaldosAlDia(self):
+        almacenados, reales = self.totales()
+        self.assertEqual(almacenados, reales)
+
+    def test_asientos_de_la_api_suman_a_los_saldos(self):
+        self.asiento(date(2025, 1, 2), 10)
+        self.asiento(date(2025, 1, 3), 5, debe='1122')
+        self.assertEqual(
+            SaldoCuenta.objects.get(cuenta=self.cuentas['4110']).total_haber, Decimal('15.00')
+        )
+        self.assertSaldosAlDia()
+
+    def test_movimientos_guardados_uno_por_uno(self):
+        asiento = self.asiento(date(2025, 1, 2), 10)
+        Movimiento.objects.create(asiento=asiento, cuenta=self.cuentas['1122'], debe=3, haber=0)
+        self.assertSaldosAlDia()
+
+        # Cambio de monto y de cuenta en una fila existente
+        movimiento = asiento.movimientos.get(cuenta=self.cuentas['1111'])
+        movimiento.debe = Decimal('7.50')
+        movimiento.cuenta = self.cuentas['1122']
+        movimiento.save()
+        self.assertSaldosAlDia()
+        self.assertFalse(SaldoCuenta.objects.get(cuenta=self.cuentas['1111']).cantidad_movimientos)
+
+        movimiento.delete()
+        self.assertSaldosAlDia()
+
+    def test_eliminar_un_asiento_descuenta_sus_movimientos_una_vez(self):
+        conservado = self.asiento(date(2025, 1, 2), 10)
+        self.asiento(date(2025, 1, 3), 20).delete()
+        AsientoContable.objects.exclude(pk=conservado.pk).delete()
+        self.assertSaldosAlDia()
+        self.assertEqual(SaldoCuenta.objects.get(cuenta=self.cuentas['1111']).total_debe, Decimal('10.00'))
+
+    def test_recalcular_saldos_informa_y_corrige_diferencias(self):
+        self.asiento(date(2025, 1, 2), 10)
+        # update() no emite señales: SaldoCuenta queda desfasado
+        Movimiento.objects.filter(cuenta=self.cuentas['1111']).update(debe=12)
+        Movimiento.objects.filter(cuenta=self.cuentas['4110']).update(haber=12)
+
+        salida = StringIO()
+        call_command('recalcular_saldos', '--solo-verificar', stdout=salida)
+        self.assertIn('Cuenta 1111', salida.getvalue())
+        self.assertIn('Cuentas con diferencias: 2', salida.getvalue())
+        almacenados, reales = self.totales()
+        self.assertNotEqual(almacenados, reales)
+
+        call_command('recalcular_saldos', stdout=StringIO())
+        self.assertSaldosAlDia()
+        salida = StringIO()
+        call_command('recalcular_saldos', '--solo-verificar', stdout=salida)
+        self.assertIn('coinciden', salida.getvalue())
+
+
+# === Reportes de saldos ===
+class ReportesSaldosTests(PruebaContable):
+    # Reporte, parámetros y consultas esperadas: versión de los reportes y
+    # saldos de todas las cuentas; con ?nivel=, la versión del plan en memoria
+    REPORTES = [
+        ('balance-comprobacion', {}, 2),
+        ('balance-comprobacion', {'nivel': 2}, 3),
+        ('balance-comprobacion', {'desde': '2025-02-01', 'hasta': '2025-02-28'}, 2),
+        ('balance-general', {}, 2),
+        ('balance-general', {'nivel': 2}, 3),
+        ('estado-resultados', {'desde': '2025-01-01'}, 2),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Cuenta de orden sobre el grupo '1' y una cuenta correctora (pasivo)
+        # que queda primera en la rama '11' al ordenar por clasificación
+        cls.cuentas['1'] = CuentaContable.objects.create(
+            codigo='1', nombre='ACTIVO', tipo='activo', clasificacion='1', nivel=1
+        )
+        cls.cuentas['1119'] = CuentaContable.objects.create(
+            codigo='1119', nombre='SOBREGIROS', tipo='pasivo', clasificacion='111', nivel=4
+        )
+        movimientos = [
+            (date(2025, 1, 5), '1111', '3110', 1000),
+            (date(2025, 2, 10), '1122', '4110', 300),
+            (date(2025, 2, 20), '5120', '2120', 200),
+            (date(2025, 3, 1), '1111', '1119', 50),
+            (date(2025, 3, 15), '6120', '1111', 80),
+        ]
+        registrar_asientos([
+            {
+                'fecha': fecha,
+                'descripcion': f'{debe}/{haber}',
+                'movimientos': [
+                    {'cuenta': cls.cuentas[debe], 'debe': Decimal(monto), 'haber': CERO},
+                    {'cuenta': cls.cuentas[haber], 'debe': CERO, 'haber': Decimal(monto)},
+                ],
+            }
+            for fecha, debe, haber, monto in movimientos
+        ], usuario=cls.usuario)
+
+    def setUp(self):
+        super().setUp()
+        caches['reportes'].clear()
+
+    def por_codigo(self, filas):
+        return {fila['codigo']: fila for fila in filas}
+
+    def test_saldos_cuentas_acumulados_y_por_periodo(self):
+        saldos = self.por_codigo(saldos_cuentas())
+        self.assertEqual(len(saldos), len(self.cuentas))
+        self.assertEqual(saldos['1111']['saldo'], Decimal('970.00'))
+        self.assertEqual(saldos['1119']['saldo'], Decimal('50.00'))
+        self.assertEqual(saldos['4110']['saldo'], Decimal('300.00'))
+        self.assertEqual(saldos['6120']['saldo'], Decimal('80.00'))
+        self.assertEqual(saldos['2110']['saldo'], CERO)
+
+        febrero = self.por_codigo(saldos_cuentas(desde=date(2025, 2, 1), hasta=date(2025, 2, 28)))
+        self.assertEqual(febrero['1111']['saldo'], CERO)
+        self.assertEqual(febrero['1122']['debe'], Decimal('300.00'))
+        self.assertEqual(febrero['2120']['saldo'], Decimal('200.00'))
+
+        hasta_febrero = self.por_codigo(saldos_cuentas(hasta=date(2025, 2, 28)))
+        self.assertEqual(hasta_febrero['1111']['saldo'], Decimal('1000.00'))
+
+        rama = saldos_cuentas(prefijo='11')
+        self.assertEqual([fila['codigo'] for fila in rama], ['1111', '1119', '1122'])
+
+    def test_saldos_anteriores_coinciden_con_la_suma_de_lo_previo(self):
+        filas = list(movimientos_mayor([self.cuentas['1111'].id, self.cuentas['3110'].id]))
+        for fila in filas:
+            with self.subTest(movimiento=fila['id']):
+                previos = Movimiento.objects.filter(cuenta_id=fila['cuenta_id']).filter(
+                    Q(asiento__fecha__lt=fila['fecha'])
+                    | Q(asiento__fecha=fila['fecha'], asiento_id__lt=fila['asiento_id'])
+                    | Q(asiento_id=fila['asiento_id'], id__lt=fila['id'])
+                ).aggregate(total=Sum(F('debe') - F('haber')))['total'] or CERO
+                self.assertEqual(saldos_anteriores({fila['cuenta_id']: fila}), {fila['cuenta_id']: previos})
+        self.assertEqual(saldos_anteriores({}), {})
+
+    def test_nivel_acumula_la_rama_con_el_tipo_de_cada_nodo(self):
+        respuesta = self.cliente.get('/api/contabilidad/reportes/balance-comprobacion/', {'nivel': 3})
+        self.assertEqual(respuesta.status_code, 200)
+        nodos = self.por_codigo(respuesta.data)
+        self.assertEqual(
+            [codigo for codigo in nodos if codigo.startswith('1')], ['1', '11', '111', '112']
+        )
+        # '1' usa su propia cuenta; '11' y '111' no tienen cuenta: su grupo es activo
+        self.assertEqual({nodos[codigo]['tipo'] for codigo in ('1', '11', '111', '112')}, {'activo'})
+        self.assertEqual(nodos['111']['debe'], Decimal('1050.00'))
+        self.assertEqual(nodos['111']['haber'], Decimal('130.00'))
+        self.assertEqual(nodos['1']['debe'], Decimal('1350.00'))
+        self.assertEqual(nodos['2']['tipo'], 'pasivo')
+
+        general = self.cliente.get('/api/contabilidad/reportes/balance-general/', {'nivel': 1}).data
+        self.assertEqual(
+            [(nodo['codigo'], nodo['saldo']) for nodo in general['activo']], [('1', 1220.0)]
+        )
+
+    def test_nivel_invalido_responde_400(self):
+        for valor in ('0', 'x'):
+            with self.subTest(nivel=valor):
+                respuesta = self.cliente.get('/api/contabilidad/reportes/balance-comprobacion/', {'nivel': valor})
+                self.assertEqual(respuesta.status_code, 400)
+
+    def test_consultas_por_reporte(self):
+        plan_cuentas()
+        for reporte, parametros, esperadas in self.REPORTES:
+            with self.subTest(reporte=reporte, **parametros):
+                url = f'/api/contabilidad/reportes/{reporte}/'
+                with self.assertNumQueries(esperadas):
+                    respuesta = self.cliente.get(url, parametros)
+                self.assertEqual(respuesta['X-Cache'], 'MISS')
+
+
+# === Registro de asientos ===
+class RegistroAsientosTests(PruebaContable):
+    URL = '/api/contabilidad/asientos/'
+
+    def datos(self, movimientos, descripcion='Prueba'):
+        return {
+            'fecha': '2025-01-02',
+            'descripcion': descripcion,
+            'movimientos': [
+                {'cuenta': self.cuentas[codigo].id, 'debe': str(debe), 'haber': str(haber)}
+                for codigo, debe, haber in movimientos
+            ],
+        }
+
+    def consultas_al_registrar(self, movimientos):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.cliente.post(self.URL, self.datos(movimientos), format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        return [consulta['sql'] for consulta in consultas.captured_queries]
+
+    def test_precargar_cuentas_resuelve_todas_las_del_lote(self):
+        efectivo, ingresos = self.cuentas['1111'], self.cuentas['4110']
+        cuentas = precargar_cuentas([
+            {'movimientos': [{'cuenta': efectivo.id}, {'cuenta': str(ingresos.id)}, {'cuenta': 'x'}, 'basura']},
+            {'movimientos': [{'cuenta': efectivo.id}, {'cuenta': 999999}]},
+            {'movimientos': 'no es una lista'},
+            'tampoco un asiento',
+        ])
+        self.assertEqual(cuentas, {efectivo.id: efectivo, ingresos.id: ingresos})
+
+    def test_cuenta_inexistente_se_informa_en_el_movimiento(self):
+        datos = self.datos([('1111', 10, 0), ('4110', 0, 10)])
+        datos['movimientos'][1]['cuenta'] = 999999
+        respuesta = self.cliente.post(self.URL, datos, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('999999', str(respuesta.data['movimientos'][1]['cuenta']))
+
+    def test_las_consultas_no_crecen_con_los_movimientos(self):
+        self.asiento(date(2025, 1, 1), 1)  # Carga el plan de cuentas en el proceso
+        pocos = self.consultas_al_registrar([('1111', 10, 0), ('4110', 0, 10)])
+        muchos = self.consultas_al_registrar(
+            [('1111', 10, 0), ('1122', 20, 0), ('5120', 30, 0), ('6120', 40, 0),
+             ('2120', 0, 50), ('4110', 0, 50)]
+        )
+        # Solo crecen las de SaldoCuenta: un UPDATE por cuenta tocada
+        sin_saldos = lambda consultas: [sql for sql in consultas if '"contabilidad_saldocuenta"' not in sql]
+        self.assertEqual(len(sin_saldos(muchos)), len(sin_saldos(pocos)))
+        self.assertEqual(len(muchos) - len(pocos), 6 - 2)
+        # Las cuentas salen del plan en memoria, no de una consulta por movimiento
+        self.assertFalse([sql for sql in muchos if 'FROM "contabilidad_cuentacontable"' in sql])
+
+
+    def test_lote_atomico_no_guarda_nada_si_un_asiento_no_cuadra(self):
+        lote = [
+            self.datos([('1111', 10, 0), ('4110', 0, 10)], 'Primero'),
+            self.datos([('1111', 10, 0), ('4110', 0, 9)], 'Descuadrado'),
+            self.datos([('1122', 5, 0), ('4110', 0, 5)], 'Tercero'),
+        ]
+        respuesta = self.cliente.post(self.URL + 'lote/', {'asientos': lote, 'atomico': True}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['creados'], 0)
+        self.assertEqual([error['indice'] for error in respuesta.data['errores']], [1])
+        self.assertFalse(AsientoContable.objects.exists())
+        self.assertFalse(SaldoCuenta.objects.filter(cantidad_movimientos__gt=0).exists())
+
+    def test_lote_informa_los_errores_de_cada_asiento_y_guarda_los_validos(self):
+        sin_cuenta = self.datos([('1111', 10, 0), ('4110', 0, 10)], 'Sin cuenta')
+        sin_cuenta['movimientos'][0]['cuenta'] = 999999
+        lote = [
+            self.datos([('1111', 10, 0), ('4110', 0, 10)], 'Válido'),
+            self.datos([('1111', 10, 0), ('4110', 0, 9)], 'Descuadrado'),
+            sin_cuenta,
+            self.datos([('1122', 5, 0), ('4110', 0, 5)], 'Otro válido'),
+        ]
+        respuesta = self.cliente.post(self.URL + 'lote/', lote, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        self.assertEqual(respuesta.data['creados'], 2)
+        errores = {error['indice']: error['errores'] for error in respuesta.data['errores']}
+        self.assertEqual(sorted(errores), [1, 2])
+        self.assertIn('no está balanceado', str(errores[1]))
+        self.assertIn('cuenta', errores[2]['movimientos'][0])
+        self.assertEqual(
+            sorted(AsientoContable.objects.filter(pk__in=respuesta.data['ids']).values_list('descripcion', flat=True)),
+            ['Otro válido', 'Válido'],
+        )
+
+    def test_lote_sin_asientos_validos_responde_400(self):
+        respuesta = self.cliente.post(
+            self.URL + 'lote/', [self.datos([('1111', 10, 0), ('4110', 0, 9)])], format='json'
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['creados'], 0)
+
+    def test_lote_mayor_al_maximo_se_rechaza(self):
+        asiento = self.datos([('1111', 10, 0), ('4110', 0, 10)])
+        with mock.patch.object(AsientoContableViewSet, 'lote_maximo', 3):
+            respuesta = self.cliente.post(self.URL + 'lote/', [asiento] * 4, format='json')
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertIn('Máximo 3', respuesta.data['error'])
+            self.assertFalse(AsientoContable.objects.exists())
+
+            respuesta = self.cliente.post(self.URL + 'lote/', [asiento] * 3, format='json')
+            self.assertEqual(respuesta.status_code, 201, respuesta.data)
+            self.assertEqual(respuesta.data['creados'], 3)
+
+
+# === Paginación por cursor ===
+class PaginacionCursorTests(PruebaContable):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        inicio = date(2025, 1, 1)
+        for dia in range(5):
+            for _ in range(2):
+                asiento = AsientoContable.objects.create(
+                    fecha=inicio + timedelta(days=dia), descripcion=f'Día {dia}', usuario=cls.usuario
+                )
+                Movimiento.objects.create(asiento=asiento, cuenta=cls.cuentas['1111'], debe=1, haber=0)
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        vistos = []
+        url = '/api/contabilidad/asientos/?page_size=3'
+        while url:
+            respuesta = self.cliente.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertNotIn('count', respuesta.data)
+            vistos += [fila['id'] for fila in respuesta.data['results']]
+            url = respuesta.data['next']
+
+        esperados = list(AsientoContable.objects.order_by('-fecha', '-id').values_list('id', flat=True))
+        self.assertEqual(vistos, esperados)
+
+    def test_previous_devuelve_la_pagina_anterior(self):
+        primera = self.cliente.get('/api/contabilidad/asientos/?page_size=4').data
+        segunda = self.cliente.get(primera['next']).data
+        anterior = self.cliente.get(segunda['previous']).data
+        self.assertEqual(
+            [fila['id'] for fila in anterior['results']],
+            [fila['id'] for fila in primera['results']],
+        )
+
+    def test_cursor_invalido_responde_404(self):
+        invalidos = [
+            'no-es-base64',
+            cursor(['x', 1]),
+            cursor(['2025-01-01', 'a']),
+            cursor(['2025-13-01', 1]),
+            cursor([None, 1]),
+            cursor([{'a': 1}, 1]),
+            cursor(['2025-01-01']),
+        ]
+        for valor in invalidos:
+            for url in ('/api/contabilidad/asientos/', '/api/contabilidad/reportes/libro-diario/'):
+                with self.subTest(url=url, cursor=valor):
+                    self.assertEqual(self.cliente.get(url, {'cursor': valor}).status_code, 404)
+
+    def test_resumen_para_el_dashboard(self):
+        datos = self.cliente.get('/api/contabilidad/reportes/resumen/').data
+        self.assertEqual(datos['total_cuentas'], len(CUENTAS_PRUEBA))
+        self.assertEqual(datos['total_asientos'], 10)
+
+
+# === Libro mayor ===
+class LibroMayorTests(PruebaContable):
+    URL = '/api/contabilidad/reportes/libro-mayor/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cliente = APIClient()
+        cliente.force_authenticate(user=cls.usuario)
+        for n in range(1, 16):
+            # Ingresos de 10, 20, ...; uno de cada tres a crédito
+            debe = '1122' if n % 3 == 0 else '1111'
+            cliente.post('/api/contabilidad/asientos/', {
+                'fecha': str(date(2025, 1, n)),
+                'descripcion': f'Asiento {n}',
+                'movimientos': [
+                    {'cuenta': cls.cuentas[debe].id, 'debe': str(n * 10), 'haber': '0'},
+                    {'cuenta': cls.cuentas['4110'].id, 'debe': '0', 'haber': str(n * 10)},
+                ],
+            }, format='json')
+
+    def esperado(self, cuenta, desde=None):
+        saldo = Decimal('0')
+        saldos = []
+        movimientos = Movimiento.objects.filter(cuenta=cuenta).order_by('asiento__fecha', 'asiento_id', 'id')
+        for movimiento in movimientos:
+            saldo += movimiento.debe - movimiento.haber
+            if desde is None or movimiento.asiento.fecha >= desde:
+                saldos.append(float(saldo))
+        return saldos
+
+    def recorrer(self, parametros):
+        paginas = [self.cliente.get(self.URL, parametros).data]
+        while paginas[-1]['next']:
+            paginas.append(self.cliente.get(paginas[-1]['next']).data)
+        return paginas
+
+    def test_saldo_acumulado_continuo_entre_paginas(self):
+        efectivo = self.cuentas['1111']
+        paginas = self.recorrer({'cuenta_id': efectivo.id, 'page_size': 4})
+        self.assertEqual(len(paginas), 3)
+        saldos = [movimiento['saldo'] for pagina in paginas for movimiento in pagina['movimientos']]
+        self.assertEqual(saldos, self.esperado(efectivo))
+        self.assertEqual(paginas[1]['saldo_inicial'], saldos[3])
+
+    def test_pagina_anterior_conserva_los_saldos(self):
+        efectivo = self.cuentas['1111']
+        paginas = self.recorrer({'cuenta_id': efectivo.id, 'page_size': 4})
+        anterior = self.cliente.get(paginas[2]['previous']).data
+        self.assertEqual(anterior['movimientos'], paginas[1]['movimientos'])
+        self.assertEqual(anterior['saldo_inicial'], paginas[1]['saldo_inicial'])
+
+    def test_cursor_sin_saldo_firmado_recalcula(self):
+        efectivo = self.cuentas['1111']
+        primera = self.cliente.get(self.URL, {'cuenta_id': efectivo.id, 'page_size': 4}).data
+        datos = json.loads(base64.urlsafe_b64decode(parse_qs(urlparse(primera['next']).query)['cursor'][0]))
+        for saldo in (None, 'alterado'):
+            if saldo is None:
+                datos.pop('s')
+            else:
+                datos['s'] = saldo
+            segunda = self.cliente.get(self.URL, {
+                'cuenta_id': efectivo.id, 'page_size': 4, 'cursor': cursor(datos['v']),
+            }).data
+            self.assertEqual(
+                [movimiento['saldo'] for movimiento in segunda['movimientos']],
+                self.esperado(efectivo)[4:8],
+            )
+
+    def test_varias_cuentas_y_periodo(self):
+        desde = date(2025, 1, 4)
+        paginas = self.recorrer({'prefijo': '1', 'desde': str(desde), 'page_size': 4})
+        efectivo = [
+            movimiento['saldo']
+            for pagina in paginas for cuenta in pagina['cuentas']
+            if cuenta['cuenta']['codigo'] == '1111'
+            for movimiento in cuenta['movimientos']
+        ]
+        self.assertEqual(efectivo, self.esperado(self.cuentas['1111'], desde))
+        self.assertEqual(paginas[0]['cuentas'][0]['saldo_inicial'], 30.0)
+
+    def test_la_ventana_solo_recibe_las_filas_de_la_pagina(self):
+        efectivo = self.cuentas['1111']
+        primera = self.cliente.get(self.URL, {'cuenta_id': efectivo.id, 'page_size': 4}).data
+        with CaptureQueriesContext(connection) as consultas:
+            self.cliente.get(primera['next'])
+        ventana = [consulta['sql'] for consulta in consultas.captured_queries if ' OVER ' in consulta['sql']]
+        self.assertEqual(len(ventana), 1)
+        # La ventana se aplica sobre la subconsulta limitada (WHERE id IN (... LIMIT 5)),
+        # sin unir con los asientos para filtrar u ordenar
+        self.assertRegex(ventana[0], r'IN \(SELECT .* LIMIT 5\)')
+        self.assertNotIn('"contabilidad_asientocontable"."fecha"', ventana[0])
+
+    def test_la_fecha_del_movimiento_sigue_a_la_del_asiento(self):
+        asiento = AsientoContable.objects.get(descripcion='Asiento 2')
+        asiento.fecha = date(2025, 2, 1)
+        asiento.save()
+        self.assertEqual(set(asiento.movimientos.values_list('fecha', flat=True)), {date(2025, 2, 1)})
+
+        movimiento = Movimiento(asiento=asiento, cuenta=self.cuentas['1111'], debe=1, haber=0)
+        movimiento.save()
+        self.assertEqual(Movimiento.objects.get(pk=movimiento.pk).fecha, date(2025, 2, 1))
+        # Pasa al final del mayor de efectivo
+        paginas = self.recorrer({'cuenta_id': self.cuentas['1111'].id, 'page_size': 4})
+        ultimos = [fila['asiento_id'] for fila in paginas[-1]['movimientos'][-2:]]
+        self.assertEqual(ultimos, [asiento.id, asiento.id])
+
+
+# === Exportación del libro diario ===
+class ExportarLibroDiarioTests(PruebaContable):
+    URL = '/api/contabilidad/reportes/libro-diario/excel/'
+
+    def libro(self, parametros=None):
+        respuesta = self.cliente.get(self.URL, parametros or {})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('libro-diario.xlsx', respuesta['Content-Disposition'])
+        contenido = b''.join(respuesta.streaming_content)
+        hoja = load_workbook(BytesIO(contenido), read_only=True)['Libro Diario']
+        return [list(fila) for fila in hoja.iter_rows(values_only=True)]
+
+    def test_exporta_los_movimientos_del_periodo_del_mas_reciente_al_mas_antiguo(self):
+        for dia, monto in ((2, 10), (5, 20), (9, 30)):
+            self.asiento(date(2025, 1, dia), monto, descripcion=f'Día {dia}')
+
+        filas = self.libro({'desde': '2025-01-03'})
+        self.assertEqual(filas[0], ['Fecha', 'Asiento ID', 'Descripción', 'Cuenta', 'Nombre', 'Debe', 'Haber'])
+        self.assertEqual([(fila[2], fila[3], fila[5], fila[6]) for fila in filas[1:]], [
+            ('Día 9', '1111', 30, 0),
+            ('Día 9', '4110', 0, 30),
+            ('Día 5', '1111', 20, 0),
+            ('Día 5', '4110', 0, 20),
+        ])
+
+    def test_lee_los_movimientos_por_bloques(self):
+        self.asiento(date(2025, 1, 2), 10)
+        with mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterador:
+            filas = self.libro()
+        self.assertEqual(len(filas), 3)
+        self.assertEqual(iterador.call_args.kwargs, {'chunk_size': 2000})
+
+    def test_libro_vacio_solo_trae_el_encabezado(self):
+        self.assertEqual(len(self.libro()), 1)
+
+
+# === Cola de contabilización ===
+@override_settings(CONTABILIDAD_COLA_ASINCRONA=True)
+class ColaContabilizacionTests(PruebaContable):
+
+    def vender(self, numero, condicion='contado'):
+        cliente, _ = Cliente.objects.get_or_create(rif='J-00000003-0', defaults={'nombre': 'Cliente'})
+        return Venta.objects.create(
+            cliente=cliente, fecha=date(2025, 2, 1), numero_factura=numero, subtotal=100, total=100,
+            base_imponible_general=100, estado='emitida', condicion_pago=condicion,
+        )
+
+    def sin_cuenta(self, codigo):
+        CuentaContable.objects.filter(codigo=codigo).delete()
+        verificar_caches()
+
+    def test_la_venta_se_encola_y_el_worker_la_contabiliza(self):
+        venta = self.vender('C-1')
+        self.assertIsNone(venta.asiento_id)
+        self.assertEqual(procesar_lote(), (1, 0))
+        self.assertFalse(TrabajoContabilizacion.objects.exists())
+        venta.refresh_from_db()
+        self.assertEqual(venta.asiento.origen_id, venta.id)
+
+    def test_un_documento_con_error_no_detiene_el_lote(self):
+        self.sin_cuenta('1122')
+        contado, credito = self.vender('C-2'), self.vender('C-3', 'credito')
+        self.assertEqual(procesar_lote(), (1, 1))
+
+        contado.refresh_from_db()
+        self.assertIsNotNone(contado.asiento_id)
+        trabajo = TrabajoContabilizacion.objects.get()
+        self.assertEqual((trabajo.origen_id, trabajo.estado, trabajo.intentos), (credito.id, 'pendiente', 1))
+        self.assertIn('DoesNotExist', trabajo.ultimo_error)
+        # Se reintenta después de la espera, no en la siguiente pasada
+        self.assertGreater(trabajo.disponible_en, timezone.now())
+        self.assertEqual(procesar_lote(), (0, 0))
+
+    def test_agotados_los_intentos_pasa_a_fallido_y_se_puede_reintentar(self):
+        self.sin_cuenta('1122')
+        venta = self.vender('C-4', 'credito')
+        TrabajoContabilizacion.objects.update(intentos=MAX_INTENTOS - 1)
+        self.assertEqual(procesar_lote(), (0, 1))
+        self.assertEqual(TrabajoContabilizacion.objects.get().estado, 'fallido')
+
+        # Corregida la causa, la cola de errores vuelve a procesarse
+        CuentaContable.objects.create(
+            codigo='1122', nombre='CUENTAS POR COBRAR CLIENTES', tipo='activo', clasificacion='1122', nivel=4
+        )
+        verificar_caches()
+        self.assertEqual(reintentar_fallidos(), 1)
+        self.assertEqual(procesar_lote(), (1, 0))
+        venta.refresh_from_db()
+        self.assertIsNotNone(venta.asiento_id)
+
+
+# === Tareas de reparación ===
+@override_settings(CONTABILIDAD_COLA_ASINCRONA=True)
+class TareaReparacionTests(PruebaContable):
+
+    def estado(self, tarea):
+        return self.cliente.get(f'/api/contabilidad/reparaciones/{tarea.id}/').data
+
+    def test_el_worker_ejecuta_las_tareas_pendientes(self):
+        # Con la cola asíncrona la venta queda sin asiento hasta que se procese
+        venta = Venta.objects.create(
+            cliente=Cliente.objects.create(rif='J-00000002-0', nombre='Cliente'),
+            fecha=date(2025, 2, 1), numero_factura='R-1', subtotal=100, total=100,
+            base_imponible_general=100, estado='emitida',
+        )
+        respuesta = self.cliente.post('/api/contabilidad/reparaciones/', {'tipos': ['venta']}, format='json')
+        self.assertEqual(respuesta.status_code, 202)
+        self.assertEqual(respuesta.data['estado'], 'pendiente')
+
+        self.assertEqual(procesar_tareas_pendientes(), 1)
+        datos = self.estado(TareaReparacion.objects.get(pk=respuesta.data['id']))
+        self.assertEqual(datos['estado'], 'completada')
+        self.assertEqual(datos['pid'], os.getpid())
+        self.assertEqual((datos['total'], datos['procesados']), (1, 1))
+        venta.refresh_from_db()
+        self.assertIsNotNone(venta.asiento_id)
+
+    def test_una_tarea_tomada_no_se_ejecuta_dos_veces(self):
+        tarea = TareaReparacion.objects.create(estado='en_proceso', latido_en=timezone.now())
+        self.assertFalse(ejecutar_tarea(TareaReparacion, tarea.id))
+        self.assertEqual(procesar_tareas_pendientes(), 0)
+
+    def test_tarea_sin_latido_pasa_a_error(self):
+        vencido = timezone.now() - timedelta(seconds=LATIDO_MAXIMO + 1)
+        abandonada = TareaReparacion.objects.create(estado='en_proceso', latido_en=vencido, log='📒 venta: 0/10')
+        activa = TareaReparacion.objects.create(estado='en_proceso', latido_en=timezone.now())
+
+        datos = self.estado(abandonada)
+        self.assertEqual(datos['estado'], 'error')
+        self.assertIsNotNone(datos['finalizado_en'])
+        self.assertTrue(datos['log'].startswith('📒 venta: 0/10\n❌ Tarea abandonada'))
+        self.assertEqual(self.estado(activa)['estado'], 'en_proceso')
+
+    def test_pendiente_sin_hilo_solo_caduca_sin_cola(self):
+        tarea = TareaReparacion.objects.create()
+        TareaReparacion.objects.filter(pk=tarea.pk).update(
+            creado_en=timezone.now() - timedelta(seconds=LATIDO_MAXIMO + 1)
+        )
+        # El worker de la cola la tomará: sigue pendiente
+        self.assertEqual(self.estado(tarea)['estado'], 'pendiente')
+        with self.settings(CONTABILIDAD_COLA_ASINCRONA=False):
+            self.assertEqual(self.estado(tarea)['estado'], 'error')
+
+
+# === Importación ===
+class ImportacionTests(PruebaContable):
+
+    def fila(self, numero, condicion='contado'):
+        return {
+            'rif': f'J-{numero:08d}-0', 'fecha': '2025-04-01', 'numero_factura': f'I-{numero}',
+            'base_imponible_general': '100', 'impuesto_general': '16', 'total': '116',
+            'condicion_pago': condicion,
+        }
+
+    def test_una_fila_que_falla_no_descarta_el_lote(self):
+        # Sin la cuenta 1122 las ventas a crédito no pueden contabilizarse
+        CuentaContable.objects.filter(codigo='1122').delete()
+        importador = Importador('venta', tamano=2)
+        resumen = importador.importar([self.fila(1), self.fila(2, 'credito'), self.fila(3), self.fila(4)])
+
+        self.assertEqual((resumen['creados'], resumen['errores']), (3, 1))
+        self.assertEqual(importador.errores[0]['fila'], 3)
+        self.assertIn('DoesNotExist', importador.errores[0]['error'])
+        self.assertEqual(
+            sorted(Venta.objects.values_list('numero_factura', flat=True)), ['I-1', 'I-3', 'I-4']
+        )
+        # El cliente de la fila revertida no se creó ni se cuenta
+        self.assertEqual(resumen['contrapartes_creadas'], 3)
+        self.assertFalse(Cliente.objects.filter(rif='J-00000002-0').exists())
+        self.assertFalse(Venta.objects.filter(asiento__isnull=True).exists())
+
+    @override_settings(CONTABILIDAD_COLA_ASINCRONA=True, IMPORTACIONES_MAXIMO_SINCRONO=0)
+    def test_archivo_grande_se_importa_en_segundo_plano(self):
+        contenido = 'rif,nombre,fecha,numero_factura,total\nJ-1,Cliente,2025-04-01,G-1,50\nJ-1,Cliente,2025-04-02,,10\n'
+        with tempfile.TemporaryDirectory() as directorio, self.settings(IMPORTACIONES_DIRECTORIO=directorio):
+            respuesta = self.cliente.post('/api/contabilidad/importaciones/', {
+                'tipo': 'venta', 'archivo': SimpleUploadedFile('ventas.csv', contenido.encode()),
+            })
+            self.assertEqual(respuesta.status_code, 202)
+            self.assertEqual(respuesta.data['estado'], 'pendiente')
+            self.assertEqual(len(os.listdir(directorio)), 1)
+
+            self.assertEqual(procesar_tareas_pendientes(), 1)
+            self.assertEqual(os.listdir(directorio), [])
+
+        datos = self.cliente.get(f"/api/contabilidad/importaciones/{respuesta.data['id']}/").data
+        self.assertEqual(datos['estado'], 'completada')
+        self.assertEqual(datos['nombre_archivo'], 'ventas.csv')
+        self.assertEqual((datos['resultado']['creados'], datos['resultado']['errores']), (1, 1))
+        self.assertEqual(datos['resultado']['detalle_errores'], [{'fila': 3, 'error': 'numero_factura: requerido'}])
+        self.assertTrue(TareaImportacion.objects.filter(pk=datos['id'], procesados=2).exists())
+
+
+# === Carga del plan de cuentas ===
+class CargarPlanCuentasTests(PruebaContable):
+
+    def cargar(self, *argumentos):
+        call_command('cargar_plan_cuentas', *argumentos, stdout=StringIO())
+
+    def cargar_csv(self, contenido):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'plan.csv')
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+            self.cargar('--archivo', ruta)
+
+    def test_respeta_las_cuentas_editadas_salvo_con_actualizar(self):
+        CuentaContable.objects.filter(codigo='1111').update(nombre='CAJA PRINCIPAL')
+        self.cargar()
+        self.assertEqual(CuentaContable.objects.get(codigo='1111').nombre, 'CAJA PRINCIPAL')
+        self.assertTrue(CuentaContable.objects.filter(codigo='1112').exists())
+
+        self.cargar('--actualizar')
+        self.assertEqual(CuentaContable.objects.get(codigo='1111').nombre, 'EFECTIVO')
+
+    def test_clasificacion_por_defecto_es_el_prefijo_valido(self):
+        self.cargar_csv('codigo,nombre,tipo\n2112,IVA RETENIDO,pasivo\n')
+        self.assertEqual(CuentaContable.objects.get(codigo='2112').clasificacion, '211')
+
+    def test_errores_indican_la_linea(self):
+        casos = [
+            ('codigo,nombre,tipo,nivel\n1114,CAJA CHICA,activo,4\n1115,OTRA,activo,x\n', 'línea 3', 'nivel'),
+            ('codigo,nombre,tipo,clasificacion\n1114,CAJA CHICA,activo,9999\n', 'línea 2', 'clasificación'),
+            ('codigo,nombre,tipo\n1114,CAJA CHICA,otro\n', 'línea 2', 'tipo'),
+        ]
+        for contenido, linea, campo in casos:
+            with self.subTest(campo=campo):
+                with self.assertRaises(CommandError) as error:
+                    self.cargar_csv(contenido)
+                self.assertTrue(str(error.exception).startswith(f'plan.csv, {linea}: cuenta 11'))
+                self.assertIn(campo, str(error.exception))
+                self.assertFalse(CuentaContable.objects.filter(codigo='1114').exists())
+
+    def test_el_plan_se_recarga_cuando_otro_worker_sube_la_version(self):
+        plan = plan_cuentas()
+        # Otro worker: cambio sin señales y solo el incremento de la versión
+        CuentaContable.objects.filter(codigo='1111').update(nombre='CAJA PRINCIPAL')
+        incrementar_version('plan_cuentas')
+
+        # Hasta la siguiente petición se sigue usando la copia en memoria, sin consultas
+        with self.assertNumQueries(0):
+            self.assertIs(plan_cuentas(), plan)
+        verificar_caches()
+        self.assertEqual(plan_cuentas().cuenta('1111').nombre, 'CAJA PRINCIPAL')
+
+        # Sin cambios de versión, verificar cuesta una consulta y no recarga
+        actual = plan_cuentas()
+        verificar_caches()
+        with self.assertNumQueries(1):
+            self.assertIs(plan_cuentas(), actual)
+
+    def test_los_cambios_locales_invalidan_el_plan_al_confirmar(self):
+        plan_cuentas()
+        version = version_actual('plan_cuentas')
+        with self.captureOnCommitCallbacks(execute=True):
+            CuentaContable.objects.create(
+                codigo='1114', nombre='CAJA CHICA', tipo='activo', clasificacion='1111', nivel=4
+            )
+        self.assertEqual(version_actual('plan_cuentas'), version + 1)
+        self.assertEqual(plan_cuentas().cuenta('1114').nombre, 'CAJA CHICA')
+
+
+
+# === Carga masiva de fixtures ===
+class CargarFixturesTests(PruebaContable):
+
+    def escribir_fixtures(self, directorio):
+        """Fixtures mínimos: un cliente, un asiento con sus movimientos (sin fecha) y su venta."""
+        contenido = {
+            'clientes.json': [
+                {'model': 'ventas.cliente', 'pk': 900, 'fields': {'rif': 'J-00000900-0', 'nombre': 'Cliente Fixture'}},
+            ],
+            'asientos.json': [
+                {'model': 'contabilidad.asientocontable', 'pk': 900, 'fields': {
+                    'fecha': '2025-09-10', 'descripcion': 'Venta fixture', 'usuario': self.usuario.id,
+                }},
+            ],
+            'movimientos.json': [
+                {'model': 'contabilidad.movimiento', 'pk': 900, 'fields': {
+                    'asiento': 900, 'cuenta': self.cuentas['1111'].id, 'debe': '116.00', 'haber': '0.00',
+                }},
+                {'model': 'contabilidad.movimiento', 'pk': 901, 'fields': {
+                    'asiento': 900, 'cuenta': self.cuentas['4110'].id, 'debe': '0.00', 'haber': '116.00',
+                }},
+            ],
+            'ventas.json': [
+                {'model': 'ventas.venta', 'pk': 900, 'fields': {
+                    'cliente': 900, 'fecha': '2025-09-10', 'numero_factura': 'V-900', 'subtotal': '100.00',
+                    'total': '116.00', 'base_imponible_general': '100.00', 'impuesto_general': '16.00',
+                    'estado': 'emitida', 'asiento': 900, 'usuario': self.usuario.id,
+                }},
+            ],
+        }
+        rutas = []
+        for nombre, objetos in contenido.items():
+            ruta = os.path.join(directorio, nombre)
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                json.dump(objetos, archivo)
+            rutas.append(ruta)
+        return rutas
+
+    def test_carga_enlaza_origenes_y_recalcula_saldos(self):
+        salida = StringIO()
+        with tempfile.TemporaryDirectory() as directorio:
+            call_command('cargar_fixtures', *self.escribir_fixtures(directorio), stdout=salida)
+
+        self.assertIn('Filas cargadas: 5', salida.getvalue())
+        self.assertIn('Asientos enlazados a su documento: 1', salida.getvalue())
+        asiento = AsientoContable.objects.get(pk=900)
+        self.assertEqual((asiento.origen_tipo, asiento.origen_id), ('venta', 900))
+        # Sin señales: la venta no se contabilizó de nuevo
+        self.assertEqual(AsientoContable.objects.count(), 1)
+        # Los movimientos sin fecha toman la de su asiento
+        self.assertEqual(set(Movimiento.objects.values_list('fecha', flat=True)), {date(2025, 9, 10)})
+        self.assertEqual(SaldoCuenta.objects.get(cuenta=self.cuentas['1111']).total_debe, Decimal('116.00'))
+        self.assertEqual(SaldoCuenta.objects.get(cuenta=self.cuentas['4110']).total_haber, Decimal('116.00'))
+
+    def test_fixture_inexistente_no_carga_nada(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            rutas = self.escribir_fixtures(directorio)
+            with self.assertRaises(CommandError):
+                call_command('cargar_fixtures', *rutas, os.path.join(directorio, 'compras.json'), stdout=StringIO())
+        self.assertFalse(Cliente.objects.filter(pk=900).exists())
+
+    def test_objetos_sin_pk_se_rechazan(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'clientes.json')
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                json.dump([{'model': 'ventas.cliente', 'fields': {'rif': 'J-1', 'nombre': 'Sin pk'}}], archivo)
+            with self.assertRaisesMessage(ValueError, "deben incluir 'pk'"):
+                call_command('cargar_fixtures', ruta, stdout=StringIO())
+
+
+# === Datos sintéticos ===
+class DatosSinteticosTests(PruebaContable):
+
+    def generar(self):
+        GeneradorSintetico(semilla=7, informar=lambda mensaje: None).generar(
+            clientes=3, proveedores=2, ventas=5, compras=3, movimientos=80
+        )
+        return [
+            (asiento.fecha, asiento.descripcion, sorted(
+                (movimiento.cuenta.codigo, movimiento.debe, movimiento.haber)
+                for movimiento in asiento.movimientos.all()
+            ))
+            for asiento in AsientoContable.objects.order_by('id').prefetch_related('movimientos__cuenta')
+        ]
+
+    def test_misma_semilla_mismos_datos(self):
+        primera = self.generar()
+        self.assertTrue(all(fecha <= HASTA_PREDETERMINADO for fecha, _, _ in primera))
+
+        # Sin rastro de la primera generación y con las cuentas insertadas en otro orden
+        for modelo in (Movimiento, Venta, Compra, AsientoContable, SaldoCuenta, Cliente, Proveedor, CuentaContable):
+            modelo.objects.all().delete()
+        for codigo, nombre, tipo, clasificacion in reversed(CUENTAS_PRUEBA):
+            CuentaContable.objects.create(
+                codigo=codigo, nombre=nombre, tipo=tipo, clasificacion=clasificacion, nivel=len(codigo)
+            )
+        # Como al iniciar otra ejecución del comando
+        verificar_caches()
+        self.assertEqual(self.generar(), primera)
+
+    def test_cada_linea_acreedora_recibe_al_menos_un_centimo(self):
+        repartir = GeneradorSintetico._repartir
+        self.assertEqual(repartir(Decimal('0.03'), [98, 1, 1]), [Decimal('0.01')] * 3)
+        self.assertEqual(repartir(Decimal('0.10'), [97, 2, 1]), [Decimal('0.07'), Decimal('0.01'), Decimal('0.02')])
+        self.assertEqual(sum(repartir(Decimal('123.45'), [33, 33, 34])), Decimal('123.45'))
+
+        self.generar()
+        self.assertFalse(Movimiento.objects.filter(debe=0, haber=0).exists())
+        totales = AsientoContable.objects.annotate(
+            debe=Sum('movimientos__debe'), haber=Sum('movimientos__haber')
+        ).values_list('debe', 'haber')
+        self.assertTrue(all(round(debe - haber, 2) == 0 for debe, haber in totales))
+
+    def test_por_defecto_el_avance_va_al_log_y_no_a_stdout(self):
+        salida = StringIO()
+        with redirect_stdout(salida), self.assertLogs('contabilidad.sinteticos', 'INFO') as registros:
+            GeneradorSintetico(semilla=7).generar(clientes=1, proveedores=1, ventas=1, compras=1, movimientos=10)
+        self.assertEqual(salida.getvalue(), '')
+        self.assertIn('asientos', registros.output[-1])
+
+
+# === Benchmarks ===
+class BenchmarkTests(PruebaContable):
+    URL = '/api/contabilidad/reportes/balance-comprobacion/'
+
+    def test_mide_el_calculo_sin_tocar_la_cache(self):
+        caches['reportes'].clear()
+        self.asiento(date(2025, 1, 2), 10)
+        # Un resultado en la caché no debe servirse durante la medición
+        clave = clave_reporte('balance_comprobacion', QueryDict(), version_reportes())
+        caches['reportes'].set(clave, {'cuentas': []})
+        esperado = len(self.cliente.get(self.URL, {'sin': 'cache'}).content)
+
+        medido = medir_reporte(self.cliente, self.URL, {}, repeticiones=2)
+        self.assertEqual(medido['estado'], 200)
+        self.assertEqual(medido['bytes'], esperado)
+
+        # Ni se guardó nada en la caché real
+        caches['reportes'].delete(clave)
+        self.assertEqual(self.cliente.get(self.URL)['X-Cache'], 'MISS')
+
+    def test_clasificar_error_segun_sqlstate(self):
+        def con_causa(**atributos):
+            error = OperationalError('fallo')
+            error.__cause__ = type('ErrorDriver', (Exception,), atributos)()
+            return error
+
+        diagnostico = type('Diagnostico', (), {'sqlstate': '40001'})()
+        self.assertEqual(clasificar_error(con_causa(pgcode='40P01')), 'deadlock')
+        self.assertEqual(clasificar_error(con_causa(diag=diagnostico)), 'serializacion')
+        self.assertEqual(clasificar_error(OperationalError('database is locked')), 'bloqueo')
+        self.assertEqual(clasificar_error(IntegrityError('duplicado')), 'error')
+
+    def test_medir_escrituras_resume_por_tipo(self):
+        def escritor(argumentos):
+            # Por escritor: un deadlock, un asiento y una compra creados
+            indice, operaciones, _ = argumentos
+            return [
+                ('asiento', 'deadlock', 30.0, None),
+                ('asiento', 'ok', 10.0, indice * 10 + 1),
+                ('compra', 'ok', 20.0, indice * 10 + 2),
+            ][:operaciones]
+
+        with mock.patch('contabilidad.benchmarks.ejecutar_escritor', escritor):
+            resumen, creados = medir_escrituras({}, escritores=2, operaciones=3)
+        self.assertEqual(creados, {'asiento': [1, 11], 'compra': [2, 12]})
+        self.assertEqual(resumen['total']['operaciones'], 6)
+        self.assertEqual(resumen['total']['exitosas'], 4)
+        self.assertEqual(resumen['total']['fallos'], {'deadlock': 2})
+        self.assertEqual(resumen['total']['latencia_ms']['max'], 30.0)
+        self.assertEqual(resumen['por_tipo']['asiento']['latencia_ms']['p50'], 10.0)
+        self.assertEqual(resumen['por_tipo']['compra']['fallos'], {})
+
+    def test_escritores_y_operaciones_deben_ser_positivos(self):
+        with self.assertRaises(ValueError):
+            medir_escrituras({}, escritores=2, operaciones=0)
+        for opcion in ('--escritores', '--operaciones'):
+            with self.subTest(opcion=opcion), self.assertRaises(CommandError):
+                call_command('benchmark_escrituras', opcion, '0', stdout=StringIO())
+
+
+# === Agrupación de peticiones de reportes ===
+class CacheCompartida(LocMemCache):
+    """
+    Sustituto de un backend compartido entre workers (Redis, base de datos)
+    para las pruebas: para agrupar_peticiones() no es una caché por proceso.
+    Cuenta las lecturas.
+    """
+    lecturas = 0
+
+    def get(self, *args, **kwargs):
+        CacheCompartida.lecturas += 1
+        return super().get(*args, **kwargs)
+
+
+CACHE_COMPARTIDA = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'reportes': {'BACKEND': 'contabilidad.tests.CacheCompartida', 'LOCATION': 'reportes-compartida'},
+}
+
+
+@override_settings(CACHES=CACHE_COMPARTIDA, REPORTES_AGRUPAR='auto', REPORTES_ESPERA_MAXIMA=5)
+class AgrupacionReportesTests(PruebaContable):
+    """Otra petición (simulada con su BloqueoReporte) está calculando el reporte."""
+    URL = '/api/contabilidad/reportes/balance-comprobacion/'
+
+    def setUp(self):
+        super().setUp()
+        caches['reportes'].clear()
+        CacheCompartida.lecturas = 0
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        bloqueos = self.settings(REPORTES_BLOQUEOS_DIRECTORIO=directorio.name)
+        bloqueos.enable()
+        self.addCleanup(bloqueos.disable)
+
+        self.clave = clave_reporte('balance_comprobacion', QueryDict(), version_reportes())
+        self.bloqueo = BloqueoReporte(self.clave)
+        self.assertTrue(self.bloqueo.intentar())
+        self.addCleanup(self.bloqueo.liberar)
+
+    def test_por_defecto_solo_con_una_cache_compartida(self):
+        self.assertTrue(agrupar_peticiones())
+        locmem = {'reportes': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with self.settings(CACHES={**CACHE_COMPARTIDA, **locmem}):
+            self.assertFalse(agrupar_peticiones())
+            with self.settings(REPORTES_AGRUPAR='true'):
+                self.assertTrue(agrupar_peticiones())
+        with self.settings(REPORTES_AGRUPAR=False):
+            self.assertFalse(agrupar_peticiones())
+
+    def test_espera_el_resultado_del_calculo_en_curso(self):
+        datos = {'cuentas': [], 'calculado_por': 'otra petición'}
+        terminar = threading.Timer(0.2, caches['reportes'].set, args=(self.clave, datos))
+        terminar.start()
+        self.addCleanup(terminar.cancel)
+
+        respuesta = self.cliente.get(self.URL)
+        self.assertEqual(respuesta['X-Cache'], 'COALESCED')
+        self.assertEqual(respuesta.data, datos)
+
+    @override_settings(REPORTES_ESPERA_MAXIMA=0.6)
+    def test_si_el_calculo_no_termina_calcula_aparte(self):
+        respuesta = self.cliente.get(self.URL)
+        self.assertEqual(respuesta['X-Cache'], 'MISS')
+        self.assertIsNotNone(caches['reportes'].get(self.clave))
+        # Esperas de 0.05, 0.1, 0.2 y 0.25 s (hasta el límite), no una consulta cada 0.05 s
+        self.assertLessEqual(CacheCompartida.lecturas, 8)
+
+    def test_con_una_cache_por_proceso_no_espera_el_bloqueo(self):
+        locmem = {'reportes': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        for ajustes in ({'CACHES': {**CACHE_COMPARTIDA, **locmem}}, {'REPORTES_AGRUPAR': False}):
+            with self.subTest(**ajustes), self.settings(**ajustes):
+                inicio = timezone.now()
+                respuesta = self.cliente.get(self.URL)
+                self.assertEqual(respuesta['X-Cache'], 'MISS')
+                self.assertLess(timezone.now() - inicio, timedelta(seconds=1))
+
+
+# === Caché de reportes ===
+class CacheReportesTests(TransactionTestCase):
+    """Con transacciones reales: la versión del libro cambia al confirmarlas."""
+    URL = '/api/contabilidad/reportes/balance-comprobacion/'
+
+    asiento = PruebaContable.asiento
+
+    def setUp(self):
+        reiniciar_caches()
+        caches['reportes'].clear()
+        usuario = get_user_model().objects.create_superuser('pruebas@localhost', 'Pruebas', 'Sistema')
+        self.cuentas = crear_cuentas()
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(user=usuario)
+
+    def test_la_version_cambia_una_vez_por_transaccion(self):
+        version = version_actual(VERSION_LIBRO)
+        self.asiento(date(2025, 1, 2), 10)
+        self.asiento(date(2025, 1, 3), 20)
+        self.assertEqual(version_actual(VERSION_LIBRO), version + 2)
+
+        with transaction.atomic():
+            for dia in (4, 5, 6):
+                self.asiento(date(2025, 1, dia), 5)
+            # Dentro de la transacción el contador no se toca (no queda bloqueado)
+            self.assertEqual(version_actual(VERSION_LIBRO), version + 2)
+        self.assertEqual(version_actual(VERSION_LIBRO), version + 3)
+
+    def test_lo_revertido_no_cambia_la_version(self):
+        version = version_actual(VERSION_LIBRO)
+        with transaction.atomic():
+            self.asiento(date(2025, 1, 2), 10)
+            transaction.set_rollback(True)
+        self.assertEqual(version_actual(VERSION_LIBRO), version)
+
+        with transaction.atomic():
+            with transaction.atomic():
+                self.asiento(date(2025, 1, 3), 10)
+                transaction.set_rollback(True)
+            # El incremento del savepoint revertido se descartó: se vuelve a registrar
+            self.asiento(date(2025, 1, 4), 10)
+        self.assertEqual(version_actual(VERSION_LIBRO), version + 1)
+
+    def test_si_el_incremento_falla_se_vacia_la_cache(self):
+        self.asiento(date(2025, 1, 2), 10)
+        self.assertEqual(self.cliente.get(self.URL)['X-Cache'], 'MISS')
+        self.assertEqual(self.cliente.get(self.URL)['X-Cache'], 'HIT')
+
+        with mock.patch('contabilidad.versiones.incrementar_versiones', side_effect=OperationalError), \
+                self.assertLogs('contabilidad.versiones', 'ERROR'):
+            self.asiento(date(2025, 1, 3), 15)
+        # La versión no cambió, pero la caché se vació: no se sirve el saldo anterior
+        respuesta = self.cliente.get(self.URL)
+        self.assertEqual(respuesta['X-Cache'], 'MISS')
+        efectivo = next(fila for fila in respuesta.data if fila['codigo'] == '1111')
+        self.assertEqual(efectivo['debe'], Decimal('25.00'))
+
+    def test_un_asiento_nuevo_invalida_el_reporte(self):
+        self.asiento(date(2025, 1, 2), 10)
+        primera = self.cliente.get(self.URL)
+        self.assertEqual(primera['X-Cache'], 'MISS')
+        self.assertEqual(self.cliente.get(self.URL)['X-Cache'], 'HIT')
+
+        self.asiento(date(2025, 1, 3), 15)
+        segunda = self.cliente.get(self.URL)
+        self.assertEqual(segunda['X-Cache'], 'MISS')
+        self.assertNotEqual(segunda.data, primera.data)
+
+
+# === Métricas ===
+class MetricasTests(PruebaContable):
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(METRICAS_DIRECTORIO=directorio.name, METRICAS_INTERVALO=0)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    @override_settings(METRICAS_TOKEN='', DEBUG=False)
+    def test_sin_token_no_se_sirven_fuera_de_desarrollo(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICAS_TOKEN='secreto')
+    def test_exige_el_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+
+    @override_settings(METRICAS_TOKEN='secreto', INSTRUMENTACION_MUESTREO=1)
+    def test_los_histogramas_sql_indican_el_muestreo(self):
+        self.cliente.get('/api/contabilidad/reportes/resumen/')
+        texto = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto').content.decode()
+        # Los valores del proceso se acumulan entre pruebas: solo se comprueban las series
+        self.assertRegex(texto, r'db_queries_per_request_count\{muestreo="1",vista="contabilidad.views.resumen"\} \d+')
+        self.assertRegex(texto, r'http_request_duration_seconds_count\{metodo="GET",vista="contabilidad.views.resumen"\} \d+')
+
+
+# === Instrumentación SQL ===
+class InstrumentacionSQLTests(PruebaContable):
+
+    def medir(self):
+        with self.assertLogs('sistema_contable.instrumentacion', 'INFO') as registros:
+            respuesta = self.cliente.get('/api/contabilidad/reportes/resumen/')
+        return respuesta, json.loads(registros.records[-1].getMessage())
+
+    @override_settings(INSTRUMENTACION_MUESTREO=1)
+    def test_server_timing_y_linea_de_log(self):
+        respuesta, medicion = self.medir()
+        self.assertRegex(respuesta['Server-Timing'], (
+            r'^sql;dur=[\d.]+;desc="\d+ consultas", dup;desc="\d+ repetidas", '
+            r'render;dur=[\d.]+, app;dur=[\d.]+, total;dur=[\d.]+$'
+        ))
+        self.assertIn(f'desc="{medicion["consultas"]} consultas"', respuesta['Server-Timing'])
+        self.assertEqual(medicion['vista'], 'contabilidad.views.resumen')
+        self.assertEqual((medicion['estado'], medicion['muestreo']), (200, 1))
+        self.assertGreater(medicion['consultas'], 0)
+
+    @override_settings(INSTRUMENTACION_MUESTREO=0)
+    def test_sin_muestreo_no_se_mide(self):
+        with self.assertNoLogs('sistema_contable.instrumentacion'):
+            respuesta = self.cliente.get('/api/contabilidad/reportes/resumen/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn('Server-Timing', respuesta)
+
+    @override_settings(INSTRUMENTACION_MUESTREO=0.25)
+    def test_muestreo_parcial(self):
+        with mock.patch('sistema_contable.middleware.random.random', return_value=0.5):
+            self.assertNotIn('Server-Timing', self.cliente.get('/api/contabilidad/reportes/resumen/'))
+        with mock.patch('sistema_contable.middleware.random.random', return_value=0.1):
+            respuesta, medicion = self.medir()
+        self.assertIn('Server-Timing', respuesta)
+        self.assertEqual(medicion['muestreo'], 0.25)
+
+    def test_huella_iguala_listas_in_de_distinto_largo(self):
+        self.assertEqual(
+            huella_sql('SELECT * FROM t WHERE id IN (%s, %s)'),
+            huella_sql('SELECT *  FROM t\nWHERE id IN (%s, %s, %s)'),
+        )
+        self.assertNotEqual(huella_sql('SELECT * FROM t WHERE id = %s'), huella_sql('SELECT * FROM u WHERE id = %s'))
+
+
+# === Perfilado a pedido ===
+class PerfiladoTests(PruebaContable):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuario_comun = get_user_model().objects.create_user('comun@localhost', 'Usuario', 'Comun')
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        ajustes = override_settings(PERFILADO_DIRECTORIO=self.directorio, PERFILADO_MOTOR='cprofile')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def cliente_jwt(self, usuario):
+        # El middleware valida el token por su cuenta: force_authenticate no le llega
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(usuario).access_token}')
+        return cliente
+
+    def perfilar(self, cliente):
+        respuesta = cliente.get('/api/contabilidad/reportes/resumen/', HTTP_X_PROFILE='1')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def test_staff_obtiene_el_perfil_y_puede_descargarlo(self):
+        cliente = self.cliente_jwt(self.usuario)
+        nombre = self.perfilar(cliente)['X-Profile-Id']
+        self.assertRegex(nombre, r'^[\w-]+-api-contabilidad-reportes-resumen\.prof$')
+        self.assertEqual(os.listdir(self.directorio), [nombre])
+
+        perfiles = cliente.get('/api/perfiles/').data
+        self.assertEqual([perfil['nombre'] for perfil in perfiles], [nombre])
+        descarga = cliente.get(f'/api/perfiles/{nombre}/')
+        self.assertEqual(descarga.status_code, 200)
+        self.assertIn('attachment', descarga['Content-Disposition'])
+        descarga.close()
+        self.assertEqual(cliente.get('/api/perfiles/otro.txt/').status_code, 404)
+
+    def test_sin_permisos_la_cabecera_se_ignora(self):
+        for cliente in (self.cliente_jwt(self.usuario_comun), APIClient()):
+            respuesta = cliente.get('/api/contabilidad/reportes/resumen/', HTTP_X_PROFILE='1')
+            self.assertNotIn('X-Profile-Id', respuesta)
+        self.assertEqual(os.listdir(self.directorio), [])
+
+    def test_solo_staff_lista_y_descarga_perfiles(self):
+        nombre = self.perfilar(self.cliente_jwt(self.usuario))['X-Profile-Id']
+        comun = self.cliente_jwt(self.usuario_comun)
+        self.assertEqual(comun.get('/api/perfiles/').status_code, 403)
+        self.assertEqual(comun.get(f'/api/perfiles/{nombre}/').status_code, 403)
+        self.assertEqual(APIClient().get('/api/perfiles/').status_code, 401)
+
+    @override_settings(PERFILADO_MAXIMO=1)
+    def test_se_conservan_solo_los_perfiles_mas_recientes(self):
+        cliente = self.cliente_jwt(self.usuario)
+        self.perfilar(cliente)
+        ultimo = self.perfilar(cliente)['X-Profile-Id']
+        self.assertEqual(os.listdir(self.directorio), [ultimo])
@@ -6,6 +6,7 @@ from . import views
 router = DefaultRouter()
 router.register(r'cuentas', views.CuentaContableViewSet)
 router.register(r'asientos', views.AsientoContableViewSet)
+router.register(r'reglas-contabilizacion', views.ReglaContabilizacionViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -13,5 +14,12 @@ urlpatterns = [
     path('reportes/estado-resultados/', views.estado_resultados),
     path('reportes/balance-general/', views.balance_general),
     path('reportes/libro-diario/', views.libro_diario),
+    path('reportes/libro-diario/excel/', views.exportar_libro_diario_excel),
     path('reportes/libro-mayor/', views.libro_mayor),
+    path('reportes/resumen/', views.resumen),
+    path('cola/', views.estado_cola_contable),
+    path('reparaciones/', views.iniciar_reparacion),
+    path('reparaciones/<int:pk>/', views.estado_reparacion),
+    path('importaciones/', views.importar_documentos),
+    path('importaciones/<int:pk>/', views.estado_importacion),
 ]
\ No newline at end of file
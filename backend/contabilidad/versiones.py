@@ -0,0 +1,162 @@
+# contabilidad/versiones.py
+import logging
+import threading
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import VersionContable
+
+logger = logging.getLogger(__name__)
+
+
+def version_actual(nombre):
+    """Valor actual del contador `nombre` (0 si aún no existe). Una consulta."""
+    valor = (
+        VersionContable.objects.filter(nombre=nombre)
+        .values_list('valor', flat=True).first()
+    )
+    return valor or 0
+
+
+def incrementar_version(nombre):
+    """
+    Incrementa el contador `nombre` con un UPDATE atómico, creándolo si no
+    existe. Dentro de una transacción, el nuevo valor se hace visible para
+    los demás procesos al confirmarla.
+    """
+    actualizados = VersionContable.objects.filter(nombre=nombre).update(valor=F('valor') + 1)
+    if actualizados:
+        return
+    try:
+        with transaction.atomic():
+            VersionContable.objects.create(nombre=nombre, valor=1)
+    except IntegrityError:
+        # Otro proceso lo creó al mismo tiempo
+        VersionContable.objects.filter(nombre=nombre).update(valor=F('valor') + 1)
+
+
+def incrementar_versiones(nombres):
+    """Incrementa varios contadores con un solo UPDATE (creando los que falten)."""
+    nombres = set(nombres)
+    actualizados = VersionContable.objects.filter(nombre__in=nombres).update(valor=F('valor') + 1)
+    if actualizados == len(nombres):
+        return
+    existentes = set(VersionContable.objects.filter(nombre__in=nombres).values_list('nombre', flat=True))
+    for nombre in nombres - existentes:
+        incrementar_version(nombre)
+
+
+class _IncrementosPendientes:
+    """
+    Contadores por incrementar al confirmar una transacción, con las
+    acciones a ejecutar si el incremento falla. Cada llamada a
+    incrementar_version_al_confirmar registra un callback de on_commit que
+    lo ejecuta; el primero que corre hace un solo UPDATE y los demás ya no
+    hacen nada.
+    """
+    def __init__(self):
+        self.nombres = {}
+        self.ejecutado = False
+
+    def ejecutar(self):
+        if self.ejecutado:
+            return
+        self.ejecutado = True
+        try:
+            incrementar_versiones(self.nombres)
+        except Exception:
+            logger.exception("No se pudieron incrementar las versiones %s", sorted(self.nombres))
+            for al_fallar in self.nombres.values():
+                if al_fallar is not None:
+                    al_fallar()
+
+
+# Incrementos en curso por hilo y alias de conexión (cada hilo tiene sus conexiones)
+_pendientes = threading.local()
+
+
+def incrementar_version_al_confirmar(nombre, al_fallar=None, using=None):
+    """
+    Incrementa el contador `nombre` una sola vez por transacción, después de
+    confirmarla (fuera de una transacción, de inmediato). Así el UPDATE de la
+    fila del contador, compartida por todos los procesos, no mantiene su
+    bloqueo durante la transacción que escribe: dos transacciones que
+    escriben a la vez no se esperan entre sí por el contador. Todos los
+    contadores de la transacción se incrementan juntos, con un solo UPDATE.
+
+    Entre la confirmación y el incremento, un lector puede guardar un
+    resultado con los datos nuevos bajo la versión anterior: esa clave deja
+    de usarse con el incremento. Nunca queda un resultado con datos viejos
+    bajo la versión nueva. Si el incremento falla, se registra en el log y se
+    llama a `al_fallar()` (ej. vaciar la caché que depende del contador).
+
+    Un contador registrado en una transacción (o savepoint) revertida se
+    incrementa con la siguiente confirmación: solo invalida de más.
+    """
+    conexion = transaction.get_connection(using)
+    if not conexion.in_atomic_block:
+        lote = _IncrementosPendientes()
+        lote.nombres[nombre] = al_fallar
+        lote.ejecutar()
+        return
+
+    lotes = getattr(_pendientes, 'por_alias', None)
+    if lotes is None:
+        lotes = _pendientes.por_alias = {}
+    lote = lotes.get(conexion.alias)
+    if lote is None or lote.ejecutado:
+        lote = lotes[conexion.alias] = _IncrementosPendientes()
+    lote.nombres.setdefault(nombre, al_fallar)
+    transaction.on_commit(lote.ejecutar, using=conexion.alias, robust=True)
+
+
+# Cachés registradas, para verificarlas todas al comenzar cada petición
+_caches = []
+
+
+class CacheVersionada:
+    """
+    Valor calculado una vez por proceso con `cargar()` y recalculado solo
+    cuando cambia el contador `nombre` de VersionContable.
+
+    La versión no se consulta en cada uso: `verificar()` (conectada a
+    `request_started` mediante `verificar_caches`) marca la caché y el
+    primer uso posterior compara la versión con una consulta.
+    """
+    def __init__(self, nombre, cargar):
+        self.nombre = nombre
+        self.cargar = cargar
+        self._valor = None
+        self._version = None
+        self._verificar = True
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    def obtener(self):
+        if self._version is not None and not self._verificar:
+            return self._valor
+
+        with self._lock:
+            if self._version is None or self._verificar:
+                version = version_actual(self.nombre)
+                if version != self._version:
+                    self._valor = self.cargar()
+                    self._version = version
+                self._verificar = False
+            return self._valor
+
+    def verificar(self):
+        self._verificar = True
+
+    def invalidar(self):
+        """
+        Registra un cambio en los datos de origen: incrementa la versión
+        para los demás workers y, al confirmarse la transacción, fuerza la
+        recarga en este.
+        """
+        incrementar_version(self.nombre)
+        transaction.on_commit(self.verificar)
+
+
+def verificar_caches(**kwargs):
+    for cache in _caches:
+        cache.verificar()
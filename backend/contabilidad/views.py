@@ -1,36 +1,177 @@
 # contabilidad/views.py
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from django.utils.dateparse import parse_date
 from django.db.models import Sum
-from .models import CuentaContable, AsientoContable, Movimiento
-from .serializers import CuentaContableSerializer, AsientoContableSerializer
-import pandas as pd
-from django.http import HttpResponse
+from .models import (
+    CuentaContable, AsientoContable, Movimiento, ReglaContabilizacion, SaldoCuenta,
+    TareaImportacion, TareaReparacion,
+)
+from .serializers import (
+    CuentaContableSerializer, AsientoContableSerializer, ReglaContabilizacionSerializer,
+    precargar_cuentas,
+)
+from .contabilizacion import registrar_asientos
+from .cola import estado_cola
+from .reparacion import TIPOS_DOCUMENTO
+from .tareas import iniciar_tarea_importacion, iniciar_tarea_reparacion, marcar_tareas_abandonadas
+from .importacion import Importador, leer_filas, FORMATOS as FORMATOS_IMPORTACION
+from .ledger import (
+    saldos_cuentas, acumular_por_nivel, signo_saldo,
+    movimientos_mayor, saldos_anteriores, saldos_al_inicio,
+)
+from .paginacion import FechaIdCursorPagination, LibroMayorPagination
+from .cache_reportes import reporte_cacheado
+from django.conf import settings
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from openpyxl import Workbook
+import os
+import tempfile
+import time
 
 class CuentaContableViewSet(viewsets.ModelViewSet):
     queryset = CuentaContable.objects.all().order_by('codigo')
     serializer_class = CuentaContableSerializer
 
+class ReglaContabilizacionViewSet(viewsets.ModelViewSet):
+    """Reglas de los asientos automáticos de compras y ventas."""
+    queryset = ReglaContabilizacion.objects.select_related('cuenta').order_by('tipo_documento', 'orden', 'id')
+    serializer_class = ReglaContabilizacionSerializer
+
 class AsientoContableViewSet(viewsets.ModelViewSet):
     queryset = AsientoContable.objects.all().order_by('-fecha')
     serializer_class = AsientoContableSerializer
+    pagination_class = FechaIdCursorPagination
+
+    # Máximo de asientos aceptados en una sola petición a /asientos/lote/
+    lote_maximo = 10000
+
+    def get_serializer_context(self):
+        contexto = super().get_serializer_context()
+        # Todas las cuentas de los movimientos del asiento en una sola consulta
+        if self.action in ('create', 'update', 'partial_update'):
+            contexto['cuentas'] = precargar_cuentas([self.request.data])
+        return contexto
+
+    @action(detail=False, methods=['post'], url_path='lote')
+    def lote(self, request):
+        """
+        Registra muchos asientos en una sola petición.
+
+        Acepta una lista de asientos o {"asientos": [...], "atomico": false}.
+        Todos se validan antes de guardar; los válidos se insertan con
+        bulk_create en una transacción. Con "atomico": true (o ?atomico=1)
+        basta un error para que no se guarde ninguno.
+        """
+        inicio = time.perf_counter()
+        datos = request.data
+        atomico = request.query_params.get('atomico') in ('1', 'true')
+        if isinstance(datos, dict):
+            atomico = bool(datos.get('atomico', atomico))
+            datos = datos.get('asientos')
+
+        if not isinstance(datos, list) or not datos:
+            return Response(
+                {'error': 'Debe enviar una lista de asientos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(datos) > self.lote_maximo:
+            return Response(
+                {'error': f'Máximo {self.lote_maximo} asientos por lote'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Todas las cuentas del lote en una sola consulta
+        contexto = self.get_serializer_context()
+        contexto['cuentas'] = precargar_cuentas(datos)
+
+        validos = []
+        errores = []
+        for indice, item in enumerate(datos):
+            serializer = AsientoContableSerializer(data=item, context=contexto)
+            if serializer.is_valid():
+                validos.append(serializer.validated_data)
+            else:
+                errores.append({'indice': indice, 'errores': serializer.errors})
+
+        if errores and (atomico or not validos):
+            return Response({
+                'creados': 0,
+                'ids': [],
+                'errores': errores,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        asientos = registrar_asientos(validos, usuario=request.user)
+
+        duracion = time.perf_counter() - inicio
+        return Response({
+            'creados': len(asientos),
+            'ids': [asiento.id for asiento in asientos],
+            'errores': errores,
+            'duracion_segundos': round(duracion, 3),
+            'asientos_por_segundo': round(len(asientos) / duracion, 1) if duracion else None,
+        }, status=status.HTTP_201_CREATED)
+
+def _fecha_param(request, nombre):
+    valor = request.query_params.get(nombre)
+    if not valor:
+        return None
+    fecha = parse_date(valor)
+    if fecha is None:
+        raise ValidationError({nombre: 'Formato de fecha inválido, use AAAA-MM-DD.'})
+    return fecha
+
+
+def _nivel_param(request):
+    valor = request.query_params.get('nivel')
+    if not valor:
+        return None
+    try:
+        nivel = int(valor)
+    except ValueError:
+        nivel = 0
+    if nivel < 1:
+        raise ValidationError({'nivel': 'Debe ser un entero mayor o igual a 1.'})
+    return nivel
+
 
 @api_view(['GET'])
+@reporte_cacheado('balance_comprobacion')
 def balance_comprobacion(request):
-    cuentas = CuentaContable.objects.all()
+    """
+    Sumas de debe y haber por cuenta. Acepta ?desde= y ?hasta= (AAAA-MM-DD).
+    Con ?nivel=N devuelve los subtotales del árbol de clasificación hasta ese nivel.
+    """
+    cuentas = saldos_cuentas(
+        desde=_fecha_param(request, 'desde'),
+        hasta=_fecha_param(request, 'hasta'),
+    )
+    nivel = _nivel_param(request)
+    if nivel:
+        return Response([
+            {
+                'codigo': nodo['codigo'],
+                'nombre': nodo['nombre'],
+                'nivel': nodo['nivel'],
+                'tipo': nodo['tipo'],
+                'debe': round(nodo['debe'], 2),
+                'haber': round(nodo['haber'], 2)
+            }
+            for nodo in acumular_por_nivel(cuentas, nivel)
+        ])
+
     resultado = []
 
     for cuenta in cuentas:
-        movimientos = Movimiento.objects.filter(cuenta=cuenta)
-        debe = movimientos.aggregate(Sum('debe'))['debe__sum'] or 0
-        haber = movimientos.aggregate(Sum('haber'))['haber__sum'] or 0
         resultado.append({
-            'codigo': cuenta.codigo,
-            'nombre': cuenta.nombre,
-            'tipo': cuenta.tipo,
-            'debe': round(debe, 2),
-            'haber': round(haber, 2)
+            'codigo': cuenta['codigo'],
+            'nombre': cuenta['nombre'],
+            'tipo': cuenta['tipo'],
+            'debe': round(cuenta['debe'], 2),
+            'haber': round(cuenta['haber'], 2)
         })
 
     return Response(resultado)
@@ -38,39 +179,55 @@ def balance_comprobacion(request):
 
 # INICIO BALANCE GENERAL
 @api_view(['GET'])
+@reporte_cacheado('balance_general')
 def balance_general(request):
     """
-    Retorna el Balance General agrupado por clasificación
+    Retorna el Balance General agrupado por clasificación.
+    Acepta ?hasta= (AAAA-MM-DD) como fecha de corte y ?nivel=N para
+    devolver subtotales por nivel del árbol de clasificación en lugar de cuentas.
     """
     activo = []
     pasivo = []
     patrimonio = []
 
-    cuentas = CuentaContable.objects.prefetch_related('movimientos').order_by('codigo')
+    cuentas = saldos_cuentas(hasta=_fecha_param(request, 'hasta'))
+    nivel = _nivel_param(request)
 
     for cuenta in cuentas:
-        saldo = cuenta.calcular_saldo()  # Asegúrate de tener este método
+        saldo = cuenta['saldo']
         if saldo == 0:
             continue
 
         data = {
-            'codigo': cuenta.codigo,
-            'nombre': cuenta.nombre,
+            'codigo': cuenta['codigo'],
+            'nombre': cuenta['nombre'],
             'saldo': float(saldo),
         }
 
         # Clasificar
-        if cuenta.clasificacion.startswith('1'):
+        if cuenta['clasificacion'].startswith('1'):
             activo.append(data)
-        elif cuenta.clasificacion.startswith('2'):
+        elif cuenta['clasificacion'].startswith('2'):
             pasivo.append(data)
-        elif cuenta.clasificacion.startswith('3'):
+        elif cuenta['clasificacion'].startswith('3'):
             patrimonio.append(data)
 
     total_activo = sum(item['saldo'] for item in activo)
     total_pasivo = sum(item['saldo'] for item in pasivo)
     total_patrimonio = sum(item['saldo'] for item in patrimonio)
 
+    if nivel:
+        grupos = {'1': [], '2': [], '3': []}
+        for nodo in acumular_por_nivel(cuentas, nivel):
+            if nodo['saldo'] != 0 and nodo['codigo'][0] in grupos:
+                grupos[nodo['codigo'][0]].append({
+                    'codigo': nodo['codigo'],
+                    'nombre': nodo['nombre'],
+                    'nivel': nodo['nivel'],
+                    'saldo': float(nodo['saldo']),
+                })
+        activo, pasivo, patrimonio = grupos['1'], grupos['2'], grupos['3']
+
     return Response({
         'activo': activo,
         'pasivo': pasivo,
@@ -85,9 +242,13 @@ def balance_general(request):
 @api_view(['GET'])
 def libro_diario(request):
     """
-    Retorna todos los asientos contables ordenados por fecha.
+    Retorna los asientos contables ordenados por fecha, paginados por cursor
+    (?cursor=..., ?page_size=N).
     Formato:
-    [
+    {
+        "next": "<url con cursor>",
+        "previous": null,
+        "results": [
         {
             "id": 1,
             "fecha": "2025-09-09",
@@ -100,9 +261,14 @@ def libro_diario(request):
             "total_debe": 500,
             "total_haber": 500
         }
-    ]
+        ]
+    }
     """
-    asientos = AsientoContable.objects.all().order_by('-fecha')
+    paginador = FechaIdCursorPagination()
+    asientos = paginador.paginate_queryset(
+        AsientoContable.objects.select_related('usuario').prefetch_related('movimientos__cuenta'),
+        request
+    )
     resultado = []
 
     for asiento in asientos:
@@ -132,163 +298,361 @@ def libro_diario(request):
             'total_haber': round(total_haber, 2),
         })
 
-    return Response(resultado)
+    return paginador.get_paginated_response(resultado)
+
+def _saldos_iniciales_mayor(paginador, filas, primeras, desde, hasta):
+    """
+    Saldo (Debe - Haber) de cada cuenta antes de su primera fila en la página:
+    - La cuenta de la fila del cursor: el saldo que trae el cursor.
+    - La primera cuenta de una página hacia atrás (o con un cursor sin saldo):
+      puede empezar a mitad del periodo, saldos_anteriores().
+    - Las demás empiezan en el inicio del periodo: saldos_al_inicio().
+    """
+    iniciales = {}
+    cuenta_cursor = paginador.cuenta_cursor
+    if paginador.saldo_cursor is not None and cuenta_cursor in primeras:
+        saldo = paginador.saldo_cursor
+        if paginador.reverso:
+            # El cursor trae el saldo después de la última fila de la página
+            saldo -= sum(fila['debe'] - fila['haber'] for fila in filas if fila['cuenta_id'] == cuenta_cursor)
+        iniciales[cuenta_cursor] = saldo
+
+    pendientes = [cuenta_id for cuenta_id in primeras if cuenta_id not in iniciales]
+    continua = paginador.datos_cursor and (paginador.reverso or paginador.saldo_cursor is None)
+    if pendientes and continua and pendientes[0] == filas[0]['cuenta_id']:
+        primera = pendientes.pop(0)
+        iniciales.update(saldos_anteriores({primera: primeras[primera]}))
+    if pendientes:
+        iniciales.update(saldos_al_inicio(pendientes, desde, hasta))
+    return iniciales
+
 
 # contabilidad/views.py
 @api_view(['GET'])
 def libro_mayor(request):
-    cuenta_id = request.query_params.get('cuenta_id')
-    if not cuenta_id:
+    """
+    Libro Mayor de una o varias cuentas, paginado por cursor.
+
+    Parámetros:
+    - cuenta_id: una o varias cuentas (?cuenta_id=1&cuenta_id=2 o ?cuenta_id=1,2)
+    - prefijo: todas las cuentas de una clasificación (ej. ?prefijo=111)
+    - desde / hasta: periodo (AAAA-MM-DD); `saldo_inicial` es el saldo anterior a `desde`
+    - cursor / page_size: paginación
+
+    El saldo acumulado se calcula en la base de datos con una función de ventana
+    y se expresa según la naturaleza de la cuenta (deudora o acreedora). En cada
+    página `saldo_inicial` es el saldo con que la cuenta llega a su primera fila.
+    """
+    cuenta_ids = [
+        valor.strip()
+        for parametro in request.query_params.getlist('cuenta_id')
+        for valor in parametro.split(',')
+        if valor.strip()
+    ]
+    prefijo = request.query_params.get('prefijo')
+    if not cuenta_ids and not prefijo:
         return Response(
-            {'error': 'Debe proporcionar cuenta_id'},
+            {'error': 'Debe proporcionar cuenta_id o prefijo'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    try:
-        cuenta = CuentaContable.objects.get(id=cuenta_id)
-    except CuentaContable.DoesNotExist:
+    cuentas = CuentaContable.objects.order_by('codigo')
+    if cuenta_ids:
+        if not all(valor.isdigit() for valor in cuenta_ids):
+            raise ValidationError({'cuenta_id': 'Debe ser un número entero.'})
+        cuentas = cuentas.filter(id__in=cuenta_ids)
+    if prefijo:
+        cuentas = cuentas.filter(clasificacion__startswith=prefijo)
+    cuentas = {cuenta.id: cuenta for cuenta in cuentas}
+    if not cuentas:
         return Response(
             {'error': 'Cuenta no encontrada'},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    movimientos = Movimiento.objects.filter(cuenta=cuenta).select_related('asiento').order_by('asiento__fecha')
-    resultado = []
+    desde = _fecha_param(request, 'desde')
+    hasta = _fecha_param(request, 'hasta')
+    paginador = LibroMayorPagination()
+    filas = paginador.paginate_queryset(movimientos_mayor(list(cuentas), desde=desde, hasta=hasta), request)
+
+    # Saldo con el que cada cuenta llega a su primera fila de la página
+    primeras = {}
+    for fila in filas:
+        primeras.setdefault(fila['cuenta_id'], fila)
+    anteriores = _saldos_iniciales_mayor(paginador, filas, primeras, desde, hasta)
+
+    # El acumulado de la ventana parte de la primera fila de la página; se
+    # normaliza restando el acumulado previo a la primera fila de cada cuenta
+    base = {
+        cuenta_id: fila['acumulado'] - (fila['debe'] - fila['haber'])
+        for cuenta_id, fila in primeras.items()
+    }
+
+    por_cuenta = {}
+    saldo = None
+    for fila in filas:
+        cuenta_id = fila['cuenta_id']
+        saldo = anteriores[cuenta_id] + fila['acumulado'] - base[cuenta_id]
+        por_cuenta.setdefault(cuenta_id, []).append({
+            'fecha': fila['fecha'],
+            'asiento_id': fila['asiento_id'],
+            'descripcion': fila['asiento__descripcion'],
+            'debe': float(fila['debe']),
+            'haber': float(fila['haber']),
+            'saldo': round(float(saldo * signo_saldo(cuentas[cuenta_id].tipo)), 2)
+        })
+
+    # Los cursores llevan el saldo de su borde: la página siguiente o anterior
+    # no vuelve a calcularlo
+    if filas:
+        paginador.saldo_siguiente = saldo
+        paginador.saldo_anterior = anteriores[filas[0]['cuenta_id']]
 
-    saldo = 0
-    for mov in movimientos:
-        debe = float(mov.debe)
-        haber = float(mov.haber)
-        saldo += debe - haber
+    resultado = []
+    for cuenta_id, movimientos in por_cuenta.items():
+        cuenta = cuentas[cuenta_id]
         resultado.append({
-            'fecha': mov.asiento.fecha,
-            'asiento_id': mov.asiento.id,
-            'descripcion': mov.asiento.descripcion,
-            'debe': debe,
-            'haber': haber,
-            'saldo': round(saldo, 2)
+            'cuenta': {
+                'id': cuenta.id,
+                'codigo': cuenta.codigo,
+                'nombre': cuenta.nombre,
+                'tipo': cuenta.tipo
+            },
+            'saldo_inicial': round(float(anteriores[cuenta_id] * signo_saldo(cuenta.tipo)), 2),
+            'movimientos': movimientos,
         })
 
-    return Response({
-        'cuenta': {
-            'codigo': cuenta.codigo,
-            'nombre': cuenta.nombre,
-            'tipo': cuenta.tipo
-        },
-        'movimientos': resultado
-    })
-    
+    paginacion = {
+        'next': paginador.get_next_link(),
+        'previous': paginador.get_previous_link(),
+    }
+
+    # Una sola cuenta: mismo formato de siempre, más saldo inicial y cursores
+    if len(cuentas) == 1 and not prefijo:
+        if resultado:
+            return Response({**resultado[0], **paginacion})
+        cuenta = next(iter(cuentas.values()))
+        saldo_inicial = saldos_al_inicio([cuenta.id], desde, hasta)[cuenta.id]
+        return Response({
+            'cuenta': {
+                'id': cuenta.id,
+                'codigo': cuenta.codigo,
+                'nombre': cuenta.nombre,
+                'tipo': cuenta.tipo
+            },
+            'saldo_inicial': round(float(saldo_inicial * signo_saldo(cuenta.tipo)), 2),
+            'movimientos': [],
+            **paginacion
+        })
+
+    return Response({'cuentas': resultado, **paginacion})
+
 @api_view(['GET'])
 def exportar_libro_diario_excel(request):
-    asientos = AsientoContable.objects.all().order_by('-fecha')
-    data = []
+    """
+    Exporta el Libro Diario a Excel. Acepta ?desde= y ?hasta= (AAAA-MM-DD).
 
-    for asiento in asientos:
-        for movimiento in asiento.movimientos.all():
-            data.append({
-                'Fecha': asiento.fecha,
-                'Asiento ID': asiento.id,
-                'Descripción': asiento.descripcion,
-                'Cuenta': movimiento.cuenta.codigo,
-                'Nombre': movimiento.cuenta.nombre,
-                'Debe': movimiento.debe,
-                'Haber': movimiento.haber,
-            })
+    Los movimientos se leen por bloques y se escriben con openpyxl en modo
+    write-only sobre un archivo temporal, así la memoria usada no depende
+    de la cantidad de filas exportadas.
+    """
+    desde = _fecha_param(request, 'desde')
+    hasta = _fecha_param(request, 'hasta')
+
+    movimientos = Movimiento.objects.select_related('asiento', 'cuenta')
+    if desde:
+        movimientos = movimientos.filter(asiento__fecha__gte=desde)
+    if hasta:
+        movimientos = movimientos.filter(asiento__fecha__lte=hasta)
+    filas = movimientos.order_by('-asiento__fecha', '-asiento_id', 'id').values_list(
+        'asiento__fecha', 'asiento_id', 'asiento__descripcion',
+        'cuenta__codigo', 'cuenta__nombre', 'debe', 'haber'
+    )
 
-    df = pd.DataFrame(data)
-    response = HttpResponse(
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Libro Diario')
+    hoja.append(['Fecha', 'Asiento ID', 'Descripción', 'Cuenta', 'Nombre', 'Debe', 'Haber'])
+    for fila in filas.iterator(chunk_size=2000):
+        hoja.append(fila)
+
+    # Hasta 10 MB en memoria; por encima se vuelca a disco
+    archivo = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+    libro.save(archivo)
+    archivo.seek(0)
+
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename='libro-diario.xlsx',
         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
-    response['Content-Disposition'] = 'attachment; filename="libro-diario.xlsx"'
-    df.to_excel(response, index=False)
-    return response
 
 
 @api_view(['GET'])
+@reporte_cacheado('estado_resultados')
 def estado_resultados(request):
     """
-    Genera el Estado de Resultados según el P.C.G.A. venezolano
+    Genera el Estado de Resultados según el P.C.G.A. venezolano.
+    Acepta ?desde= y ?hasta= (AAAA-MM-DD) para limitar el periodo.
     """
-    # 1. INGRESOS (Cuentas que empiezan con '4')
-    ingresos = []
-    total_ingresos = 0
-
-    cuentas_ingresos = CuentaContable.objects.filter(clasificacion__startswith='4').order_by('codigo')
-    for cuenta in cuentas_ingresos:
-        saldo = cuenta.calcular_saldo()  # Haber - Debe
-        if saldo != 0:
-            ingresos.append({
-                'codigo': cuenta.codigo,
-                'nombre': cuenta.nombre,
-                'saldo': float(saldo)
-            })
-            total_ingresos += saldo
+    cuentas = saldos_cuentas(
+        desde=_fecha_param(request, 'desde'),
+        hasta=_fecha_param(request, 'hasta'),
+    )
 
-    # 2. COSTO DE VENTAS (Cuentas que empiezan con '5')
-    costo_ventas = []
-    total_costo = 0
+    # Secciones por prefijo de clasificación; '43' va antes que '4' para que
+    # los otros ingresos no se cuenten también como ingresos operativos
+    secciones = [
+        ('otros_ingresos', '43'),  # OTROS INGRESOS
+        ('ingresos', '4'),         # INGRESOS: Haber - Debe
+        ('costo_ventas', '5'),     # COSTO DE VENTAS: Debe - Haber
+        ('gastos', '6'),           # GASTOS OPERATIVOS: Debe - Haber
+    ]
+    filas = {nombre: [] for nombre, _ in secciones}
+    totales = {nombre: 0 for nombre, _ in secciones}
 
-    cuentas_costo = CuentaContable.objects.filter(clasificacion__startswith='5').order_by('codigo')
-    for cuenta in cuentas_costo:
-        saldo = cuenta.calcular_saldo()  # Debe - Haber
-        if saldo != 0:
-            costo_ventas.append({
-                'codigo': cuenta.codigo,
-                'nombre': cuenta.nombre,
-                'saldo': float(saldo)
-            })
-            total_costo += saldo
+    for cuenta in cuentas:
+        saldo = cuenta['saldo']
+        if saldo == 0:
+            continue
+        for nombre, prefijo in secciones:
+            if cuenta['clasificacion'].startswith(prefijo):
+                filas[nombre].append({
+                    'codigo': cuenta['codigo'],
+                    'nombre': cuenta['nombre'],
+                    'saldo': float(saldo)
+                })
+                totales[nombre] += saldo
+                break
+
+    total_ingresos = totales['ingresos']
+    total_costo = totales['costo_ventas']
+    total_gastos = totales['gastos']
+    total_otros_ingresos = totales['otros_ingresos']
 
     utilidad_bruta = total_ingresos - total_costo
-
-    # 3. GASTOS OPERATIVOS (Gastos administrativos y de ventas: '6')
-    gastos = []
-    total_gastos = 0
-
-    cuentas_gastos = CuentaContable.objects.filter(clasificacion__startswith='6').order_by('codigo')
-    for cuenta in cuentas_gastos:
-        saldo = cuenta.calcular_saldo()  # Debe - Haber
-        if saldo != 0:
-            gastos.append({
-                'codigo': cuenta.codigo,
-                'nombre': cuenta.nombre,
-                'saldo': float(saldo)
-            })
-            total_gastos += saldo
-
     utilidad_operativa = utilidad_bruta - total_gastos
-
-    # 4. Otros ingresos y gastos (si los tienes, ej: '43', '7', etc.)
-    otros_ingresos = []
-    total_otros_ingresos = 0
-
-    cuentas_otros_ingresos = CuentaContable.objects.filter(
-        clasificacion__startswith='43'  # "OTROS INGRESOS"
-    ).order_by('codigo')
-
-    for cuenta in cuentas_otros_ingresos:
-        saldo = cuenta.calcular_saldo()
-        if saldo != 0:
-            otros_ingresos.append({
-                'codigo': cuenta.codigo,
-                'nombre': cuenta.nombre,
-                'saldo': float(saldo)
-            })
-            total_otros_ingresos += saldo
-
-    # 5. Utilidad Neta
     utilidad_neta = utilidad_operativa + total_otros_ingresos
 
     return Response({
-        'ingresos': ingresos,
+        'ingresos': filas['ingresos'],
         'total_ingresos': round(float(total_ingresos), 2),
-        'costo_ventas': costo_ventas,
+        'costo_ventas': filas['costo_ventas'],
         'total_costo_ventas': round(float(total_costo), 2),
         'utilidad_bruta': round(float(utilidad_bruta), 2),
-        'gastos_operativos': gastos,
+        'gastos_operativos': filas['gastos'],
         'total_gastos_operativos': round(float(total_gastos), 2),
         'utilidad_operativa': round(float(utilidad_operativa), 2),
-        'otros_ingresos': otros_ingresos,
+        'otros_ingresos': filas['otros_ingresos'],
         'total_otros_ingresos': round(float(total_otros_ingresos), 2),
         'utilidad_neta': round(float(utilidad_neta), 2),
-    })
\ No newline at end of file
+    })
+
+
+@api_view(['GET'])
+def resumen(request):
+    """
+    Totales para el dashboard (los listados paginados por cursor no traen `count`).
+    Los movimientos se suman desde SaldoCuenta: una fila por cuenta.
+    """
+    return Response({
+        'total_cuentas': CuentaContable.objects.count(),
+        'total_asientos': AsientoContable.objects.count(),
+        'total_movimientos': SaldoCuenta.objects.aggregate(total=Sum('cantidad_movimientos'))['total'] or 0,
+    })
+
+
+@api_view(['GET'])
+def estado_cola_contable(request):
+    """
+    Estado de la cola de contabilización asíncrona: trabajos pendientes,
+    fallidos y retraso (segundos del pendiente más antiguo).
+    """
+    return Response(estado_cola())
+
+
+@api_view(['POST'])
+def iniciar_reparacion(request):
+    """
+    Inicia en segundo plano la reparación de documentos sin asiento.
+    Body opcional: {"tipos": ["venta", "compra"]}. Devuelve el id de la tarea.
+    """
+    tipos = request.data.get('tipos') or TIPOS_DOCUMENTO
+    if not isinstance(tipos, (list, tuple)) or not set(tipos) <= set(TIPOS_DOCUMENTO):
+        raise ValidationError({'tipos': f"Tipos válidos: {', '.join(TIPOS_DOCUMENTO)}."})
+
+    tarea = iniciar_tarea_reparacion(usuario=request.user, tipos=tipos)
+    return Response(_tarea(tarea), status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+def estado_reparacion(request, pk):
+    # Una tarea cuyo proceso murió se informa como 'error', no 'en_proceso' para siempre
+    marcar_tareas_abandonadas()
+    tarea = get_object_or_404(TareaReparacion, pk=pk)
+    return Response(_tarea(tarea))
+
+
+def _tarea(tarea, **extra):
+    return {
+        'id': tarea.id,
+        'estado': tarea.estado,
+        'total': tarea.total,
+        'procesados': tarea.procesados,
+        'log': tarea.log,
+        'servidor': tarea.servidor,
+        'pid': tarea.pid,
+        'latido_en': tarea.latido_en,
+        'creado_en': tarea.creado_en,
+        'finalizado_en': tarea.finalizado_en,
+        **extra,
+    }
+
+
+@api_view(['POST'])
+def importar_documentos(request):
+    """
+    Importa compras o ventas desde un CSV/XLSX (multipart: `archivo`, `tipo`).
+    Los archivos de más de IMPORTACIONES_MAXIMO_SINCRONO bytes se importan en
+    segundo plano: responde 202 con la tarea, consultable en
+    /api/contabilidad/importaciones/<id>/
+    """
+    archivo = request.FILES.get('archivo')
+    tipo = request.data.get('tipo')
+    if not archivo:
+        raise ValidationError({'archivo': 'Debe adjuntar un archivo .csv o .xlsx.'})
+    if tipo not in FORMATOS_IMPORTACION:
+        raise ValidationError({'tipo': f"Tipos válidos: {', '.join(FORMATOS_IMPORTACION)}."})
+
+    if archivo.size > settings.IMPORTACIONES_MAXIMO_SINCRONO:
+        # Copia en disco: la tarea puede ejecutarla otro proceso (worker de la cola)
+        os.makedirs(settings.IMPORTACIONES_DIRECTORIO, exist_ok=True)
+        extension = os.path.splitext(archivo.name)[1].lower()
+        with tempfile.NamedTemporaryFile(dir=settings.IMPORTACIONES_DIRECTORIO, suffix=extension, delete=False) as copia:
+            for trozo in archivo.chunks():
+                copia.write(trozo)
+        tarea = iniciar_tarea_importacion(tipo, copia.name, archivo.name, usuario=request.user)
+        return Response(_tarea_importacion(tarea), status=status.HTTP_202_ACCEPTED)
+
+    importador = Importador(tipo, usuario=request.user)
+    resumen = importador.importar(leer_filas(archivo, archivo.name))
+    return Response(
+        {**resumen, 'detalle_errores': importador.errores},
+        status=(
+            status.HTTP_201_CREATED if resumen['creados']
+            else status.HTTP_400_BAD_REQUEST if resumen['errores']
+            else status.HTTP_200_OK
+        )
+    )
+
+
+@api_view(['GET'])
+def estado_importacion(request, pk):
+    marcar_tareas_abandonadas()
+    tarea = get_object_or_404(TareaImportacion, pk=pk)
+    return Response(_tarea_importacion(tarea))
+
+
+def _tarea_importacion(tarea):
+    # `procesados` cuenta filas leídas; `resultado` es el resumen de la importación al terminar
+    return _tarea(tarea, tipo=tarea.tipo, nombre_archivo=tarea.nombre_archivo, resultado=tarea.resultado)
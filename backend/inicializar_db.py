@@ -10,26 +10,10 @@ def setup():
     print("🔹 Aplicando migraciones...")
     call_command('migrate')
 
-    print("🔹 Cargando roles...")
-    call_command('loaddata', 'fixtures/roles.json')
-
-    print("🔹 Cargando usuarios...")
-    call_command('loaddata', 'fixtures/usuarios.json')
-
-    print("🔹 Cargando cuentas contables...")
-    call_command('loaddata', 'fixtures/cuentas_contables.json')
-
-    print("🔹 Cargando clientes y proveedores...")
-    call_command('loaddata', 'fixtures/clientes.json')
-    call_command('loaddata', 'fixtures/proveedores.json')
-
-    print("🔹 Cargando asientos y movimientos...")
-    call_command('loaddata', 'fixtures/asientos.json')
-    call_command('loaddata', 'fixtures/movimientos.json')
-
-    print("🔹 Cargando ventas y compras...")
-    call_command('loaddata', 'fixtures/ventas.json')
-    call_command('loaddata', 'fixtures/compras.json')
+    # Roles, usuarios, plan de cuentas, clientes, proveedores, asientos,
+    # movimientos, ventas y compras, con COPY en PostgreSQL
+    print("🔹 Cargando fixtures...")
+    call_command('cargar_fixtures')
 
     print("✅ Sistema inicializado con éxito.")
 
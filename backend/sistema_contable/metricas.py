@@ -0,0 +1,195 @@
+# sistema_contable/metricas.py
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+
+# Métricas acumuladas por proceso: nombre → (tipo, ayuda, límites de los buckets)
+SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICAS = {
+    'http_request_duration_seconds': ('histogram', 'Duración de las peticiones por vista', SEGUNDOS),
+    'db_queries_per_request': (
+        'histogram',
+        'Consultas SQL por petición, solo de las muestreadas (la etiqueta muestreo da la fracción)',
+        (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+    ),
+    'db_time_seconds_per_request': (
+        'histogram', 'Tiempo SQL por petición, solo de las muestreadas (la etiqueta muestreo da la fracción)', SEGUNDOS
+    ),
+    'contabilidad_asientos_creados_total': ('counter', 'Asientos contables registrados', None),
+    'contabilidad_movimientos_creados_total': ('counter', 'Movimientos contables registrados', None),
+    'reportes_cache_total': ('counter', 'Consultas a la caché de reportes por resultado (acierto/fallo/agrupada)', None),
+}
+
+
+def _clave(etiquetas):
+    return tuple(sorted(etiquetas.items()))
+
+
+def _memoria_rss():
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _Registro:
+    """
+    Valores de este proceso. Se vuelcan como JSON a METRICAS_DIRECTORIO/<pid>.json
+    como mucho cada METRICAS_INTERVALO segundos; /metrics suma los archivos de
+    todos los procesos (workers de gunicorn, comandos de la cola, etc.).
+    """
+    def __init__(self):
+        self.bloqueo = threading.Lock()
+        self.valores = {}
+        self.ultimo_guardado = 0.0
+        self.temporizador = None
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        with self.bloqueo:
+            clave = (nombre, _clave(etiquetas))
+            self.valores[clave] = self.valores.get(clave, 0) + valor
+        self._programar()
+
+    def observar(self, nombre, valor, **etiquetas):
+        limites = METRICAS[nombre][2]
+        with self.bloqueo:
+            clave = (nombre, _clave(etiquetas))
+            # [cuenta por bucket..., +Inf] + [suma]
+            serie = self.valores.setdefault(clave, [0] * (len(limites) + 2))
+            for i, limite in enumerate(limites):
+                if valor <= limite:
+                    serie[i] += 1
+            serie[-2] += 1
+            serie[-1] += valor
+        self._programar()
+
+    def _programar(self):
+        if time.monotonic() - self.ultimo_guardado >= settings.METRICAS_INTERVALO:
+            self.guardar()
+        elif self.temporizador is None:
+            self.temporizador = threading.Timer(settings.METRICAS_INTERVALO, self.guardar)
+            self.temporizador.daemon = True
+            self.temporizador.start()
+
+    def guardar(self):
+        with self.bloqueo:
+            self.temporizador = None
+            self.ultimo_guardado = time.monotonic()
+            datos = {
+                'pid': os.getpid(),
+                'rss': _memoria_rss(),
+                'valores': [[nombre, dict(etiquetas), valor] for (nombre, etiquetas), valor in self.valores.items()],
+            }
+        directorio = Path(settings.METRICAS_DIRECTORIO)
+        directorio.mkdir(parents=True, exist_ok=True)
+        temporal = directorio / f'.{os.getpid()}.tmp'
+        temporal.write_text(json.dumps(datos), encoding='utf-8')
+        os.replace(temporal, directorio / f'{os.getpid()}.json')
+
+
+_registro = _Registro()
+incrementar = _registro.incrementar
+observar = _registro.observar
+atexit.register(lambda: _registro.valores and _registro.guardar())
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(etiquetas, **extra):
+    pares = {**dict(etiquetas), **extra}
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in sorted(pares.items())) + '}'
+
+
+def exponer(indicadores=()):
+    """
+    Texto en el formato de exposición de Prometheus con los valores sumados
+    de todos los procesos, la memoria RSS de los que siguen vivos y los
+    `indicadores` instantáneos [(nombre, ayuda, valor), ...] calculados al momento.
+    """
+    _registro.guardar()
+    totales = {}
+    memoria = {}
+    for ruta in Path(settings.METRICAS_DIRECTORIO).glob('*.json'):
+        try:
+            datos = json.loads(ruta.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        if _proceso_vivo(datos['pid']):
+            memoria[datos['pid']] = datos['rss']
+        for nombre, etiquetas, valor in datos['valores']:
+            if nombre not in METRICAS:
+                continue
+            clave = (nombre, _clave(etiquetas))
+            if isinstance(valor, list):
+                actual = totales.setdefault(clave, [0] * len(valor))
+                totales[clave] = [a + b for a, b in zip(actual, valor)]
+            else:
+                totales[clave] = totales.get(clave, 0) + valor
+
+    lineas = []
+    for nombre, (tipo, ayuda, limites) in METRICAS.items():
+        lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+        for (serie, etiquetas), valor in sorted(totales.items()):
+            if serie != nombre:
+                continue
+            if tipo == 'counter':
+                lineas.append(f'{nombre}{_etiquetas(etiquetas)} {valor}')
+                continue
+            for limite, cantidad in zip(limites, valor):
+                lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas, le=limite)} {cantidad}')
+            lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas, le="+Inf")} {valor[-2]}')
+            lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {valor[-2]}')
+            lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {round(valor[-1], 6)}')
+
+    lineas += ['# HELP process_resident_memory_bytes Memoria RSS por proceso', '# TYPE process_resident_memory_bytes gauge']
+    lineas += [f'process_resident_memory_bytes{_etiquetas((), pid=pid)} {rss}' for pid, rss in sorted(memoria.items())]
+
+    for nombre, ayuda, valor in indicadores:
+        lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} gauge', f'{nombre} {valor}']
+    return '\n'.join(lineas) + '\n'
+
+
+class MetricasMiddleware:
+    """
+    Registra la duración de cada petición por vista y, si la petición fue
+    muestreada por InstrumentacionSQLMiddleware (debe ir después en
+    MIDDLEWARE), sus consultas y tiempo SQL. Estos dos histogramas cuentan
+    solo las peticiones muestreadas: llevan la etiqueta `muestreo` con la
+    fracción (INSTRUMENTACION_MUESTREO) para poder escalarlos.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        vista = getattr(request.resolver_match, 'view_name', None) or 'sin_ruta'
+        observar('http_request_duration_seconds', duracion, vista=vista, metodo=request.method)
+        medicion = getattr(request, 'instrumentacion', None)
+        if medicion:
+            muestreo = medicion['muestreo']
+            observar('db_queries_per_request', medicion['consultas'], vista=vista, muestreo=muestreo)
+            observar('db_time_seconds_per_request', medicion['sql_ms'] / 1000, vista=vista, muestreo=muestreo)
+        return response
@@ -0,0 +1,109 @@
+# sistema_contable/middleware.py
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('sistema_contable.instrumentacion')
+
+# Listas IN (%s, %s, ...) de distinto largo cuentan como la misma consulta
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+def huella_sql(sql):
+    """Forma normalizada de una consulta: iguales salvo por sus parámetros → misma huella."""
+    return _LISTA_PARAMETROS.sub('(...)', ' '.join(sql.split()))
+
+
+class _RegistroSQL:
+    """execute_wrapper que acumula cantidad, tiempo y huellas de las consultas."""
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo = 0.0
+        self.huellas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - inicio
+            self.consultas += 1
+            self.huellas[huella_sql(sql)] += 1
+
+
+class InstrumentacionSQLMiddleware:
+    """
+    Mide por petición las consultas SQL (cantidad, tiempo, consultas repetidas
+    con la misma huella: la firma de un N+1) y el tiempo de renderizado de la
+    respuesta (serialización JSON de DRF). Lo devuelve en la cabecera
+    `Server-Timing` y escribe una línea JSON en el logger
+    'sistema_contable.instrumentacion'.
+
+    INSTRUMENTACION_MUESTREO (0 a 1) es la fracción de peticiones medidas;
+    las demás solo pagan una comparación con un número aleatorio.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        muestreo = getattr(settings, 'INSTRUMENTACION_MUESTREO', 0.01)
+        if muestreo <= 0 or (muestreo < 1 and random.random() >= muestreo):
+            return self.get_response(request)
+
+        registro = _RegistroSQL()
+        request._render = [None, None]
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        inicio_render, fin_render = request._render
+        render = (fin_render - inicio_render) if inicio_render and fin_render else 0.0
+        duplicadas = {huella: cantidad for huella, cantidad in registro.huellas.items() if cantidad > 1}
+        medicion = {
+            'metodo': request.method,
+            'ruta': request.path,
+            'vista': getattr(request.resolver_match, 'view_name', None),
+            'estado': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'sql_ms': round(registro.tiempo * 1000, 2),
+            'consultas': registro.consultas,
+            'consultas_repetidas': sum(cantidad - 1 for cantidad in duplicadas.values()),
+            'render_ms': round(render * 1000, 2),
+            'muestreo': min(muestreo, 1),
+        }
+        if duplicadas:
+            huella, cantidad = max(duplicadas.items(), key=lambda item: item[1])
+            medicion['repetida_mas'] = {'sql': huella[:200], 'veces': cantidad}
+        # Disponible para otros componentes (ej. métricas)
+        request.instrumentacion = medicion
+
+        app = max(total - registro.tiempo - render, 0.0)
+        response['Server-Timing'] = ', '.join([
+            f'sql;dur={medicion["sql_ms"]};desc="{registro.consultas} consultas"',
+            f'dup;desc="{medicion["consultas_repetidas"]} repetidas"',
+            f'render;dur={medicion["render_ms"]}',
+            f'app;dur={round(app * 1000, 2)}',
+            f'total;dur={medicion["total_ms"]}',
+        ])
+        logger.info(json.dumps(medicion, ensure_ascii=False))
+        return response
+
+    def process_template_response(self, request, response):
+        # Las respuestas de DRF se renderizan (JSON) justo después de este método
+        if hasattr(request, '_render'):
+            request._render[0] = time.perf_counter()
+            response.add_post_render_callback(lambda r: self._fin_render(request))
+        return response
+
+    @staticmethod
+    def _fin_render(request):
+        request._render[1] = time.perf_counter()
@@ -0,0 +1,98 @@
+# sistema_contable/perfilado.py
+import cProfile
+import re
+import time
+from pathlib import Path
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import BasePermission
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+# Nombres de archivo válidos para descargar (evita rutas fuera del directorio)
+NOMBRE_PERFIL = re.compile(r'^[\w-]+\.(prof|html)$')
+
+
+def es_personal(usuario):
+    """Usuarios autorizados a perfilar: staff o rol administrador."""
+    if not usuario or not usuario.is_authenticated or not usuario.is_active:
+        return False
+    return usuario.is_staff or getattr(getattr(usuario, 'rol', None), 'codigo', None) == 'admin'
+
+
+class EsPersonal(BasePermission):
+    def has_permission(self, request, view):
+        return es_personal(request.user)
+
+
+def directorio_perfiles():
+    directorio = Path(settings.PERFILADO_DIRECTORIO)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def _usuario(request):
+    # La API autentica con JWT dentro de la vista; aquí se valida el token por adelantado
+    if request.user.is_authenticated:
+        return request.user
+    try:
+        resultado = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return resultado[0] if resultado else None
+
+
+def _limpiar(directorio):
+    """Conserva solo los PERFILADO_MAXIMO perfiles más recientes."""
+    perfiles = sorted(directorio.glob('*.*'), key=lambda ruta: ruta.stat().st_mtime, reverse=True)
+    for ruta in perfiles[settings.PERFILADO_MAXIMO:]:
+        ruta.unlink(missing_ok=True)
+
+
+class PerfiladoMiddleware:
+    """
+    Perfila la petición cuando un usuario staff (o con rol admin) envía la
+    cabecera `X-Profile: 1`. Con PERFILADO_MOTOR = 'pyinstrument' y el paquete
+    instalado se usa su perfilador por muestreo (salida .html); si no, cProfile
+    (salida .prof, legible con pstats o snakeviz). El archivo queda en
+    PERFILADO_DIRECTORIO y su nombre se devuelve en la cabecera `X-Profile-Id`.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.headers.get('X-Profile') != '1' or not es_personal(_usuario(request)):
+            return self.get_response(request)
+
+        vista = re.sub(r'\W+', '-', request.path.strip('/')) or 'raiz'
+        nombre = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{vista}"[:150]
+        directorio = directorio_perfiles()
+
+        perfilador_muestreo = None
+        if settings.PERFILADO_MOTOR == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+                perfilador_muestreo = Profiler()
+            except ImportError:
+                pass
+
+        if perfilador_muestreo is not None:
+            perfilador_muestreo.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                perfilador_muestreo.stop()
+            nombre += '.html'
+            (directorio / nombre).write_text(perfilador_muestreo.output_html(), encoding='utf-8')
+        else:
+            perfilador = cProfile.Profile()
+            perfilador.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                perfilador.disable()
+            nombre += '.prof'
+            perfilador.dump_stats(directorio / nombre)
+
+        _limpiar(directorio)
+        response['X-Profile-Id'] = nombre
+        return response
@@ -2,6 +2,7 @@
 from pathlib import Path
 from decouple import config
 import os
+import tempfile
 from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -40,10 +41,13 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # ✅ Siempre al inicio
     'django.middleware.security.SecurityMiddleware',
+    'sistema_contable.metricas.MetricasMiddleware',  # Antes de la instrumentación, que le pasa los datos SQL
+    'sistema_contable.middleware.InstrumentacionSQLMiddleware',  # Server-Timing y log por petición
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'sistema_contable.perfilado.PerfiladoMiddleware',  # X-Profile: 1 (solo staff)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -126,6 +130,86 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
 }
 
+# Contabilidad
+# Con True, las compras y ventas solo encolan su asiento y el comando
+# `procesar_cola_contable` los genera por lotes fuera de la petición
+# (también ejecuta las tareas de reparación e importación iniciadas desde la API)
+CONTABILIDAD_COLA_ASINCRONA = config('CONTABILIDAD_COLA_ASINCRONA', default=False, cast=bool)
+
+# Importaciones por la API (contabilidad/importacion.py): los archivos de más de
+# IMPORTACIONES_MAXIMO_SINCRONO bytes se guardan en IMPORTACIONES_DIRECTORIO y se
+# importan en segundo plano. El directorio debe ser visible para el worker de la cola.
+IMPORTACIONES_MAXIMO_SINCRONO = config('IMPORTACIONES_MAXIMO_SINCRONO', default=2 * 1024 * 1024, cast=int)
+IMPORTACIONES_DIRECTORIO = config('IMPORTACIONES_DIRECTORIO', default=str(BASE_DIR / 'importaciones'))
+
+# Caché de reportes (contabilidad/cache_reportes.py): claves con la versión del
+# libro (no hace falta esperar a que expiren). En producción con varios workers conviene un
+# backend compartido (ej. django.core.cache.backends.redis.RedisCache o db).
+REPORTES_CACHE_ACTIVA = config('REPORTES_CACHE_ACTIVA', default=True, cast=bool)
+REPORTES_CACHE_BACKEND = config('REPORTES_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reportes': {
+        'BACKEND': REPORTES_CACHE_BACKEND,
+        'LOCATION': config('REPORTES_CACHE_LOCATION', default='reportes'),
+        # Las versiones viejas dejan de consultarse; el tiempo solo libera memoria
+        'TIMEOUT': config('REPORTES_CACHE_TIMEOUT', default=86400, cast=int),
+    },
+}
+# Peticiones idénticas simultáneas esperan al primer cálculo (advisory lock en
+# PostgreSQL, archivos de bloqueo en REPORTES_BLOQUEOS_DIRECTORIO en otros motores).
+# 'auto' (por defecto): solo si la caché 'reportes' es compartida entre workers. Con
+# una caché propia de cada worker (LocMemCache, DummyCache) los demás no ven el
+# resultado y, tras esperar el bloqueo, calcularían igual: se serializarían sin
+# agruparse. 'true' / 'false' lo fuerzan.
+REPORTES_AGRUPAR = config('REPORTES_AGRUPAR', default='auto')
+REPORTES_ESPERA_MAXIMA = config('REPORTES_ESPERA_MAXIMA', default=60, cast=float)
+REPORTES_BLOQUEOS_DIRECTORIO = config(
+    'REPORTES_BLOQUEOS_DIRECTORIO', default=os.path.join(tempfile.gettempdir(), 'sistema_contable_reportes')
+)
+
+# Instrumentación por petición (sistema_contable/middleware.py)
+# Fracción de peticiones medidas: 1 = todas, 0 = ninguna. Por defecto todas en
+# desarrollo (DEBUG) y el 1 % en producción, donde medir cada petición cuesta
+INSTRUMENTACION_MUESTREO = config('INSTRUMENTACION_MUESTREO', default=1.0 if DEBUG else 0.01, cast=float)
+
+# Perfilado a pedido con la cabecera X-Profile: 1 (sistema_contable/perfilado.py)
+# 'cprofile' o 'pyinstrument' (por muestreo, si está instalado)
+PERFILADO_MOTOR = config('PERFILADO_MOTOR', default='cprofile')
+PERFILADO_DIRECTORIO = config('PERFILADO_DIRECTORIO', default=str(BASE_DIR / 'perfiles'))
+PERFILADO_MAXIMO = config('PERFILADO_MAXIMO', default=200, cast=int)
+
+# Métricas de Prometheus en /metrics (sistema_contable/metricas.py)
+# Directorio compartido por todos los workers; vaciarlo al reiniciar el servicio
+METRICAS_DIRECTORIO = config('METRICAS_DIRECTORIO', default=str(BASE_DIR / 'metricas'))
+METRICAS_INTERVALO = config('METRICAS_INTERVALO', default=1.0, cast=float)
+# Token que Prometheus envía como `Authorization: Bearer <token>`. Sin él, /metrics
+# solo responde con DEBUG activo
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'sistema_contable.instrumentacion': {
+            'handlers': ['console'],
+            'level': config('INSTRUMENTACION_NIVEL_LOG', default='INFO'),
+            'propagate': False,
+        },
+        # Errores y avisos de tareas internas (ej. invalidación de cachés)
+        'contabilidad': {
+            'handlers': ['console'],
+            'level': config('CONTABILIDAD_NIVEL_LOG', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Simple JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
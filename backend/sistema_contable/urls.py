@@ -1,6 +1,7 @@
 # sistema_contable/urls.py
 from django.contrib import admin
 from django.urls import path, include
+from . import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -8,4 +9,7 @@ urlpatterns = [
     path('api/usuarios/', include('usuarios.urls')),
     path('api/compras/', include('compras.urls')),
     path('api/ventas/', include('ventas.urls')),
+    path('metrics', views.metricas),
+    path('api/perfiles/', views.lista_perfiles),
+    path('api/perfiles/<str:nombre>/', views.descargar_perfil),
 ]
\ No newline at end of file
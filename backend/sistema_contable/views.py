@@ -0,0 +1,65 @@
+# sistema_contable/views.py
+import hmac
+from datetime import datetime, timezone
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from contabilidad.cola import estado_cola
+from .metricas import exponer
+from .perfilado import EsPersonal, NOMBRE_PERFIL, directorio_perfiles
+
+
+@api_view(['GET'])
+@permission_classes([EsPersonal])
+def lista_perfiles(request):
+    """
+    Perfiles generados con la cabecera `X-Profile: 1`, del más reciente al más antiguo.
+    Formato: [{"nombre", "bytes", "creado_en", "url"}]
+    """
+    perfiles = []
+    for ruta in directorio_perfiles().iterdir():
+        if not NOMBRE_PERFIL.match(ruta.name):
+            continue
+        estado = ruta.stat()
+        perfiles.append({
+            'nombre': ruta.name,
+            'bytes': estado.st_size,
+            'creado_en': datetime.fromtimestamp(estado.st_mtime, tz=timezone.utc).isoformat(),
+            'url': request.build_absolute_uri(f'{ruta.name}/'),
+        })
+    perfiles.sort(key=lambda perfil: perfil['creado_en'], reverse=True)
+    return Response(perfiles)
+
+
+@api_view(['GET'])
+@permission_classes([EsPersonal])
+def descargar_perfil(request, nombre):
+    ruta = directorio_perfiles() / nombre
+    if not NOMBRE_PERFIL.match(nombre) or not ruta.is_file():
+        raise NotFound('Perfil no encontrado')
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=nombre)
+
+
+def metricas(request):
+    """
+    Métricas en formato de exposición de Prometheus, sumadas entre todos los
+    workers. Exige `Authorization: Bearer <METRICAS_TOKEN>`; sin token
+    configurado solo responde en desarrollo (DEBUG).
+    """
+    if not settings.METRICAS_TOKEN:
+        if not settings.DEBUG:
+            return HttpResponse('METRICAS_TOKEN no está configurado', status=403, content_type='text/plain')
+    elif not hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(), f'Bearer {settings.METRICAS_TOKEN}'.encode()
+    ):
+        return HttpResponse(status=401)
+
+    cola = estado_cola()
+    indicadores = [
+        ('contabilidad_cola_pendientes', 'Trabajos pendientes en la cola de contabilización', cola['pendientes']),
+        ('contabilidad_cola_fallidos', 'Trabajos fallidos en la cola de contabilización', cola['fallidos']),
+        ('contabilidad_cola_retraso_segundos', 'Antigüedad del trabajo pendiente más viejo', cola['retraso_segundos']),
+    ]
+    return HttpResponse(exponer(indicadores), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -2,7 +2,7 @@
 from django.core.management.base import BaseCommand
 from decimal import Decimal
 from usuarios.models import Usuario
-from contabilidad.models import CuentaContable, AsientoContable, Movimiento
+from contabilidad.cola import cola_asincrona
 from compras.models import Proveedor, Compra
 from ventas.models import Cliente, Venta
 
@@ -41,20 +41,7 @@ class Command(BaseCommand):
             }
         )
 
-        # === 4. Obtener cuentas contables clave ===
-        try:
-            cuenta_efectivo = CuentaContable.objects.get(codigo='1111')      # Efectivo
-            cuenta_compras = CuentaContable.objects.get(codigo='5120')      # Compras Nacionales
-            cuenta_iva = CuentaContable.objects.get(codigo='2110')          # EXP MERCANTILES (IVA)
-            cuenta_proveedores = CuentaContable.objects.get(codigo='2120')  # CUENTAS POR PAGAR
-            cuenta_ventas = CuentaContable.objects.get(codigo='4110')       # INGRESOS POR SERVICIOS
-        except CuentaContable.DoesNotExist as e:
-            self.stdout.write(
-                self.style.ERROR(f"❌ No se encontró una cuenta contable requerida: {e}")
-            )
-            return
-
-        # === 5. Registrar 3 COMPRAS ===
+        # === 4. Registrar 3 COMPRAS ===
         compras_data = [
             {'numero_factura': 'C-001', 'subtotal': Decimal('500.00'), 'impuesto_general': Decimal('80.00'), 'total': Decimal('580.00')},
             {'numero_factura': 'C-002', 'subtotal': Decimal('300.00'), 'impuesto_general': Decimal('48.00'), 'total': Decimal('348.00')},
@@ -77,21 +64,10 @@ class Command(BaseCommand):
             )
 
             if created:
-                asiento = AsientoContable.objects.create(
-                    fecha=compra.fecha,
-                    descripcion=f"Compra N° {compra.numero_factura} a {proveedor.nombre}",
-                    usuario=usuario
-                )
-
-                Movimiento.objects.create(asiento=asiento, cuenta=cuenta_compras, debe=data['subtotal'], haber=Decimal('0.00'))
-                Movimiento.objects.create(asiento=asiento, cuenta=cuenta_iva, debe=data['impuesto_general'], haber=Decimal('0.00'))
-                Movimiento.objects.create(asiento=asiento, cuenta=cuenta_proveedores, debe=Decimal('0.00'), haber=data['total'])
-                compra.asiento = asiento
-                compra.save()
+                # La señal post_save genera el asiento (o lo encola) según las reglas
+                self.informar_documento('Compra', compra)
 
-                self.stdout.write(f"✅ Compra creada: {compra.numero_factura}")
-
-        # === 6. Registrar 3 VENTAS ===
+        # === 5. Registrar 3 VENTAS ===
         ventas_data = [
             {'numero_factura': 'V-001', 'subtotal': Decimal('1000.00'), 'impuesto_general': Decimal('160.00'), 'total': Decimal('1160.00')},
             {'numero_factura': 'V-002', 'subtotal': Decimal('600.00'), 'impuesto_general': Decimal('96.00'), 'total': Decimal('696.00')},
@@ -114,25 +90,24 @@ class Command(BaseCommand):
             )
 
             if created:
-                asiento = AsientoContable.objects.create(
-                    fecha=venta.fecha,
-                    descripcion=f"Venta N° {venta.numero_factura} a {cliente.nombre}",
-                    usuario=usuario
-                )
-
-                Movimiento.objects.create(asiento=asiento, cuenta=cuenta_efectivo, debe=data['total'], haber=Decimal('0.00'))
-                Movimiento.objects.create(asiento=asiento, cuenta=cuenta_ventas, debe=Decimal('0.00'), haber=data['subtotal'])
-                Movimiento.objects.create(asiento=asiento, cuenta=cuenta_iva, debe=Decimal('0.00'), haber=data['impuesto_general'])
-                venta.asiento = asiento
-                venta.save()
-
-                self.stdout.write(f"✅ Venta creada: {venta.numero_factura}")
+                self.informar_documento('Venta', venta)
 
-        # === 7. Mensaje final ===
+        # === 6. Mensaje final ===
         self.stdout.write("\n" + "="*60)
         self.stdout.write(self.style.SUCCESS("🚀 DATOS DE PRUEBA CARGADOS"))
         self.stdout.write("="*60)
         self.stdout.write("Accede a:")
         self.stdout.write("  - Estado de Resultados")
         self.stdout.write("  - Balance General")
-        self.stdout.write("="*60)
\ No newline at end of file
+        self.stdout.write("="*60)
+
+    def informar_documento(self, nombre, documento):
+        if documento.asiento_id:
+            self.stdout.write(f"✅ {nombre} creada: {documento.numero_factura} (asiento {documento.asiento_id})")
+        elif cola_asincrona():
+            self.stdout.write(f"✅ {nombre} creada: {documento.numero_factura} (asiento en la cola contable)")
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {nombre} creada sin asiento: {documento.numero_factura} "
+                "(faltan cuentas de las reglas; use corregir_documentos_sin_asiento)"
+            ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0003_venta_fecha_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='condicion_pago',
+            field=models.CharField(choices=[('contado', 'Contado'), ('credito', 'Crédito')], default='contado', max_length=10),
+        ),
+    ]
@@ -22,6 +22,11 @@ class Venta(models.Model):
         ('anulada', 'Anulada'),
     ]
 
+    CONDICION_PAGO_CHOICES = [
+        ('contado', 'Contado'),
+        ('credito', 'Crédito'),
+    ]
+
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE)
     fecha = models.DateField()
     numero_factura = models.CharField(max_length=50, unique=True)
@@ -42,6 +47,7 @@ class Venta(models.Model):
     impuesto_adicional = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
 
     estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default='borrador')
+    condicion_pago = models.CharField(max_length=10, choices=CONDICION_PAGO_CHOICES, default='contado')
 
     # Relación contable
     asiento = models.OneToOneField(AsientoContable, on_delete=models.SET_NULL, null=True, blank=True)
@@ -53,4 +59,8 @@ class Venta(models.Model):
     class Meta:
         verbose_name = "Venta"
         verbose_name_plural = "Ventas"
-        ordering = ['-fecha']
\ No newline at end of file
+        ordering = ['-fecha']
+        indexes = [
+            # Respaldo de la paginación por cursor (fecha, id)
+            models.Index(fields=['fecha', 'id'], name='venta_fecha_id_idx'),
+        ]
\ No newline at end of file
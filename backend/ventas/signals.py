@@ -1,24 +1,29 @@
 # ventas/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Venta
-from contabilidad.models import AsientoContable, Movimiento, CuentaContable
+from .models import Venta, Cliente
+from contabilidad.cache_reportes import invalidar_documentos
+from contabilidad.models import CuentaContable
+from contabilidad.cola import contabilizar_documento
 
 @receiver(post_save, sender=Venta)
 def crear_asiento_venta(sender, instance, created, **kwargs):
-    if created and instance.asiento is None:
-        # Obtén las cuentas (ajusta según tu plan de cuentas)
-        cuenta_caja = CuentaContable.objects.get(codigo="1111")  # Efectivo
-        cuenta_ventas = CuentaContable.objects.get(codigo="4110")  # Ingresos por servicios
+    # Los fixtures (loaddata, raw=True) ya incluyen sus asientos
+    if created and instance.asiento is None and not kwargs.get('raw'):
+        # Cuentas según las reglas de contabilización (contado → 1111, crédito → 1122);
+        # con CONTABILIDAD_COLA_ASINCRONA solo se encola
+        try:
+            contabilizar_documento(instance)
+        except CuentaContable.DoesNotExist:
+            # Si no existen las cuentas, no crees el asiento (mejor notificar);
+            # corregir_documentos_sin_asiento lo genera después
+            return
 
-        asiento = AsientoContable.objects.create(
-            fecha=instance.fecha,
-            descripcion=f"Venta N° {instance.numero_factura} a {instance.cliente.nombre}",
-            usuario=instance.usuario
-        )
 
-        Movimiento.objects.create(asiento=asiento, cuenta=cuenta_caja, debe=instance.total, haber=0)
-        Movimiento.objects.create(asiento=asiento, cuenta=cuenta_ventas, debe=0, haber=instance.total)
-
-        instance.asiento = asiento
-        instance.save()
\ No newline at end of file
+@receiver(post_save, sender=Venta)
+@receiver(post_delete, sender=Venta)
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+def invalidar_libro_ventas(sender, **kwargs):
+    # Nueva versión de los libros fiscales en la misma transacción
+    invalidar_documentos()
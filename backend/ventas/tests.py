@@ -1,3 +1,167 @@
-from django.test import TestCase
+# ventas/tests.py
+import csv
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from compras.models import Compra
+from contabilidad.contabilizacion import contabilizar_documentos, registrar_asientos
+from contabilidad.models import AsientoContable, CuentaContable, ReglaContabilizacion, SaldoCuenta
+from contabilidad.reparacion import asientos_duplicados
+from contabilidad.tests import PruebaContable
+from .models import Cliente, Venta
+from .views import ENCABEZADOS_LIBRO
 
-# Create your tests here.
+
+class VentaTests(PruebaContable):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.cliente_venta = Cliente.objects.create(rif='J-00000001-0', nombre='Cliente Prueba')
+
+    def vender(self, numero, condicion='contado', base=Decimal('100.00'), iva=Decimal('16.00')):
+        respuesta = self.cliente.post('/api/ventas/ventas/', {
+            'fecha': '2025-03-10',
+            'numero_factura': numero,
+            'cliente_id': self.cliente_venta.id,
+            'subtotal': str(base),
+            'base_imponible_general': str(base),
+            'impuesto_general': str(iva),
+            'total': str(base + iva),
+            'estado': 'emitida',
+            'condicion_pago': condicion,
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        return Venta.objects.get(pk=respuesta.data['id'])
+
+    def lineas(self, venta):
+        return sorted(
+            (m.cuenta.codigo, m.debe, m.haber)
+            for m in venta.asiento.movimientos.select_related('cuenta')
+        )
+
+    def test_asiento_con_reglas_predeterminadas(self):
+        venta = self.vender('F-1')
+        self.assertEqual(venta.asiento.origen_tipo, 'venta')
+        self.assertEqual(self.lineas(venta), [
+            ('1111', Decimal('116.00'), Decimal('0.00')),
+            ('2111', Decimal('0.00'), Decimal('16.00')),
+            ('4110', Decimal('0.00'), Decimal('100.00')),
+        ])
+
+    def test_venta_a_credito_usa_cuentas_por_cobrar(self):
+        venta = self.vender('F-2', condicion='credito')
+        self.assertIn(('1122', Decimal('116.00'), Decimal('0.00')), self.lineas(venta))
+
+    def test_sin_cuenta_2111_el_iva_va_a_2110(self):
+        CuentaContable.objects.filter(codigo='2111').delete()
+        venta = self.vender('F-3')
+        self.assertIn(('2110', Decimal('0.00'), Decimal('16.00')), self.lineas(venta))
+
+    def test_sin_cuentas_la_venta_se_guarda_sin_asiento(self):
+        CuentaContable.objects.filter(codigo__in=['2110', '2111']).delete()
+        venta = self.vender('F-4')
+        self.assertIsNone(venta.asiento)
+
+    def test_reglas_configuradas_reemplazan_las_predeterminadas(self):
+        for orden, (codigo, lado, importe) in enumerate([
+            ('1122', 'debe', 'total'), ('4110', 'haber', 'base'), ('2110', 'haber', 'iva'),
+        ]):
+            ReglaContabilizacion.objects.create(
+                tipo_documento='venta', cuenta=self.cuentas[codigo], lado=lado, importe=importe, orden=orden
+            )
+        venta = self.vender('F-5')
+        self.assertEqual([codigo for codigo, _, _ in self.lineas(venta)], ['1122', '2110', '4110'])
+
+    def test_los_montos_exentos_van_a_la_base(self):
+        respuesta = self.cliente.post('/api/ventas/ventas/', {
+            'fecha': '2025-03-10', 'numero_factura': 'F-9', 'cliente_id': self.cliente_venta.id,
+            'subtotal': '150.00', 'base_imponible_general': '100.00', 'impuesto_general': '16.00',
+            'total': '166.00', 'estado': 'emitida',
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        venta = Venta.objects.get(pk=respuesta.data['id'])
+        self.assertIn(('4110', Decimal('0.00'), Decimal('150.00')), self.lineas(venta))
+
+    def test_reglas_que_no_cuadran_responden_400(self):
+        ReglaContabilizacion.objects.create(
+            tipo_documento='venta', cuenta=self.cuentas['1111'], lado='debe', importe='total'
+        )
+        respuesta = self.cliente.post('/api/ventas/ventas/', {
+            'fecha': '2025-03-10', 'numero_factura': 'F-10', 'cliente_id': self.cliente_venta.id,
+            'subtotal': '100.00', 'total': '100.00', 'estado': 'emitida',
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(Venta.objects.filter(numero_factura='F-10').exists())
+
+    def test_contabilizar_de_nuevo_no_duplica_el_asiento(self):
+        venta = self.vender('F-6')
+        asiento_id = venta.asiento_id
+        venta.asiento = None
+        self.assertEqual(contabilizar_documentos([venta]), [])
+        self.assertEqual(venta.asiento_id, asiento_id)
+
+    def test_libro_de_ventas_en_csv(self):
+        venta = self.vender('F-11')
+        respuesta = self.cliente.get('/api/ventas/reportes/libro-ventas/', {'formato': 'csv', 'anio': 2025})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        filas = list(csv.reader(StringIO(b''.join(respuesta.streaming_content).decode('utf-8'))))
+        self.assertEqual(filas[0], ENCABEZADOS_LIBRO)
+        self.assertEqual(filas[1][:3], [str(venta.id), '2025-03-10', 'F-11'])
+        self.assertEqual(filas[1][7], '116.00')
+        self.assertEqual(filas[2], ['TOTAL', 'General 16%', '100.00', '16.00'])
+
+    def test_cargar_datos_prueba_contabiliza_cada_documento_una_vez(self):
+        if not get_user_model().objects.filter(id=1).exists():
+            get_user_model().objects.create_user('admin@localhost', 'Admin', 'Prueba', id=1)
+        for _ in range(2):
+            call_command('cargar_datos_prueba', stdout=StringIO())
+
+        documentos = list(Compra.objects.select_related('asiento')) + list(Venta.objects.select_related('asiento'))
+        self.assertEqual(len(documentos), 6)
+        self.assertEqual(AsientoContable.objects.count(), 6)
+        for documento in documentos:
+            self.assertEqual(documento.asiento.origen_id, documento.id)
+
+    def duplicar(self, asiento, **origen):
+        """Copia de `asiento` como la dejaba la doble contabilización."""
+        return registrar_asientos([{
+            'fecha': asiento.fecha,
+            'descripcion': asiento.descripcion,
+            'movimientos': [
+                {'cuenta': m.cuenta, 'debe': m.debe, 'haber': m.haber} for m in asiento.movimientos.all()
+            ],
+            **origen,
+        }])[0]
+
+    def test_asientos_duplicados_se_listan_y_eliminan(self):
+        # Duplicado sin origen (señal + vista antes de la clave de origen)
+        venta = self.vender('F-7')
+        sin_origen = self.duplicar(venta.asiento)
+        # El documento quedó enlazado a la copia manual y el de la señal, huérfano
+        otra = self.vender('F-8')
+        huerfano = otra.asiento
+        manual = self.duplicar(huerfano)
+        Venta.objects.filter(pk=otra.pk).update(asiento=manual)
+
+        duplicados = asientos_duplicados()
+        self.assertEqual(
+            [(d['id'], d['conservar']) for d in duplicados],
+            [(sin_origen.id, venta.asiento_id), (huerfano.id, manual.id)],
+        )
+
+        salida = StringIO()
+        call_command('corregir_asientos_duplicados', stdout=salida)
+        self.assertIn('Asientos duplicados: 2', salida.getvalue())
+        self.assertTrue(AsientoContable.objects.filter(id=sin_origen.id).exists())
+
+        call_command('corregir_asientos_duplicados', '--eliminar', stdout=StringIO())
+        self.assertEqual(asientos_duplicados(), [])
+        self.assertEqual(AsientoContable.objects.count(), 2)
+        manual.refresh_from_db()
+        self.assertEqual((manual.origen_tipo, manual.origen_id), ('venta', otra.id))
+        # Los saldos ya no cuentan los duplicados
+        self.assertEqual(SaldoCuenta.objects.get(cuenta=self.cuentas['1111']).total_debe, Decimal('232.00'))
@@ -1,61 +1,52 @@
 # ventas/views.py
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework import viewsets
-from django.contrib.auth import get_user_model
+from django.db import transaction
 from .models import Venta, Cliente
 from .serializers import VentaSerializer, ClienteSerializer
-from contabilidad.models import AsientoContable, Movimiento, CuentaContable
-from decimal import Decimal
-from django.core.management import call_command
-import io
-import sys
-
-User = get_user_model()
+from contabilidad.paginacion import FechaIdCursorPagination
+from contabilidad.libros_fiscales import filtrar_periodo, formato_exportacion, respuesta_libro
+from contabilidad.cache_reportes import VERSION_DOCUMENTOS, reporte_cacheado
+from contabilidad.contabilizacion import ErrorContabilizacion
+from contabilidad.tareas import iniciar_tarea_reparacion
 
 class VentaViewSet(viewsets.ModelViewSet):
     queryset = Venta.objects.all().order_by('-fecha')
     serializer_class = VentaSerializer
+    pagination_class = FechaIdCursorPagination
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        # Guardar la venta
-        venta = serializer.save(usuario=self.request.user)
-
-        # Obtener cuentas del plan de cuentas (ajusta según tu estructura)
+        # Guardar la venta: el asiento lo genera la señal post_save
+        # (crear_asiento_venta) en esta misma transacción
         try:
-            cuenta_caja = CuentaContable.objects.get(codigo="1111")  # Efectivo
-            cuenta_ventas = CuentaContable.objects.get(codigo="4110")  # Ingresos por servicios
-        except CuentaContable.DoesNotExist:
-            raise Exception("Las cuentas contables requeridas no existen. Verifica el Plan de Cuentas.")
+            serializer.save(usuario=self.request.user)
+        except ErrorContabilizacion as error:
+            # Reglas de contabilización que no cuadran: la venta no se guarda
+            raise ValidationError({'asiento': str(error)})
 
-        # Crear asiento contable
-        asiento = AsientoContable.objects.create(
-            fecha=venta.fecha,
-            descripcion=f"Venta N° {venta.numero_factura} a {venta.cliente.nombre}",
-            usuario=self.request.user
-        )
+@api_view(['GET'])
+@reporte_cacheado('libro_ventas', versiones=(VERSION_DOCUMENTOS,), sin_cache=('formato',))
+def libro_ventas(request):
+    """
+    Libro de Ventas. Filtra por ?anio= y ?mes=.
+    Con ?formato=csv|txt se descarga en streaming (layout SENIAT en txt),
+    con los totales por alícuota al final.
+    """
+    formato = formato_exportacion(request)
+    ventas = filtrar_periodo(Venta.objects.select_related('cliente'), request).order_by('fecha', 'id')
 
-        # Movimientos: Debe (caja), Haber (ventas)
-        Movimiento.objects.create(
-            asiento=asiento,
-            cuenta=cuenta_caja,
-            debe=venta.total,
-            haber=Decimal('0.00')
+    if formato:
+        return respuesta_libro(
+            ventas.iterator(chunk_size=2000),
+            ENCABEZADOS_LIBRO,
+            _fila_libro,
+            'libro-ventas',
+            formato
         )
-        Movimiento.objects.create(
-            asiento=asiento,
-            cuenta=cuenta_ventas,
-            debe=Decimal('0.00'),
-            haber=venta.total
-        )
-
-        # Asociar asiento a la venta
-        venta.asiento = asiento
-        venta.save()
 
-@api_view(['GET'])
-def libro_ventas(request):
-    ventas = Venta.objects.all().order_by('fecha')
     data = []
 
     for v in ventas:
@@ -79,6 +70,24 @@ def libro_ventas(request):
 
     return Response(data)
 
+
+ENCABEZADOS_LIBRO = [
+    'operacion', 'fecha', 'numero_factura', 'numero_control', 'rif_cliente', 'nombre_cliente',
+    'tipo_transaccion', 'total_venta', 'ventas_sin_derecho_fiscal',
+    'base_general', 'impuesto_general', 'base_reducida', 'impuesto_reducido',
+    'base_adicional', 'impuesto_adicional',
+]
+
+
+def _fila_libro(v):
+    return [
+        v.id, v.fecha.isoformat(), v.numero_factura, v.numero_control or '',
+        v.cliente.rif, v.cliente.nombre, 'F', v.total, '0.00',
+        v.base_imponible_general, v.impuesto_general,
+        v.base_imponible_reducida, v.impuesto_reducido,
+        v.base_imponible_adicional, v.impuesto_adicional,
+    ]
+
 class ClienteViewSet(viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
@@ -93,25 +102,14 @@ class ClienteViewSet(viewsets.ModelViewSet):
 @api_view(['POST'])
 def corregir_ventas_sin_asiento_api(request):
     """
-    Endpoint para corregir ventas sin asiento desde el frontend
+    Endpoint para corregir ventas sin asiento desde el frontend.
+    La corrección corre en segundo plano: el avance se consulta en
+    /api/contabilidad/reparaciones/<tarea_id>/
     """
-    # Capturar salida del comando
-    old_stdout = sys.stdout
-    sys.stdout = captured_output = io.StringIO()
-
-    try:
-        call_command('corregir_ventas_sin_asiento')
-        output = captured_output.getvalue()
-        sys.stdout = old_stdout
-
-        return Response({
-            'success': True,
-            'message': 'Ventas corregidas exitosamente',
-            'log': output
-        })
-    except Exception as e:
-        sys.stdout = old_stdout
-        return Response({
-            'success': False,
-            'error': str(e)
-        }, status=500)
\ No newline at end of file
+    tarea = iniciar_tarea_reparacion(usuario=request.user, tipos=['venta'])
+    return Response({
+        'success': True,
+        'message': 'Corrección de ventas iniciada',
+        'tarea_id': tarea.id,
+        'log': f'Tarea de reparación {tarea.id} iniciada en segundo plano',
+    }, status=202)
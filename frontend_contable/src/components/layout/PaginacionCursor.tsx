@@ -0,0 +1,46 @@
+// src/components/layout/PaginacionCursor.tsx
+import React from 'react';
+import { Box, Button } from '@mui/material';
+
+// Respuesta de los listados paginados por cursor del backend
+export interface PaginaCursor<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+// Extrae el parámetro ?cursor= de un enlace next/previous
+export const cursorDe = (enlace: string | null): string | null => {
+  if (!enlace) return null;
+  return new URL(enlace).searchParams.get('cursor');
+};
+
+interface Props {
+  next: string | null;
+  previous: string | null;
+  onNavegar: (cursor: string | null) => void;
+  disabled?: boolean;
+}
+
+const PaginacionCursor = ({ next, previous, onNavegar, disabled = false }: Props) => (
+  <Box sx={{ display: 'flex', justifyContent: 'flex-end', gap: 1, mt: 2 }}>
+    <Button
+      variant="outlined"
+      size="small"
+      disabled={disabled || !previous}
+      onClick={() => onNavegar(cursorDe(previous))}
+    >
+      ← Anterior
+    </Button>
+    <Button
+      variant="outlined"
+      size="small"
+      disabled={disabled || !next}
+      onClick={() => onNavegar(cursorDe(next))}
+    >
+      Siguiente →
+    </Button>
+  </Box>
+);
+
+export default PaginacionCursor;
@@ -41,21 +41,36 @@ interface ResultadoCorreccion {
   error?: string;
 }
 
+interface TareaReparacion {
+  id: number;
+  estado: 'pendiente' | 'en_proceso' | 'completada' | 'error';
+  total: number;
+  procesados: number;
+  log: string;
+}
+
 const Admin = () => {
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState<ResultadoCorreccion | null>(null);
   const [balance, setBalance] = useState<BalanceGeneralData | null>(null);
 
-  // Corregir ventas sin asiento
+  // Corregir ventas sin asiento (corre en segundo plano: se consulta el avance de la tarea)
   const corregirVentas = async () => {
     setLoading(true);
     setResult(null);
     try {
-      const res = await apiClient.post<{ message: string; log: string }>('/ventas/corregir-ventas-sin-asiento/');
+      const res = await apiClient.post<{ message: string; tarea_id: number }>('/ventas/corregir-ventas-sin-asiento/');
+      let tarea: TareaReparacion;
+      do {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        tarea = (await apiClient.get<TareaReparacion>(`/contabilidad/reparaciones/${res.data.tarea_id}/`)).data;
+        setResult({ success: true, message: res.data.message, log: tarea.log });
+      } while (tarea.estado === 'pendiente' || tarea.estado === 'en_proceso');
+
       setResult({
-        success: true,
+        success: tarea.estado === 'completada',
         message: res.data.message,
-        log: res.data.log,
+        log: tarea.log,
       });
     } catch (err: any) {
       setResult({
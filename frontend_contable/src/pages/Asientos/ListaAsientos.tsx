@@ -17,6 +17,7 @@ import {
 } from '@mui/material';
 import { KeyboardArrowDown, KeyboardArrowUp } from '@mui/icons-material';
 import apiClient from '../../services/apiClient.ts';
+import PaginacionCursor from '../../components/layout/PaginacionCursor.tsx';
 
 // Tipos actualizados: debe y haber pueden ser string o number
 interface Movimiento {
@@ -46,29 +47,37 @@ const ListaAsientos = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [openId, setOpenId] = useState<number | null>(null);
-
-  useEffect(() => {
-    const cargarAsientos = async () => {
-      try {
-        const res = await apiClient.get('/contabilidad/asientos/');
-        
-        // Manejar paginación
-        const data = Array.isArray(res.data) ? res.data : (res.data.results || []);
-
-        // Aseguramos que sea un array válido
-        if (!Array.isArray(data)) {
-          throw new Error('La respuesta no es un array');
-        }
-
-        setAsientos(data);
-      } catch (err: any) {
-        console.error('Error al cargar asientos:', err);
-        setError('No se pudieron cargar los asientos contables.');
-      } finally {
-        setLoading(false);
+  const [next, setNext] = useState<string | null>(null);
+  const [previous, setPrevious] = useState<string | null>(null);
+
+  const cargarAsientos = async (cursor: string | null = null) => {
+    setLoading(true);
+    try {
+      const res = await apiClient.get('/contabilidad/asientos/', {
+        params: cursor ? { cursor } : {},
+      });
+
+      // Paginación por cursor: { next, previous, results }
+      const data = res.data.results || [];
+
+      // Aseguramos que sea un array válido
+      if (!Array.isArray(data)) {
+        throw new Error('La respuesta no es un array');
       }
-    };
 
+      setAsientos(data);
+      setNext(res.data.next);
+      setPrevious(res.data.previous);
+      setOpenId(null);
+    } catch (err: any) {
+      console.error('Error al cargar asientos:', err);
+      setError('No se pudieron cargar los asientos contables.');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  useEffect(() => {
     cargarAsientos();
   }, []);
 
@@ -208,6 +217,8 @@ const ListaAsientos = () => {
           </Table>
         </TableContainer>
       )}
+
+      <PaginacionCursor next={next} previous={previous} onNavegar={cargarAsientos} disabled={loading} />
     </Box>
   );
 };
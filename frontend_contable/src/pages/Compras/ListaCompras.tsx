@@ -14,26 +14,31 @@ import {
 } from '@mui/material';
 import FormCompra from '../../components/Compras/FormCompra.tsx';
 import apiClient from '../../services/apiClient.ts'
+import PaginacionCursor from '../../components/layout/PaginacionCursor.tsx';
 const ListaCompras = () => {
   const [compras, setCompras] = useState([]);
   const [showForm, setShowForm] = useState(false);
+  const [next, setNext] = useState<string | null>(null);
+  const [previous, setPrevious] = useState<string | null>(null);
+
+  const cargarCompras = async (cursor: string | null = null) => {
+    try {
+      const res = await apiClient.get('compras/compras/', { params: cursor ? { cursor } : {} });
+      setCompras(res.data.results);
+      setNext(res.data.next);
+      setPrevious(res.data.previous);
+    } catch (err) {
+      console.error(err);
+    }
+  };
 
   useEffect(() => {
-    const cargarCompras = async () => {
-      try {
-        const res = await apiClient.get('compras/compras/');
-        setCompras(res.data.results);
-      } catch (err) {
-        console.error(err);
-      }
-    };
     cargarCompras();
   }, []);
 
   const handleSuccess =  async () => {
-    // Recargar lista
-    const res = await apiClient.get('compras/compras/');
-    setCompras(res.data.results);
+    // Recargar lista desde la primera página
+    await cargarCompras();
     setShowForm(false);
   };
 
@@ -79,6 +84,8 @@ const ListaCompras = () => {
           </TableBody>
         </Table>
       </TableContainer>
+
+      <PaginacionCursor next={next} previous={previous} onNavegar={cargarCompras} />
     </Box>
   );
 };
@@ -44,28 +44,18 @@ const Dashboard = () => {
 
         // Cargar todos los datos en paralelo para mayor eficiencia
         const [
-          resCuentas,
-          resAsientos,
+          resResumen,
           resEstadoResultados,
           resBalanceGeneral,
         ] = await Promise.all([
-          apiClient.get('/contabilidad/cuentas/'),
-          apiClient.get('/contabilidad/asientos/'),
+          apiClient.get('/contabilidad/reportes/resumen/'),
           apiClient.get('/contabilidad/reportes/estado-resultados/'),
           apiClient.get('/contabilidad/reportes/balance-general/'),
         ]);
 
-        // Procesar cuentas
-        const cuentasCount = Array.isArray(resCuentas.data)
-          ? resCuentas.data.length
-          : resCuentas.data.count || 0;
-        setTotalCuentas(cuentasCount);
-
-        // Procesar asientos
-        const asientosCount = Array.isArray(resAsientos.data)
-          ? resAsientos.data.length
-          : resAsientos.data.count || 0;
-        setTotalAsientos(asientosCount);
+        // Totales (los listados paginados por cursor no traen count)
+        setTotalCuentas(resResumen.data.total_cuentas || 0);
+        setTotalAsientos(resResumen.data.total_asientos || 0);
 
         // Utilidad neta
         setUtilidadNeta(resEstadoResultados.data.utilidad_neta || 0);
@@ -18,6 +18,7 @@ import {
 } from '@mui/material';
 import { KeyboardArrowDown, KeyboardArrowUp } from '@mui/icons-material';
 import apiClient from '../../services/apiClient.ts';
+import PaginacionCursor from '../../components/layout/PaginacionCursor.tsx';
 
 interface Movimiento {
   cuenta: string;
@@ -41,19 +42,28 @@ const LibroDiario = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [openId, setOpenId] = useState<number | null>(null);
+  const [next, setNext] = useState<string | null>(null);
+  const [previous, setPrevious] = useState<string | null>(null);
+
+  const cargarLibro = async (cursor: string | null = null) => {
+    setLoading(true);
+    try {
+      const res = await apiClient.get('/contabilidad/reportes/libro-diario/', {
+        params: cursor ? { cursor } : {},
+      });
+      setAsientos(res.data.results || []);
+      setNext(res.data.next);
+      setPrevious(res.data.previous);
+      setOpenId(null);
+    } catch (err: any) {
+      setError('Error al cargar el Libro Diario');
+      console.error(err);
+    } finally {
+      setLoading(false);
+    }
+  };
 
   useEffect(() => {
-    const cargarLibro = async () => {
-      try {
-        const res = await apiClient.get('/contabilidad/reportes/libro-diario/');
-        setAsientos(res.data);
-      } catch (err: any) {
-        setError('Error al cargar el Libro Diario');
-        console.error(err);
-      } finally {
-        setLoading(false);
-      }
-    };
     cargarLibro();
   }, []);
 
@@ -169,6 +179,8 @@ const LibroDiario = () => {
           </Table>
         </TableContainer>
       )}
+
+      <PaginacionCursor next={next} previous={previous} onNavegar={cargarLibro} disabled={loading} />
     </Box>
   );
 };
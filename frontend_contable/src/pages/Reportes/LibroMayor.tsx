@@ -19,6 +19,7 @@ import {
   Button,
 } from '@mui/material';
 import apiClient from '../../services/apiClient.ts';
+import PaginacionCursor from '../../components/layout/PaginacionCursor.tsx';
 
 interface CuentaContable {
   id: number;
@@ -40,6 +41,9 @@ const LibroMayor = () => {
   const [cuentas, setCuentas] = useState<CuentaContable[]>([]);
   const [selectedCuenta, setSelectedCuenta] = useState<number | ''>('');
   const [movimientos, setMovimientos] = useState<Movimiento[]>([]);
+  const [saldoInicial, setSaldoInicial] = useState(0);
+  const [next, setNext] = useState<string | null>(null);
+  const [previous, setPrevious] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
 
@@ -56,7 +60,8 @@ const LibroMayor = () => {
     cargarCuentas();
   }, []);
 
-  const handleBuscar = async () => {
+  // Cada página trae hasta 100 movimientos; el cursor conserva el saldo acumulado
+  const handleBuscar = async (cursor: string | null = null) => {
     if (!selectedCuenta) {
       setError('Debe seleccionar una cuenta');
       return;
@@ -68,10 +73,13 @@ const LibroMayor = () => {
 
     try {
       const res = await apiClient.get(`/contabilidad/reportes/libro-mayor/`, {
-        params: { cuenta_id: selectedCuenta }
+        params: cursor ? { cuenta_id: selectedCuenta, cursor } : { cuenta_id: selectedCuenta }
       });
 
       setMovimientos(res.data.movimientos);
+      setSaldoInicial(res.data.saldo_inicial || 0);
+      setNext(res.data.next);
+      setPrevious(res.data.previous);
     } catch (err: any) {
       setError(
         err.response?.data?.error ||
@@ -110,7 +118,7 @@ const LibroMayor = () => {
           </FormControl>
           <Button
             variant="contained"
-            onClick={handleBuscar}
+            onClick={() => handleBuscar()}
             disabled={loading}
             sx={{ minWidth: 120 }}
           >
@@ -150,6 +158,16 @@ const LibroMayor = () => {
               </TableRow>
             </TableHead>
             <TableBody>
+              <TableRow>
+                <TableCell colSpan={5}>
+                  <em>Saldo inicial de la página</em>
+                </TableCell>
+                <TableCell align="right">
+                  <Typography fontWeight="bold">
+                    {saldoInicial.toLocaleString('es-VE', { style: 'currency', currency: 'USD' })}
+                  </Typography>
+                </TableCell>
+              </TableRow>
               {movimientos.map((mov, idx) => (
                 <TableRow key={idx}>
                   <TableCell>{new Date(mov.fecha).toLocaleDateString()}</TableCell>
@@ -181,6 +199,10 @@ const LibroMayor = () => {
         </TableContainer>
       )}
 
+      {!loading && (next || previous) && (
+        <PaginacionCursor next={next} previous={previous} onNavegar={handleBuscar} />
+      )}
+
       {!loading && !movimientos.length && selectedCuenta && (
         <Alert severity="info">No hay movimientos para esta cuenta.</Alert>
       )}
@@ -14,35 +14,33 @@ import {
 } from '@mui/material';
 import FormVenta from '../../components/Ventas/FormVenta.tsx';
 import apiClient from '../../services/apiClient.ts';
+import PaginacionCursor from '../../components/layout/PaginacionCursor.tsx';
 
 const ListaVentas = () => {
   const [ventas, setVentas] = useState([]);
   const [showForm, setShowForm] = useState(false);
+  const [next, setNext] = useState<string | null>(null);
+  const [previous, setPrevious] = useState<string | null>(null);
+
+  const cargarVentas = async (cursor: string | null = null) => {
+    try {
+      const res = await apiClient.get('ventas/ventas/', { params: cursor ? { cursor } : {} });
+      setVentas(res.data.results);
+      setNext(res.data.next);
+      setPrevious(res.data.previous);
+    } catch (err) {
+      console.error('Error al cargar ventas:', err);
+    }
+  };
 
   useEffect(() => {
-    const cargarVentas = async () => {
-      try {
-        const res = await apiClient.get('ventas/ventas/');
-        console.log(res.data.results)
-        setVentas(res.data.results);
-      } catch (err) {
-        console.error('Error al cargar ventas:', err);
-      }
-    };
     cargarVentas();
   }, []);
 
   const handleSuccess = () => {
-    const cargarVentas = async () => {
-      try {
-        const res = await apiClient.get('ventas/ventas/');
-        setVentas(res.data.results);
-        setShowForm(false);
-      } catch (err) {
-        console.error('Error al recargar ventas:', err);
-      }
-    };
+    // Recargar lista desde la primera página
     cargarVentas();
+    setShowForm(false);
   };
 
   return (
@@ -87,6 +85,8 @@ const ListaVentas = () => {
           </TableBody>
         </Table>
       </TableContainer>
+
+      <PaginacionCursor next={next} previous={previous} onNavegar={cargarVentas} />
     </Box>
   );
 };